@@ -0,0 +1,123 @@
+"""
+Benchmark do custo de autenticação por requisição, utilizando um servidor JWKS local.
+
+Compara:
+- Busca das chaves públicas a cada requisição (comportamento anterior ao cache de JWKS).
+- Chaves públicas em cache, com verificação da assinatura a cada requisição.
+- Token já verificado e memorizado até a expiração.
+
+Execução (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_auth
+"""
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rsa
+
+REQUISICOES = 200
+KID = "chave-benchmark"
+DOMINIO = "auth.benchmark.local"
+AUDIENCE = "api-benchmark"
+
+
+def _base64url_inteiro(valor):
+    conteudo = valor.to_bytes((valor.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(conteudo).rstrip(b"=").decode("ascii")
+
+
+def iniciar_servidor_jwks(chave_publica):
+    """
+    Inicia um servidor HTTP local que responde o JWKS com a chave pública informada.
+
+    Retorna:
+    - Tuple (servidor, contador) onde contador["requisicoes"] registra as buscas recebidas.
+    """
+    contador = {"requisicoes": 0}
+    jwks = json.dumps({
+        "keys": [{
+            "kty": "RSA",
+            "kid": KID,
+            "use": "sig",
+            "alg": "RS256",
+            "n": _base64url_inteiro(chave_publica.n),
+            "e": _base64url_inteiro(chave_publica.e),
+        }]
+    }).encode("utf-8")
+
+    class ManipuladorJWKS(BaseHTTPRequestHandler):
+        def do_GET(self):
+            contador["requisicoes"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(jwks)))
+            self.end_headers()
+            self.wfile.write(jwks)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ManipuladorJWKS)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, contador
+
+
+async def medir(nome, verificar, contador):
+    requisicoes_antes = contador["requisicoes"]
+    inicio = time.perf_counter()
+
+    for _ in range(REQUISICOES):
+        await verificar()
+
+    tempo_medio = (time.perf_counter() - inicio) / REQUISICOES
+    buscas = contador["requisicoes"] - requisicoes_antes
+    print(f"{nome:<40} {tempo_medio * 1_000_000:>10.0f} µs/requisição | buscas ao JWKS: {buscas}")
+
+
+async def main():
+    chave_publica, chave_privada = rsa.newkeys(2048)
+    servidor, contador = iniciar_servidor_jwks(chave_publica)
+
+    # As variáveis precisam ser definidas antes da importação do serviço de autenticação
+    os.environ["JWKS_URL"] = f"http://127.0.0.1:{servidor.server_address[1]}/.well-known/jwks.json"
+    os.environ["AUTH0_DOMAIN"] = DOMINIO
+    os.environ["AUTH0_API_AUDIENCE"] = AUDIENCE
+
+    from jose import jwt
+    from services import auth_service
+    from services.http_client_service import fechar_cliente_http
+
+    token = jwt.encode(
+        {"sub": "benchmark@clients", "aud": AUDIENCE, "iss": f"https://{DOMINIO}/", "exp": int(time.time()) + 3600},
+        chave_privada.save_pkcs1().decode("ascii"),
+        algorithm="RS256",
+        headers={"kid": KID}
+    )
+
+    async def sem_cache():
+        auth_service.cache_jwks = auth_service.CacheJWKS()
+        auth_service.tokens_verificados = auth_service.TokensVerificados()
+        await auth_service.verify_jwt(token)
+
+    async def com_cache_jwks():
+        auth_service.tokens_verificados = auth_service.TokensVerificados()
+        await auth_service.verify_jwt(token)
+
+    async def com_token_memorizado():
+        await auth_service.verify_jwt(token)
+
+    await medir("Busca do JWKS a cada requisição", sem_cache, contador)
+    await medir("JWKS em cache", com_cache_jwks, contador)
+    await medir("JWKS em cache + token memorizado", com_token_memorizado, contador)
+
+    await fechar_cliente_http()
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
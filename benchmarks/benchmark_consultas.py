@@ -0,0 +1,450 @@
+"""
+Benchmark de ponta a ponta das consultas, executado contra o simulador local do portal
+(ver benchmarks/simulador_portal.py), sem depender do Portal da Transparência real.
+
+Para cada nível de concorrência, executa um número fixo de consultas com identificadores distintos
+(sem cache nem coalescência) e informa vazão, latência (p50/p95/p99), erros por tipo, tempo de CPU
+e pico de memória (RSS). Com o `psutil` instalado, CPU e memória incluem os processos do Chromium;
+sem ele, apenas o processo Python é medido (via `resource`).
+
+Modos:
+- direto: chama `consultar_dados_pessoa_fisica` (pool, governador, PortalPage e persistência).
+- api: inicia a API (uvicorn) no próprio processo e chama /consulta-pessoa-fisica via HTTP.
+
+Também compara, opcionalmente, o custo de abrir um navegador por consulta com o reaproveitamento
+de um navegador aberto (como no pool), e o custo de atualizar pessoas já consultadas após a inclusão
+de novos meses nas tabelas de recursos (coleta incremental).
+
+O resultado (parâmetros, commit e medições) é salvo em JSON em benchmarks/resultados/, permitindo
+comparar execuções entre commits.
+
+Execução (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_consultas --concorrencias 1,2,4 --consultas 20
+    python -m benchmarks.benchmark_consultas --modo api --latencia-ms 200 --sem-modo-rapido
+    python -m benchmarks.benchmark_consultas --linhas-por-tabela 120 --novos-meses 2 --sem-modo-rapido
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.simulador_portal import SimuladorPortal
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / "resultados"
+INTERVALO_AMOSTRAGEM_MEMORIA_SEGUNDOS = 0.2
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def gerar_cpf(numero):
+    """
+    Gera um CPF com dígitos verificadores válidos a partir de um número sequencial.
+    """
+    base = [int(d) for d in f"{numero % 10**9:09d}"]
+
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(base, range(tamanho + 1, 1, -1)))
+        resto = soma * 10 % 11
+        base.append(0 if resto == 10 else resto)
+
+    return "".join(str(d) for d in base)
+
+
+def configurar_ambiente(url_base, argumentos, diretorio):
+    """
+    Aponta os serviços para o simulador. Deve ser chamada antes de importar os módulos do projeto,
+    que leem a configuração na importação.
+    """
+    concorrencia_maxima = str(max(argumentos.concorrencias))
+
+    os.environ.update({
+        "URL_BASE_PORTAL_TRANSPARENCIA": url_base,
+        "DOMINIOS_PERMITIDOS": "127.0.0.1",
+        "PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA": diretorio,
+        "PATH_STORAGE_STATE": os.path.join(diretorio, "sessao", "storage_state.json"),
+        "ARMAZENAMENTO_BACKEND": "local",
+        "PROFILE": "local",
+        "TIPOS_RECEBIMENTO_PERMITIDOS": "auxílio brasil,auxílio emergencial,bolsa família",
+        "MODO_RAPIDO_RECURSOS": "true" if argumentos.modo_rapido else "false",
+        "POOL_MAX_CONTEXTOS_SIMULTANEOS": concorrencia_maxima,
+        "POOL_MAX_FILA": str(max(argumentos.concorrencias) * 10),
+        "GOVERNADOR_NAVEGACOES_POR_SEGUNDO": "0",
+        "GOVERNADOR_CONCORRENCIA_MINIMA": concorrencia_maxima,
+        "GOVERNADOR_CONCORRENCIA_MAXIMA": concorrencia_maxima,
+        "FILA_BACKEND": "",
+        "ATRASO_CORTESIA_SEGUNDOS": "0",
+    })
+
+
+class MedidorRecursos:
+    """
+    Mede o tempo de CPU e o pico de memória (RSS) durante um trecho do benchmark.
+
+    Com o psutil, soma o processo atual e seus filhos (Chromium), amostrando a memória periodicamente.
+    Sem ele, utiliza `resource` (apenas o processo Python; o pico é o do processo inteiro).
+    """
+
+    def __init__(self):
+        self.processo = psutil.Process() if psutil else None
+        self.pico_rss = 0
+        self._tarefa = None
+
+    def _processos(self):
+        processos = [self.processo]
+        try:
+            processos.extend(self.processo.children(recursive=True))
+        except psutil.Error:
+            pass
+        return processos
+
+    def _cpu(self):
+        if self.processo is None:
+            uso = resource.getrusage(resource.RUSAGE_SELF)
+            return uso.ru_utime + uso.ru_stime
+
+        total = 0
+        for processo in self._processos():
+            try:
+                tempos = processo.cpu_times()
+                total += tempos.user + tempos.system
+            except psutil.Error:
+                pass
+        return total
+
+    def _rss(self):
+        total = 0
+        for processo in self._processos():
+            try:
+                total += processo.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    async def _amostrar(self):
+        while True:
+            self.pico_rss = max(self.pico_rss, self._rss())
+            await asyncio.sleep(INTERVALO_AMOSTRAGEM_MEMORIA_SEGUNDOS)
+
+    async def __aenter__(self):
+        self._cpu_inicio = self._cpu()
+        if self.processo is not None:
+            self._tarefa = asyncio.create_task(self._amostrar())
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            self.pico_rss = max(self.pico_rss, self._rss())
+        else:
+            # ru_maxrss é informado em KB no Linux e em bytes no macOS
+            maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.pico_rss = maximo if sys.platform == "darwin" else maximo * 1024
+        self.cpu_segundos = self._cpu() - self._cpu_inicio
+
+    def resumo(self):
+        return {
+            "cpu_segundos": round(self.cpu_segundos, 2),
+            "pico_rss_mb": round(self.pico_rss / 1024 / 1024, 1),
+            "inclui_chromium": self.processo is not None,
+        }
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+async def executar_nivel(consultar, concorrencia, identificadores):
+    """
+    Executa as consultas com `concorrencia` execuções simultâneas (carga em malha fechada).
+
+    Parâmetros:
+    - consultar (callable): corrotina que recebe o identificador e levanta exceção em caso de erro.
+    - concorrencia (int): consultas em andamento ao mesmo tempo.
+    - identificadores (list): identificadores a consultar, um por consulta.
+
+    Retorna:
+    - dict com vazão, latências, erros por tipo, CPU e memória.
+    """
+    pendentes = list(identificadores)
+    latencias = []
+    erros = {}
+
+    async def executor():
+        while pendentes:
+            identificador = pendentes.pop()
+            inicio = time.perf_counter()
+            try:
+                await consultar(identificador)
+                latencias.append(time.perf_counter() - inicio)
+            except Exception as e:
+                erros[type(e).__name__] = erros.get(type(e).__name__, 0) + 1
+
+    async with MedidorRecursos() as medidor:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(executor() for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+
+    return {
+        "concorrencia": concorrencia,
+        "consultas": len(identificadores),
+        "sucessos": len(latencias),
+        "erros": erros,
+        "duracao_segundos": round(duracao, 2),
+        "vazao_consultas_por_segundo": round(len(latencias) / duracao, 3) if duracao else None,
+        "latencia_segundos": {
+            "media": round(statistics.mean(latencias), 3) if latencias else None,
+            "p50": _arredondar(percentil(latencias, 50)),
+            "p95": _arredondar(percentil(latencias, 95)),
+            "p99": _arredondar(percentil(latencias, 99)),
+        },
+        **medidor.resumo(),
+    }
+
+
+def _arredondar(valor):
+    return None if valor is None else round(valor, 3)
+
+
+class ErroHttp(Exception):
+    """
+    Resposta de erro da API no modo "api" (o nome da classe aparece nos erros por tipo).
+    """
+
+
+async def executar_atualizacao(consultar, simulador, novos_meses, identificadores):
+    """
+    Consulta novamente pessoas já consultadas após a inclusão de novos meses nas tabelas,
+    medindo o custo da atualização incremental (ver HistoricoRecursos).
+    """
+    requisicoes_antes = dict(simulador.requisicoes)
+    simulador.linhas_por_tabela += novos_meses
+    resultado = await executar_nivel(consultar, 1, identificadores)
+    resultado["novos_meses"] = novos_meses
+    resultado["requisicoes_simulador"] = {
+        rota: total - requisicoes_antes.get(rota, 0) for rota, total in simulador.requisicoes.items()
+    }
+    return resultado
+
+
+async def executar_modo_direto(argumentos, lotes, simulador):
+    from services.consulta_service import consultar_dados_pessoa_fisica
+    from services.http_client_service import fechar_cliente_http
+    from services.pool_navegadores_service import pool_navegadores
+
+    async def consultar(identificador):
+        await consultar_dados_pessoa_fisica(identificador, incluir_screenshot=argumentos.screenshot)
+
+    await pool_navegadores.iniciar()
+    try:
+        resultados = [await executar_nivel(consultar, concorrencia, lote) for concorrencia, lote in lotes]
+        if argumentos.novos_meses:
+            resultados.append(await executar_atualizacao(consultar, simulador, argumentos.novos_meses, lotes[0][1]))
+        return resultados
+    finally:
+        await pool_navegadores.encerrar()
+        await fechar_cliente_http()
+
+
+async def executar_modo_api(argumentos, lotes, simulador):
+    import httpx
+    import uvicorn
+
+    from main import app
+
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    tarefa = asyncio.create_task(servidor.serve())
+
+    while not servidor.started:
+        if tarefa.done():
+            await tarefa
+            raise RuntimeError("A API não pôde ser iniciada.")
+        await asyncio.sleep(0.1)
+
+    porta = servidor.servers[0].sockets[0].getsockname()[1]
+    limites = httpx.Limits(max_connections=max(argumentos.concorrencias))
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{porta}", timeout=None, limits=limites) as cliente:
+        async def consultar(identificador):
+            resposta = await cliente.get(
+                "/consulta-pessoa-fisica",
+                params={
+                    "identificador": identificador,
+                    "max_age": 0,
+                    "incluir_screenshot": str(argumentos.screenshot).lower(),
+                },
+                headers={"Authorization": "Bearer benchmark"},
+            )
+            if resposta.status_code != 200:
+                raise ErroHttp(f"HTTP {resposta.status_code}")
+
+        try:
+            resultados = [await executar_nivel(consultar, concorrencia, lote) for concorrencia, lote in lotes]
+            if argumentos.novos_meses:
+                resultados.append(await executar_atualizacao(consultar, simulador, argumentos.novos_meses, lotes[0][1]))
+            return resultados
+        finally:
+            servidor.should_exit = True
+            await tarefa
+
+
+async def comparar_inicializacao(url_base, repeticoes):
+    """
+    Compara abrir um navegador por consulta com reaproveitar um navegador aberto (pool),
+    medindo a abertura da página de visão geral do simulador em cada caso.
+
+    Retorna:
+    - dict com latência média e pico de memória de cada estratégia.
+    """
+    from playwright.async_api import async_playwright
+
+    url = f"{url_base}/pessoa/visao-geral"
+    resultado = {}
+
+    async def abrir_pagina(browser):
+        context = await browser.new_context()
+        page = await context.new_page()
+        await page.goto(url)
+        await context.close()
+
+    async with async_playwright() as p:
+        latencias = []
+        async with MedidorRecursos() as medidor:
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                browser = await p.chromium.launch(headless=True)
+                await abrir_pagina(browser)
+                await browser.close()
+                latencias.append(time.perf_counter() - inicio)
+        resultado["navegador_por_consulta"] = {"latencia_media_segundos": round(statistics.mean(latencias), 3), **medidor.resumo()}
+
+        browser = await p.chromium.launch(headless=True)
+        latencias = []
+        async with MedidorRecursos() as medidor:
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                await abrir_pagina(browser)
+                latencias.append(time.perf_counter() - inicio)
+        await browser.close()
+        resultado["navegador_reaproveitado"] = {"latencia_media_segundos": round(statistics.mean(latencias), 3), **medidor.resumo()}
+
+    return resultado
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados):
+    print(f"\n{'conc.':>5} {'ok':>5} {'erros':>6} {'consultas/s':>12} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'CPU (s)':>8} {'RSS (MB)':>9}")
+    for r in resultados:
+        latencia = r["latencia_segundos"]
+        if "novos_meses" in r:
+            print(f"atualização com {r['novos_meses']} novos meses (requisições ao simulador: {r['requisicoes_simulador']}):")
+        print(
+            f"{r['concorrencia']:>5} {r['sucessos']:>5} {sum(r['erros'].values()):>6} "
+            f"{r['vazao_consultas_por_segundo'] or 0:>12.3f} {latencia['p50'] or 0:>8.2f} {latencia['p95'] or 0:>8.2f} "
+            f"{latencia['p99'] or 0:>8.2f} {r['cpu_segundos']:>8.1f} {r['pico_rss_mb']:>9.1f}"
+        )
+        if r["erros"]:
+            print(f"{'':>5} erros: {r['erros']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de consultas contra o simulador local do portal")
+    parser.add_argument("--modo", choices=["direto", "api"], default="direto")
+    parser.add_argument("--concorrencias", type=lambda v: [int(c) for c in v.split(",")], default=[1, 2, 4])
+    parser.add_argument("--consultas", type=int, default=10, help="Consultas por nível de concorrência")
+    parser.add_argument("--tipo", choices=["cpf", "nome"], default="cpf", help="Tipo de identificador consultado")
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--paginas-resultados", type=int, default=2)
+    parser.add_argument("--beneficios", type=int, default=2)
+    parser.add_argument("--secoes-por-beneficio", type=int, default=2)
+    parser.add_argument("--linhas-por-tabela", type=int, default=25)
+    parser.add_argument("--sem-modo-rapido", dest="modo_rapido", action="store_false", help="Pagina as tabelas pelo DOM")
+    parser.add_argument("--sem-screenshot", dest="screenshot", action="store_false")
+    parser.add_argument("--novos-meses", type=int, default=0, metavar="N",
+                        help="Ao final, inclui N meses nas tabelas e consulta novamente as pessoas do primeiro nível (atualização incremental)")
+    parser.add_argument("--comparar-inicializacao", type=int, default=0, metavar="N",
+                        help="Repetições da comparação entre navegador por consulta e navegador reaproveitado (0 = não executa)")
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: benchmarks/resultados/consultas-<data>.json)")
+    argumentos = parser.parse_args()
+
+    simulador = SimuladorPortal(
+        latencia_ms=argumentos.latencia_ms,
+        paginas_resultados=argumentos.paginas_resultados,
+        beneficios=argumentos.beneficios,
+        secoes_por_beneficio=argumentos.secoes_por_beneficio,
+        linhas_por_tabela=argumentos.linhas_por_tabela,
+    )
+    url_base = simulador.iniciar()
+
+    # Identificadores distintos em todas as consultas, para que nenhuma seja atendida por cache ou coalescência
+    base = random.randrange(10**8)
+    lotes = []
+    for nivel, concorrencia in enumerate(argumentos.concorrencias):
+        numeros = range(base + nivel * argumentos.consultas, base + (nivel + 1) * argumentos.consultas)
+        if argumentos.tipo == "cpf":
+            lote = [gerar_cpf(n) for n in numeros]
+        else:
+            lote = [f"Pessoa Benchmark {n}" for n in numeros]
+        lotes.append((concorrencia, lote))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_ambiente(url_base, argumentos, diretorio)
+
+        if argumentos.modo == "api":
+            resultados = await executar_modo_api(argumentos, lotes, simulador)
+        else:
+            resultados = await executar_modo_direto(argumentos, lotes, simulador)
+
+    imprimir(resultados)
+
+    inicializacao = None
+    if argumentos.comparar_inicializacao:
+        inicializacao = await comparar_inicializacao(url_base, argumentos.comparar_inicializacao)
+        print("\nInicialização do navegador:")
+        for estrategia, medicao in inicializacao.items():
+            print(f"  {estrategia:<25} {medicao['latencia_media_segundos']:>7.3f} s/consulta | pico RSS {medicao['pico_rss_mb']:.1f} MB")
+
+    simulador.encerrar()
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "parametros": vars(argumentos),
+        "requisicoes_simulador": simulador.requisicoes,
+        "resultados": resultados,
+        "inicializacao": inicializacao,
+    }
+
+    saida = Path(argumentos.saida) if argumentos.saida else \
+        DIRETORIO_RESULTADOS / f"consultas-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=4, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultado salvo em {saida}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark da extração de uma tabela `.dados-detalhados` a partir de uma fixture HTML salva.
+
+Compara a leitura elemento a elemento (uma chamada ao Chromium por célula) com a extração
+em lote via `evaluate` (uma chamada por tabela).
+
+Execução (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_extracao
+"""
+import asyncio
+import time
+
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+from pages.extracao import extrair_tabela, normalizar_cabecalho
+
+FIXTURE_TABELA = Path(__file__).parent / "fixtures" / "tabela_recursos.html"
+REPETICOES = 20
+
+
+async def extrair_tabela_por_elemento(tabela):
+    """
+    Extração elemento a elemento, como era feita antes da extração em lote.
+
+    Retorna:
+    - Tuple (cabecalho, recursos, idas_e_voltas) com a quantidade de chamadas feitas ao navegador.
+    """
+    idas_e_voltas = 0
+
+    rows_list = tabela.get_by_role("row")
+    recursos_count = await rows_list.count()
+    idas_e_voltas += 1
+
+    ths = rows_list.nth(0).locator("th")
+    count_ths = await ths.count()
+    idas_e_voltas += 1
+
+    cabecalho = []
+    for i in range(count_ths):
+        cabecalho.append(normalizar_cabecalho(await ths.nth(i).inner_html()))
+        idas_e_voltas += 1
+
+    recursos = []
+    for i in range(1, recursos_count):
+        spans = rows_list.nth(i).locator("span")
+        count_span = await spans.count()
+        idas_e_voltas += 1
+
+        recurso = {}
+        for j in range(count_span):
+            recurso[cabecalho[j]] = await spans.nth(j).inner_html()
+            idas_e_voltas += 1
+        recursos.append(recurso)
+
+    return cabecalho, recursos, idas_e_voltas
+
+
+async def main():
+    html = FIXTURE_TABELA.read_text(encoding="utf-8")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(html)
+        tabela = page.locator(".dados-detalhados")
+
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            cabecalho_antigo, recursos_antigo, idas_e_voltas = await extrair_tabela_por_elemento(tabela)
+        tempo_por_elemento = (time.perf_counter() - inicio) / REPETICOES
+
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            cabecalho_lote, recursos_lote = await extrair_tabela(tabela)
+        tempo_lote = (time.perf_counter() - inicio) / REPETICOES
+
+        await browser.close()
+
+    assert (cabecalho_antigo, recursos_antigo) == (cabecalho_lote, recursos_lote), "Extrações divergentes"
+
+    print(f"Linhas extraídas: {len(recursos_lote)} | colunas: {len(cabecalho_lote)}")
+    print(f"Elemento a elemento: {idas_e_voltas} idas e voltas, {tempo_por_elemento * 1000:.1f} ms por tabela")
+    print(f"Em lote (evaluate):  1 ida e volta, {tempo_lote * 1000:.1f} ms por tabela")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+"""
+Benchmark da inicialização da API, executado contra o simulador local do portal
+(ver benchmarks/simulador_portal.py).
+
+Em cada repetição inicia um processo novo da API (uvicorn) e mede, a partir do início do processo:
+- o tempo até a primeira resposta 200 em "/" (a API aceita requisições);
+- o tempo até a primeira resposta 200 em /prontidao (pool de navegadores aberto e sessão aquecida);
+- o tempo até a primeira consulta bem-sucedida em /consulta-pessoa-fisica.
+
+Também mede o tempo de importação do módulo `main` em um processo novo. Com --comparar, repete as
+medições com POOL_INICIAR_EM_SEGUNDO_PLANO=false (pool iniciado antes de a API aceitar requisições).
+
+O resultado é salvo em JSON em benchmarks/resultados/, permitindo comparar execuções entre commits.
+
+Execução (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_inicializacao --repeticoes 3
+    python -m benchmarks.benchmark_inicializacao --repeticoes 3 --comparar
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from benchmarks.benchmark_consultas import DIRETORIO_RESULTADOS, commit_atual, configurar_ambiente, gerar_cpf
+from benchmarks.simulador_portal import SimuladorPortal
+
+INTERVALO_VERIFICACAO_SEGUNDOS = 0.02
+TEMPO_MAXIMO_SEGUNDOS = 120
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def status_http(url, timeout=None):
+    """
+    Retorna o status HTTP da resposta ou None se a API ainda não aceitar conexões.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resposta:
+            return resposta.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def aguardar_status_200(url, inicio, processo):
+    """
+    Repete a requisição até obter 200 e retorna o tempo (s) decorrido desde `inicio`.
+    """
+    while time.perf_counter() - inicio < TEMPO_MAXIMO_SEGUNDOS:
+        if processo.poll() is not None:
+            raise RuntimeError(f"A API encerrou durante a inicialização (código {processo.returncode}).")
+        if status_http(url, timeout=TEMPO_MAXIMO_SEGUNDOS) == 200:
+            return time.perf_counter() - inicio
+        time.sleep(INTERVALO_VERIFICACAO_SEGUNDOS)
+
+    raise RuntimeError(f"Tempo máximo excedido aguardando 200 em {url}.")
+
+
+def medir_importacao():
+    """
+    Mede o tempo (s) de importação do módulo `main` em um processo novo.
+    """
+    codigo = "import time; inicio = time.perf_counter(); import main; print(time.perf_counter() - inicio)"
+    resultado = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+
+def medir_inicializacao(identificador):
+    """
+    Inicia a API em um processo novo e mede os tempos até cada marco da inicialização.
+
+    Retorna:
+    - dict com os tempos (s) até "/", /prontidao e a primeira consulta.
+    """
+    porta = porta_livre()
+    url_base = f"http://127.0.0.1:{porta}"
+
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(porta), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+    )
+
+    try:
+        primeira_resposta = aguardar_status_200(f"{url_base}/", inicio, processo)
+
+        # A consulta é enviada assim que a API responde, em paralelo com o acompanhamento de /prontidao
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            consulta = executor.submit(
+                aguardar_status_200,
+                f"{url_base}/consulta-pessoa-fisica?identificador={identificador}&max_age=0&incluir_screenshot=false",
+                inicio,
+                processo,
+            )
+            pronta = executor.submit(aguardar_status_200, f"{url_base}/prontidao", inicio, processo)
+            consulta, pronta = consulta.result(), pronta.result()
+    finally:
+        processo.terminate()
+        processo.wait()
+
+    return {
+        "primeira_resposta_segundos": round(primeira_resposta, 3),
+        "prontidao_segundos": round(pronta, 3),
+        "primeira_consulta_segundos": round(consulta, 3),
+    }
+
+
+def resumir(medicoes):
+    return {
+        chave: {
+            "media": round(statistics.mean(m[chave] for m in medicoes), 3),
+            "minimo": min(m[chave] for m in medicoes),
+            "maximo": max(m[chave] for m in medicoes),
+        }
+        for chave in medicoes[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização da API contra o simulador local do portal")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--comparar", action="store_true",
+                        help="Repete as medições com o pool iniciado antes de a API aceitar requisições")
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: benchmarks/resultados/inicializacao-<data>.json)")
+    argumentos = parser.parse_args()
+
+    simulador = SimuladorPortal(latencia_ms=argumentos.latencia_ms)
+    url_base = simulador.iniciar()
+    cenarios = {"pool_em_segundo_plano": "true"}
+    if argumentos.comparar:
+        cenarios["pool_antes_da_api"] = "false"
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_ambiente(url_base, SimpleNamespace(concorrencias=[1], modo_rapido=True), diretorio)
+        resultados["importacao_main_segundos"] = round(medir_importacao(), 3)
+
+        for cenario, em_segundo_plano in cenarios.items():
+            os.environ["POOL_INICIAR_EM_SEGUNDO_PLANO"] = em_segundo_plano
+            medicoes = []
+            for repeticao in range(argumentos.repeticoes):
+                # Cada repetição parte de um diretório sem sessão aquecida nem cache, como um processo recém-implantado
+                os.environ["PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA"] = os.path.join(diretorio, f"{cenario}-{repeticao}")
+                os.environ["PATH_STORAGE_STATE"] = os.path.join(diretorio, f"{cenario}-{repeticao}", "sessao", "storage_state.json")
+                medicoes.append(medir_inicializacao(gerar_cpf(repeticao + 1)))
+            resultados[cenario] = {"medicoes": medicoes, "resumo": resumir(medicoes)}
+
+    simulador.encerrar()
+
+    print(f"\nImportação de main: {resultados['importacao_main_segundos']:.3f} s")
+    print(f"\n{'cenário':<24} {'/ (s)':>8} {'/prontidao (s)':>15} {'1ª consulta (s)':>16}")
+    for cenario in cenarios:
+        resumo = resultados[cenario]["resumo"]
+        print(
+            f"{cenario:<24} {resumo['primeira_resposta_segundos']['media']:>8.3f} "
+            f"{resumo['prontidao_segundos']['media']:>15.3f} {resumo['primeira_consulta_segundos']['media']:>16.3f}"
+        )
+
+    relatorio = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "parametros": vars(argumentos),
+        "resultados": resultados,
+    }
+
+    saida = Path(argumentos.saida) if argumentos.saida else \
+        DIRETORIO_RESULTADOS / f"inicializacao-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=4, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultado salvo em {saida}")
+
+
+if __name__ == "__main__":
+    main()
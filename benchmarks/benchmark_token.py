@@ -0,0 +1,114 @@
+"""
+Benchmark da emissão de tokens em /get-token, utilizando um servidor OAuth local.
+
+Dispara rajadas de requisições concorrentes contra o gerenciador de tokens e informa quantas
+chamadas chegaram ao endpoint de emissão. Com o lock de renovação, cada rajada com o token
+expirado deve gerar uma única emissão.
+
+Cenários:
+- Token inexistente (primeira rajada).
+- Token válido em cache.
+- Token perto de expirar (renovação em segundo plano, sem bloquear as requisições).
+- Vários gerenciadores compartilhando o token via arquivo (simula workers do uvicorn).
+
+Execução (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_token
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REQUISICOES_CONCORRENTES = 200
+LATENCIA_EMISSAO_SEGUNDOS = 0.2
+EXPIRES_IN_SEGUNDOS = 3600
+
+
+def iniciar_servidor_oauth():
+    """
+    Inicia um servidor HTTP local que emite tokens no formato do Auth0 (client credentials).
+
+    Retorna:
+    - Tuple (servidor, contador) onde contador["emissoes"] registra os tokens emitidos.
+    """
+    contador = {"emissoes": 0}
+    lock = threading.Lock()
+
+    class ManipuladorOAuth(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(LATENCIA_EMISSAO_SEGUNDOS)
+
+            with lock:
+                contador["emissoes"] += 1
+                numero = contador["emissoes"]
+
+            corpo = json.dumps({
+                "access_token": f"token-{numero}",
+                "expires_in": EXPIRES_IN_SEGUNDOS,
+                "token_type": "Bearer",
+            }).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ManipuladorOAuth)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, contador
+
+
+async def medir(nome, gerenciadores, contador):
+    emissoes_antes = contador["emissoes"]
+    inicio = time.perf_counter()
+
+    tokens = await asyncio.gather(*(
+        gerenciadores[i % len(gerenciadores)].obter_token() for i in range(REQUISICOES_CONCORRENTES)
+    ))
+
+    duracao = time.perf_counter() - inicio
+    emissoes = contador["emissoes"] - emissoes_antes
+    print(
+        f"{nome:<45} {duracao * 1000:>8.1f} ms | emissões: {emissoes} | tokens distintos: {len(set(tokens))}"
+    )
+
+
+async def main():
+    servidor, contador = iniciar_servidor_oauth()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/oauth/token"
+
+    from services.http_client_service import fechar_cliente_http
+    from services.token_service import GerenciadorToken
+
+    gerenciador = GerenciadorToken(url=url, compartilhado=False)
+    await medir("Rajada sem token em cache", [gerenciador], contador)
+    await medir("Rajada com token em cache", [gerenciador], contador)
+
+    # Força o token a entrar na janela de renovação antecipada
+    gerenciador._expira_em = time.time() + gerenciador.renovacao_antecipada / 2
+    await medir("Rajada com token perto de expirar", [gerenciador], contador)
+    await gerenciador._tarefa_renovacao
+    print(f"{'  renovado em segundo plano':<45} emissões totais: {contador['emissoes']}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        workers = [
+            GerenciadorToken(url=url, compartilhado=True, path_compartilhado=os.path.join(diretorio, "token.json"))
+            for _ in range(4)
+        ]
+        await medir("Rajada em 4 workers com token compartilhado", workers, contador)
+
+    await fechar_cliente_http()
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,294 @@
+"""
+Simulador local do Portal da Transparência para benchmarks sem acesso ao portal real.
+
+Serve, a partir das fixtures em `benchmarks/fixtures/portal`, as páginas percorridas pelo PortalPage:
+- /pessoa/visao-geral: visão geral com a barra de cookies e o botão de consulta.
+- /pessoa-fisica/busca/lista e /pessoa-fisica/busca/resultado: formulário, lista #resultados
+  (carregada via requisição) e paginação #paginacao.
+- /busca/pessoa-fisica/<id>: página da pessoa (.dados-tabelados) e recebimentos (.box-ficha__resultados).
+- /beneficios/<tipo>/<id> e /beneficios/<tipo>/<id>/dados: tabelas .dados-detalhados paginadas,
+  alimentadas por uma requisição JSON no formato do DataTables (utilizada também pelo modo rápido).
+
+A latência de cada resposta e a quantidade de páginas/linhas são configuráveis.
+
+Execução isolada (a partir da raiz do projeto):
+    python -m benchmarks.simulador_portal --porta 8081 --latencia-ms 100
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+DIRETORIO_FIXTURES = Path(__file__).parent / "fixtures" / "portal"
+TIPOS_BENEFICIO = ["Auxílio Brasil", "Bolsa Família", "Auxílio Emergencial"]
+CABECALHO_TABELA = ["Mês folha", "Mês referência", "UF", "Município", "Valor (R$)"]
+TAMANHO_PAGINA_RESULTADOS = 10
+TAMANHO_PAGINA_TABELA = 10
+
+
+class SimuladorPortal:
+    """
+    Servidor HTTP local que imita o Portal da Transparência.
+
+    Parâmetros:
+    - latencia_ms (float): atraso aplicado a cada resposta (páginas e requisições).
+    - paginas_resultados (int): páginas da lista de resultados de uma busca por nome; o nome
+      pesquisado aparece na última página (o PortalPage analisa até BUSCA_NOME_MAX_PAGINAS páginas).
+    - beneficios (int): quantidade de benefícios (recebimentos) de cada pessoa.
+    - secoes_por_beneficio (int): quantidade de tabelas .dados-detalhados por benefício.
+    - linhas_por_tabela (int): linhas de cada tabela (um mês por linha, os mais recentes primeiro), paginadas de
+      TAMANHO_PAGINA_TABELA em TAMANHO_PAGINA_TABELA. Aumentar o valor simula a inclusão de novos meses.
+    """
+
+    def __init__(self, latencia_ms=50, paginas_resultados=2, beneficios=2, secoes_por_beneficio=2, linhas_por_tabela=25, porta=0):
+        self.latencia_ms = latencia_ms
+        self.paginas_resultados = paginas_resultados
+        self.beneficios = beneficios
+        self.secoes_por_beneficio = secoes_por_beneficio
+        self.linhas_por_tabela = linhas_por_tabela
+        self.porta = porta
+        self.requisicoes = {}
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._fixtures = {
+            nome: (DIRETORIO_FIXTURES / f"{nome}.html").read_text(encoding="utf-8")
+            for nome in ("visao_geral", "busca_lista", "pessoa", "beneficio")
+        }
+
+    @property
+    def url_base(self):
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def iniciar(self):
+        simulador = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                simulador._atender(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", self.porta), Manipulador)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self.url_base
+
+    def encerrar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def _contar(self, rota):
+        with self._lock:
+            self.requisicoes[rota] = self.requisicoes.get(rota, 0) + 1
+
+    def _atender(self, manipulador):
+        partes = urlsplit(manipulador.path)
+        caminho = partes.path
+        parametros = {nome: valores[0] for nome, valores in parse_qs(partes.query).items()}
+        consentimento = "consentimento=1" in (manipulador.headers.get("Cookie") or "")
+        segmentos = [unquote(s) for s in caminho.strip("/").split("/")]
+
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000)
+
+        if caminho == "/pessoa/visao-geral":
+            self._contar("visao_geral")
+            return _responder_html(manipulador, _preencher(self._fixtures["visao_geral"], estilo_cookiebar=_estilo_cookiebar(consentimento)))
+
+        if caminho == "/pessoa-fisica/busca/lista":
+            self._contar("busca_lista")
+            return _responder_html(manipulador, _preencher(self._fixtures["busca_lista"], estilo_cookiebar=_estilo_cookiebar(consentimento)))
+
+        if caminho == "/pessoa-fisica/busca/resultado":
+            self._contar("busca_resultado")
+            return _responder_json(manipulador, self._resultados_busca(parametros.get("termo", ""), int(parametros.get("pagina", "1"))))
+
+        if segmentos[:2] == ["busca", "pessoa-fisica"] and len(segmentos) == 3:
+            self._contar("pessoa")
+            return _responder_html(manipulador, self._pagina_pessoa(segmentos[2]))
+
+        if segmentos[:2] == ["busca", "pessoa-fisica"] and len(segmentos) == 4 and segmentos[3] == "recebimentos":
+            self._contar("recebimentos")
+            return _responder_html(manipulador, self._recebimentos(segmentos[2]))
+
+        if segmentos[0] == "beneficios" and len(segmentos) == 3:
+            self._contar("beneficio")
+            return _responder_html(manipulador, self._pagina_beneficio(segmentos[1], segmentos[2]))
+
+        if segmentos[0] == "beneficios" and len(segmentos) == 4 and segmentos[3] == "dados":
+            self._contar("beneficio_dados")
+            return _responder_json(manipulador, self._dados_tabela(
+                segmentos[2],
+                int(parametros.get("secao", "0")),
+                int(parametros.get("offset", "0")),
+                int(parametros.get("tamanhoPagina", str(TAMANHO_PAGINA_TABELA))),
+            ))
+
+        manipulador.send_response(404)
+        manipulador.send_header("Content-Length", "0")
+        manipulador.end_headers()
+
+    def _resultados_busca(self, termo, pagina):
+        termo = termo.strip()
+        numeros = "".join(c for c in termo if c.isdigit())
+
+        if len(numeros) == 11:
+            nome = f"PESSOA {numeros}"
+            return {"registros": [_registro(nome)], "pagina": 1, "totalPaginas": 1}
+
+        total_paginas = max(1, self.paginas_resultados)
+        registros = [
+            _registro(f"OUTRA PESSOA {pagina}-{i}")
+            for i in range(TAMANHO_PAGINA_RESULTADOS)
+        ]
+
+        # O nome pesquisado aparece por último, na última página
+        if pagina >= total_paginas:
+            registros[-1] = _registro(termo)
+
+        return {"registros": registros, "pagina": pagina, "totalPaginas": total_paginas}
+
+    def _pagina_pessoa(self, id_pessoa):
+        return _preencher(
+            self._fixtures["pessoa"],
+            nome=id_pessoa,
+            cpf=_cpf_mascarado(id_pessoa),
+            localidade="LAVRAS - MG",
+            url_recebimentos=f"/busca/pessoa-fisica/{quote(id_pessoa)}/recebimentos",
+        )
+
+    def _recebimentos(self, id_pessoa):
+        tabelas = []
+        for i in range(self.beneficios):
+            tipo = TIPOS_BENEFICIO[i % len(TIPOS_BENEFICIO)]
+            tabelas.append(
+                '<div class="br-table">'
+                f"<strong>{tipo}</strong>"
+                "<table><thead><tr><th>Programa</th><th>Período</th><th>Parcelas</th><th>Valor recebido</th><th></th></tr></thead>"
+                f"<tbody><tr><td>{tipo}</td><td>01/2020 a 12/2022</td><td>{self.linhas_por_tabela}</td>"
+                f"<td>R$ {_formatar_moeda(self.linhas_por_tabela * 600)}</td>"
+                f'<td><a href="/beneficios/{_slug(tipo)}/{quote(id_pessoa)}">Detalhar</a></td></tr></tbody>'
+                "</table></div>"
+            )
+        return f'<div class="box-ficha__resultados">{"".join(tabelas)}</div>'
+
+    def _pagina_beneficio(self, tipo, id_pessoa):
+        secoes = []
+        for i in range(self.secoes_por_beneficio):
+            cabecalho = "".join(f"<th>{coluna}</th>" for coluna in CABECALHO_TABELA)
+            secoes.append(
+                f'<section class="dados-detalhados" data-secao="{i}">'
+                f"<h2>Detalhamento {i + 1}</h2>"
+                f'<table class="table" id="tabela{i}" style="display: none;">'
+                f"<thead><tr>{cabecalho}</tr></thead><tbody></tbody></table>"
+                f'<div class="box-paginacao" style="display: none;"><ul>'
+                f'<li id="tabela{i}_next" class="paginate_button next">Próxima</li>'
+                "</ul></div></section>"
+            )
+
+        return _preencher(
+            self._fixtures["beneficio"],
+            tipo=tipo,
+            secoes="\n        ".join(secoes),
+            tamanho_pagina=str(TAMANHO_PAGINA_TABELA),
+            url_dados=f"/beneficios/{tipo}/{quote(id_pessoa)}/dados",
+        )
+
+    def _dados_tabela(self, id_pessoa, secao, offset, tamanho_pagina):
+        semente = int(hashlib.sha256(f"{id_pessoa}|{secao}".encode("utf-8")).hexdigest()[:6], 16)
+        linhas = []
+
+        # Meses mais recentes primeiro, como no portal; cada mês mantém os mesmos valores quando a tabela cresce
+        for i in range(offset, min(offset + tamanho_pagina, self.linhas_por_tabela)):
+            indice_mes = self.linhas_por_tabela - 1 - i
+            mes = f"{indice_mes % 12 + 1:02d}/{2020 + indice_mes // 12}"
+            linhas.append({
+                "mesFolha": mes,
+                "mesReferencia": mes,
+                "uf": "MG",
+                "municipio": "LAVRAS",
+                "valor": f"{600 + (semente + indice_mes) % 400},00",
+            })
+
+        return {"data": linhas, "recordsTotal": self.linhas_por_tabela, "recordsFiltered": self.linhas_por_tabela}
+
+
+def _preencher(modelo, **valores):
+    for chave, valor in valores.items():
+        modelo = modelo.replace(f"{{{{{chave}}}}}", valor)
+    return modelo
+
+
+def _formatar_moeda(valor):
+    return f"{valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _estilo_cookiebar(consentimento):
+    return "display: none;" if consentimento else "display: block;"
+
+
+def _registro(nome):
+    return {"nome": nome, "link": f"/busca/pessoa-fisica/{quote(nome)}"}
+
+
+def _slug(texto):
+    return texto.lower().replace(" ", "-").replace("í", "i").replace("á", "a")
+
+
+def _cpf_mascarado(id_pessoa):
+    digitos = str(int(hashlib.sha256(id_pessoa.encode("utf-8")).hexdigest()[:8], 16)).zfill(6)[:6]
+    return f"***.{digitos[:3]}.{digitos[3:6]}-**"
+
+
+def _responder_html(manipulador, html):
+    _responder(manipulador, html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+def _responder_json(manipulador, dados):
+    _responder(manipulador, json.dumps(dados, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+
+def _responder(manipulador, corpo, tipo_conteudo):
+    manipulador.send_response(200)
+    manipulador.send_header("Content-Type", tipo_conteudo)
+    manipulador.send_header("Content-Length", str(len(corpo)))
+    manipulador.end_headers()
+    manipulador.wfile.write(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local do Portal da Transparência")
+    parser.add_argument("--porta", type=int, default=8081)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--paginas-resultados", type=int, default=2)
+    parser.add_argument("--beneficios", type=int, default=2)
+    parser.add_argument("--secoes-por-beneficio", type=int, default=2)
+    parser.add_argument("--linhas-por-tabela", type=int, default=25)
+    argumentos = parser.parse_args()
+
+    simulador = SimuladorPortal(
+        latencia_ms=argumentos.latencia_ms,
+        paginas_resultados=argumentos.paginas_resultados,
+        beneficios=argumentos.beneficios,
+        secoes_por_beneficio=argumentos.secoes_por_beneficio,
+        linhas_por_tabela=argumentos.linhas_por_tabela,
+        porta=argumentos.porta,
+    )
+    print(f"Simulador do portal em {simulador.iniciar()} (Ctrl+C para encerrar)")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        simulador.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+
+
+def _converter(nome, valor, padrao, tipo, minusculo):
+    if valor is None or (tipo is not str and not valor.strip()):
+        return list(padrao) if isinstance(padrao, list) else padrao
+
+    try:
+        if tipo is bool:
+            return valor.strip().lower() == "true"
+        if tipo is list:
+            return [item.strip() for item in valor.split(",") if item.strip()]
+        if tipo is str:
+            return valor.lower() if minusculo else valor
+        return tipo(valor.strip())
+    except ValueError:
+        raise ValueError(f"Valor inválido na variável de ambiente {nome}: {valor!r}")
+
+
+def _variavel(nome, padrao=None, tipo=None, minusculo=False):
+    """
+    Declara uma configuração lida da variável de ambiente `nome`, convertida para o tipo do valor padrão
+    (str, int, float, bool ou list separada por vírgulas).
+    """
+    tipo = tipo or (type(padrao) if padrao is not None else str)
+    return field(
+        default_factory=lambda: _converter(nome, os.getenv(nome), padrao, tipo, minusculo),
+        metadata={"variavel": nome},
+    )
+
+
+@dataclass(frozen=True)
+class Configuracoes:
+    """
+    Configurações da aplicação, lidas das variáveis de ambiente (e do arquivo .env) uma única vez.
+
+    Cada campo corresponde a uma variável de ambiente com o mesmo nome em maiúsculas. Os valores são
+    convertidos na carga: um valor inválido (ex: texto em um campo numérico) interrompe a inicialização
+    com o nome da variável, em vez de falhar na primeira consulta.
+    """
+
+    # Portal da Transparência e armazenamento local
+    url_base_portal_transparencia: str | None = _variavel("URL_BASE_PORTAL_TRANSPARENCIA") # URL base do Portal da Transparência
+    tipos_recebimento_permitidos: list = _variavel(
+        "TIPOS_RECEBIMENTO_PERMITIDOS", ["auxílio brasil", "auxílio emergencial", "bolsa família"]
+    ) # Tipos de recebimentos que podem ser coletados
+    path_base_armazenamento_dados_pessoa: str | None = _variavel("PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA") # Caminho base para salvar os dados coletados localmente
+
+    # Autenticação (Auth0)
+    auth0_domain: str | None = _variavel("AUTH0_DOMAIN") # Domínio da instância Auth0
+    auth0_api_audience: str | None = _variavel("AUTH0_API_AUDIENCE") # Identificador da API configurado no painel do Auth0
+    client_id: str | None = _variavel("CLIENT_ID")
+    client_secret: str | None = _variavel("CLIENT_SECRET")
+    x_api_key: str | None = _variavel("X_API_KEY") # Chave exigida pelo endpoint /get-token
+    profile: str = _variavel("PROFILE", "prod") # Ambiente de execução: "local" ou "prod" (default = "prod")
+    jwks_url: str | None = _variavel("JWKS_URL") # Endpoint das chaves públicas (JWKs). Vazio = https://{AUTH0_DOMAIN}/.well-known/jwks.json
+    jwks_ttl_segundos: int = _variavel("JWKS_TTL_SEGUNDOS", 3600) # Tempo (s) em que as chaves públicas em cache são consideradas atuais
+    jwks_intervalo_minimo_segundos: int = _variavel("JWKS_INTERVALO_MINIMO_SEGUNDOS", 30) # Intervalo mínimo (s) entre buscas motivadas por um 'kid' desconhecido
+    tokens_verificados_max: int = _variavel("TOKENS_VERIFICADOS_MAX", 1024) # Quantidade máxima de tokens verificados mantidos em memória
+    auth0_token_url: str | None = _variavel("AUTH0_TOKEN_URL") # Endpoint de emissão de tokens. Vazio = https://{AUTH0_DOMAIN}/oauth/token
+    token_renovacao_antecipada_segundos: int = _variavel("TOKEN_RENOVACAO_ANTECIPADA_SEGUNDOS", 300) # Renova o token em segundo plano quando faltar menos que isso para expirar
+    token_compartilhado: bool = _variavel("TOKEN_COMPARTILHADO", False) # Compartilha o token entre os workers do uvicorn via arquivo local
+    path_token_compartilhado: str | None = _variavel("PATH_TOKEN_COMPARTILHADO") # Arquivo do token compartilhado. Vazio = sessao/token_auth0.json no caminho base
+
+    # Pool de navegadores
+    pool_max_navegadores: int = _variavel("POOL_MAX_NAVEGADORES", 1) # Quantidade de navegadores Chromium mantidos abertos
+    pool_max_contextos_simultaneos: int = _variavel("POOL_MAX_CONTEXTOS_SIMULTANEOS", 4) # Máximo de consultas executando ao mesmo tempo
+    pool_max_fila: int = _variavel("POOL_MAX_FILA", 20) # Máximo de consultas aguardando um contexto livre
+    pool_tempo_maximo_fila: float = _variavel("POOL_TEMPO_MAXIMO_FILA", 120.0) # Tempo máximo (s) de espera na fila
+    pool_reciclar_apos_contextos: int = _variavel("POOL_RECICLAR_APOS_CONTEXTOS", 50) # Recicla o navegador após N contextos criados
+    pool_intervalo_verificacao_saude: float = _variavel("POOL_INTERVALO_VERIFICACAO_SAUDE", 30.0) # Intervalo (s) entre verificações de saúde
+    pool_iniciar_em_segundo_plano: bool = _variavel("POOL_INICIAR_EM_SEGUNDO_PLANO", True) # A API responde enquanto os navegadores são abertos e a sessão é aquecida (ver /prontidao)
+    aquecer_sessao: bool = _variavel("AQUECER_SESSAO", True) # Executa o aceite de cookies uma única vez e reaproveita a sessão nos contextos
+    sessao_validade_segundos: int = _variavel("SESSAO_VALIDADE_SEGUNDOS", 86400) # Tempo (s) após o qual a sessão aquecida é renovada
+    path_storage_state: str | None = _variavel("PATH_STORAGE_STATE") # Arquivo da sessão aquecida (cookies e storage). Vazio = sessao/storage_state.json no caminho base
+
+    # Esperas da automação e coleta
+    tempo_limite_passo_ms: int = _variavel("TEMPO_LIMITE_PASSO_MS", 30000) # Tempo máximo (ms) de espera de cada etapa da automação
+    atraso_cortesia_segundos: float = _variavel("ATRASO_CORTESIA_SEGUNDOS", 0.0) # Pausa opcional antes de cada interação, para reduzir a carga no portal
+    limite_paginas_recursos_simultaneas: int = _variavel("LIMITE_PAGINAS_RECURSOS_SIMULTANEAS", 3) # Máximo de páginas de recursos abertas ao mesmo tempo por consulta
+    modo_rapido_recursos: bool = _variavel("MODO_RAPIDO_RECURSOS", True) # Coleta as tabelas de recursos diretamente da requisição JSON que as alimenta
+    tamanho_pagina_modo_rapido: int = _variavel("TAMANHO_PAGINA_MODO_RAPIDO", 500) # Quantidade de linhas solicitadas por requisição no modo rápido
+    busca_nome_max_paginas: int = _variavel("BUSCA_NOME_MAX_PAGINAS", 4) # Máximo de páginas de resultados analisadas em uma busca por nome
+    busca_nome_paginas_simultaneas: int = _variavel("BUSCA_NOME_PAGINAS_SIMULTANEAS", 3) # Páginas de resultados carregadas ao mesmo tempo em uma busca por nome
+    historico_recursos_ativo: bool = _variavel("HISTORICO_RECURSOS_ATIVO", True) # Coleta incremental das tabelas de recursos, a partir das linhas já coletadas
+    historico_recursos_revalidacao_segundos: int = _variavel("HISTORICO_RECURSOS_REVALIDACAO_SEGUNDOS", 2592000) # Intervalo (s) após o qual as tabelas de um benefício são coletadas por completo novamente
+    coleta_tentativas: int = _variavel("COLETA_TENTATIVAS", 3) # Tentativas de cada consulta ao portal, retomando do último checkpoint
+    coleta_recuo_inicial_segundos: float = _variavel("COLETA_RECUO_INICIAL_SEGUNDOS", 2.0) # Espera (s) antes da segunda tentativa, dobrada a cada nova tentativa
+    checkpoint_ativo: bool = _variavel("CHECKPOINT_ATIVO", True) # Persiste em disco o progresso das consultas, para retomá-las em uma nova requisição após uma falha
+    checkpoint_validade_segundos: int = _variavel("CHECKPOINT_VALIDADE_SEGUNDOS", 3600) # Tempo (s) em que o progresso de uma consulta interrompida pode ser retomado
+
+    # Base analítica
+    analitico_ativo: bool = _variavel("ANALITICO_ATIVO", True) # Ingestão dos dados de cada consulta concluída na base analítica
+    analitico_backend: str = _variavel("ANALITICO_BACKEND", "sqlite", minusculo=True) # Banco da base analítica: "sqlite" ou "duckdb" (requer o pacote duckdb)
+    path_banco_analitico: str | None = _variavel("PATH_BANCO_ANALITICO") # Arquivo da base analítica. Vazio = analitico.db/analitico.duckdb no caminho base
+
+    # Cache de consultas
+    cache_ttl_segundos: int = _variavel("CACHE_TTL_SEGUNDOS", 86400) # Tempo (s) em que uma consulta em cache é considerada atual
+    cache_stale_while_revalidate_segundos: int = _variavel("CACHE_STALE_WHILE_REVALIDATE_SEGUNDOS", 0) # Janela (s) após o TTL em que o cache é servido enquanto é atualizado em segundo plano
+    cache_max_itens_memoria: int = _variavel("CACHE_MAX_ITENS_MEMORIA", 256) # Quantidade máxima de consultas mantidas na LRU em memória
+    cache_negativo_ativo: bool = _variavel("CACHE_NEGATIVO_ATIVO", True) # Guarda os resultados "não encontrado" para responder sem acessar o portal
+    cache_negativo_ttl_segundos: int = _variavel("CACHE_NEGATIVO_TTL_SEGUNDOS", 21600) # Tempo (s) em que um resultado "não encontrado" é considerado atual
+    cache_negativo_capacidade: int = _variavel("CACHE_NEGATIVO_CAPACIDADE", 100000) # Quantidade de ausências prevista no dimensionamento do filtro de Bloom
+    cache_negativo_taxa_falsos_positivos: float = _variavel("CACHE_NEGATIVO_TAXA_FALSOS_POSITIVOS", 0.01) # Fração de identificadores novos que ainda consultam o disco
+    cache_negativo_recarga_segundos: int = _variavel("CACHE_NEGATIVO_RECARGA_SEGUNDOS", 60) # Intervalo (s) em que o filtro de Bloom é remontado a partir do disco, incluindo as ausências registradas por outros processos
+
+    # Consultas assíncronas e em lote
+    jobs_max_workers: int = _variavel("JOBS_MAX_WORKERS", 2) # Quantidade de consultas assíncronas executadas ao mesmo tempo
+    jobs_max_fila: int = _variavel("JOBS_MAX_FILA", 500) # Máximo de consultas assíncronas aguardando execução
+    jobs_reserva_segundos: float = _variavel("JOBS_RESERVA_SEGUNDOS", 120.0) # Validade (s) da reserva de uma consulta em execução, renovada enquanto ela executa
+    jobs_callback_hosts_permitidos: list = _variavel("JOBS_CALLBACK_HOSTS_PERMITIDOS", []) # Se preenchido, somente esses domínios (e subdomínios) são aceitos como callback_url, inclusive em endereços internos
+    jobs_intervalo_recuperacao_segundos: float = _variavel("JOBS_INTERVALO_RECUPERACAO_SEGUNDOS", 30.0) # Intervalo (s) entre as buscas por consultas pendentes e reservas vencidas
+    lote_paralelismo: int = _variavel("LOTE_PARALELISMO", 2) # Quantidade de consultas de um lote executadas ao mesmo tempo
+    lote_consultas_por_minuto: float = _variavel("LOTE_CONSULTAS_POR_MINUTO", 30.0) # Máximo de consultas de lote iniciadas por minuto, somando todos os lotes em andamento (0 = sem limite)
+    lote_max_identificadores: int = _variavel("LOTE_MAX_IDENTIFICADORES", 1000) # Máximo de identificadores aceitos em um único lote
+
+    # Bloqueio de recursos
+    bloqueio_recursos_ativo: bool = _variavel("BLOQUEIO_RECURSOS_ATIVO", True) # Bloqueia recursos desnecessários para o scraping
+    bloquear_tipos_recurso: list = _variavel("BLOQUEAR_TIPOS_RECURSO", ["image", "media", "font", "stylesheet"]) # Tipos de recurso bloqueados (resource_type do Playwright)
+    dominios_permitidos: list = _variavel("DOMINIOS_PERMITIDOS", ["gov.br"]) # Se preenchido, somente esses domínios (e subdomínios) são carregados
+    dominios_bloqueados: list = _variavel(
+        "DOMINIOS_BLOQUEADOS", ["google-analytics.com", "googletagmanager.com", "doubleclick.net", "hotjar.com"]
+    ) # Domínios sempre bloqueados
+
+    # Armazenamento de artefatos
+    armazenamento_backend: str = _variavel("ARMAZENAMENTO_BACKEND", "local") # Backend de armazenamento dos artefatos: "local" ou "s3"
+    s3_bucket: str | None = _variavel("S3_BUCKET") # Bucket utilizado pelo backend S3
+    s3_endpoint_url: str | None = _variavel("S3_ENDPOINT_URL") # Endpoint S3 compatível (ex: MinIO local). Vazio = AWS
+    s3_prefixo: str = _variavel("S3_PREFIXO", "artefatos/") # Prefixo das chaves dos artefatos no bucket
+    screenshot_formato: str = _variavel("SCREENSHOT_FORMATO", "png", minusculo=True) # Formato da captura de tela: png, jpeg ou webp
+    screenshot_qualidade: int = _variavel("SCREENSHOT_QUALIDADE", 80) # Qualidade (0-100) para jpeg e webp
+
+    # Fila de consultas entre a API e os workers
+    fila_backend: str = _variavel("FILA_BACKEND", "", minusculo=True) # Fila de consultas entre a API e os workers: vazio (consulta no próprio processo), "memoria" ou "redis"
+    redis_url: str = _variavel("REDIS_URL", "redis://localhost:6379/0") # Conexão com o Redis utilizado pelo backend "redis"
+    fila_prefixo: str = _variavel("FILA_PREFIXO", "consultas") # Prefixo das chaves da fila no Redis
+    fila_visibilidade_segundos: int = _variavel("FILA_VISIBILIDADE_SEGUNDOS", 300) # Tempo (s) de reserva de uma consulta por um worker antes de voltar à fila
+    fila_max_tentativas: int = _variavel("FILA_MAX_TENTATIVAS", 3) # Máximo de reservas de uma consulta (workers que caíram durante a execução)
+    fila_max_pendentes: int = _variavel("FILA_MAX_PENDENTES", 500) # Máximo de consultas aguardando um worker
+    fila_tempo_maximo_resultado_segundos: int = _variavel("FILA_TEMPO_MAXIMO_RESULTADO_SEGUNDOS", 600) # Tempo (s) que a API aguarda o resultado de um worker
+    worker_concorrencia: int | None = _variavel("WORKER_CONCORRENCIA", tipo=int) # Consultas executadas ao mesmo tempo por worker. Vazio = POOL_MAX_CONTEXTOS_SIMULTANEOS
+    worker_porta_metricas: int = _variavel("WORKER_PORTA_METRICAS", 0) # Porta em que o worker expõe as métricas Prometheus (0 = desativado)
+
+    # Controle de tráfego para o portal
+    governador_navegacoes_por_segundo: float = _variavel("GOVERNADOR_NAVEGACOES_POR_SEGUNDO", 2.0) # Taxa máxima de navegações e requisições ao portal por processo (0 = sem limite)
+    governador_rajada_navegacoes: int = _variavel("GOVERNADOR_RAJADA_NAVEGACOES", 5) # Navegações que podem ser feitas em sequência antes de a taxa ser aplicada
+    governador_concorrencia_minima: int = _variavel("GOVERNADOR_CONCORRENCIA_MINIMA", 1) # Menor quantidade de consultas simultâneas após reduções
+    governador_concorrencia_maxima: int = _variavel("GOVERNADOR_CONCORRENCIA_MAXIMA", 4) # Maior quantidade de consultas simultâneas quando o portal responde bem
+    governador_latencia_alvo_segundos: float = _variavel("GOVERNADOR_LATENCIA_ALVO_SEGUNDOS", 10.0) # Navegações mais lentas que isso reduzem a concorrência
+    governador_tempo_maximo_espera_segundos: float = _variavel("GOVERNADOR_TEMPO_MAXIMO_ESPERA_SEGUNDOS", 120.0) # Tempo (s) máximo de espera por uma vaga de consulta
+    disjuntor_falhas_para_abrir: int = _variavel("DISJUNTOR_FALHAS_PARA_ABRIR", 5) # Falhas consecutivas do portal que suspendem as consultas
+    disjuntor_tempo_aberto_segundos: int = _variavel("DISJUNTOR_TEMPO_ABERTO_SEGUNDOS", 60) # Tempo (s) de suspensão antes de uma consulta de teste
+
+    # Prioridade das consultas e divisão entre clientes
+    escalonador_max_simultaneas: int | None = _variavel("ESCALONADOR_MAX_SIMULTANEAS", tipo=int) # Consultas ao portal liberadas ao mesmo tempo. Vazio = GOVERNADOR_CONCORRENCIA_MAXIMA
+    escalonador_max_lote_simultaneas: int | None = _variavel("ESCALONADOR_MAX_LOTE_SIMULTANEAS", tipo=int) # Vagas que as consultas de lote podem ocupar; as demais ficam reservadas às interativas. Vazio = todas menos uma
+    escalonador_max_simultaneas_por_cliente: int = _variavel("ESCALONADOR_MAX_SIMULTANEAS_POR_CLIENTE", 3) # Consultas de um mesmo cliente executando ao mesmo tempo
+    escalonador_cota_consultas_por_hora: int = _variavel("ESCALONADOR_COTA_CONSULTAS_POR_HORA", 0) # Consultas ao portal por cliente a cada hora (0 = sem limite)
+    escalonador_max_fila: int = _variavel("ESCALONADOR_MAX_FILA", 100) # Máximo de consultas aguardando uma vaga
+    escalonador_tempo_maximo_fila: float = _variavel("ESCALONADOR_TEMPO_MAXIMO_FILA", 120.0) # Tempo (s) máximo de espera das consultas interativas (as de lote aguardam sem limite)
+    escalonador_pesos_clientes: str = _variavel("ESCALONADOR_PESOS_CLIENTES", "") # Pesos na divisão das vagas entre clientes (ex: "cliente-a=3,cliente-b=1"); os demais têm peso 1
+
+    # Métricas e rastreamento
+    otel_exporter_otlp_endpoint: str | None = _variavel("OTEL_EXPORTER_OTLP_ENDPOINT") # Coletor OTLP que recebe os traces (vazio = traces desativados, salvo configuração externa)
+    otel_service_name: str = _variavel("OTEL_SERVICE_NAME", "api-consulta-pessoa-fisica") # Nome do serviço nos traces
+
+
+def carregar_configuracoes():
+    """
+    Carrega o arquivo .env (sem sobrescrever variáveis já definidas no ambiente) e lê as configurações.
+
+    Levanta:
+    - ValueError: se alguma variável tiver um valor que não pode ser convertido para o tipo esperado.
+    """
+    load_dotenv()
+    return Configuracoes()
+
+
+configuracoes = carregar_configuracoes()
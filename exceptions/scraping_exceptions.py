@@ -3,13 +3,23 @@ class ErroConsultaPortal(Exception):
     pass
 
 class NomeNaoEncontrado(ErroConsultaPortal):
-    """Nome consultado não retornou resultados."""
-    pass
+    """Nome consultado não retornou resultados (`candidatos`: nomes semelhantes encontrados, que não foram consultados)."""
+    def __init__(self, mensagem="", candidatos=None):
+        super().__init__(mensagem)
+        self.candidatos = candidatos or []
 
 class CPFouNISNaoEncontrado(ErroConsultaPortal):
     """CPF ou NIS consultado não retornou resultados."""
     pass
 
+class IdentificadorInvalido(ErroConsultaPortal):
+    """Identificador que não é um nome nem um CPF ou NIS válido (não é consultado no portal)."""
+    pass
+
+class CallbackInvalido(ErroConsultaPortal):
+    """callback_url que não é http(s) ou aponta para um endereço interno (não é notificado)."""
+    pass
+
 class PortalInacessivel(ErroConsultaPortal):
     """Não foi possível acessar o Portal da Transparência."""
     pass
@@ -29,3 +39,19 @@ class FalhaAoColetarDados(ErroConsultaPortal):
 class ErroInesperadoDuranteConsulta(ErroConsultaPortal):
     """Qualquer outro erro inesperado."""
     pass
+
+class CapacidadeEsgotada(ErroConsultaPortal):
+    """Não há navegador disponível para executar a consulta no momento."""
+    pass
+
+class CircuitoAberto(ErroConsultaPortal):
+    """Consultas ao portal suspensas temporariamente após falhas consecutivas."""
+    def __init__(self, mensagem="", retry_after=0):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+class CotaExcedida(ErroConsultaPortal):
+    """Cliente atingiu a cota de consultas ao portal no período."""
+    def __init__(self, mensagem="", retry_after=0):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
@@ -1,16 +1,40 @@
-import pytz
-import requests
+import asyncio
+import base64
+import json
 import time
-import os
 
-from datetime import datetime
-from fastapi import Depends, FastAPI, HTTPException, Header, Query
-from fastapi.responses import JSONResponse
-from services.consulta_service import consultar_dados_pessoa_fisica
-from services.auth_service import get_current_user
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, FastAPI, HTTPException, Header, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from config.configuracoes import configuracoes
+from services.consulta_service import obter_dados_pessoa_fisica
+from services.auth_service import cache_jwks, get_current_user, PROFILE
+from services.pool_navegadores_service import pool_navegadores
+from services.cache_service import cache_consultas, cache_negativo
+from services.coalescencia_service import consultas_em_andamento
+from services.http_client_service import fechar_cliente_http
+from services.jobs_service import estado_publico, gerenciador_jobs
+from services.token_service import gerenciador_token
+from services.rede_service import totais_rede
+from services.armazenamento_service import armazenamento, id_artefato_valido, tipo_conteudo_artefato
+from services.lote_service import consultar_em_lote, LOTE_MAX_IDENTIFICADORES
+from services.fila_service import FILA_BACKEND, fila_consultas
+from services.worker_service import WorkerConsultas
+from services.governador_service import governador_portal
+from services.historico_service import historico_recursos
+from services.checkpoint_service import checkpoints_consultas
+from services.analitico_service import repositorio_analitico
+from services.escalonador_service import escalonador_consultas, identificar_cliente, PRIORIDADE_INTERATIVA
+from services.metricas_service import atualizar_indicadores, configurar_rastreamento, gerar_metricas, metricas_disponiveis
 
 from exceptions.scraping_exceptions import (
+    CallbackInvalido,
+    CapacidadeEsgotada,
+    IdentificadorInvalido,
+    CircuitoAberto,
+    CotaExcedida,
     CPFouNISNaoEncontrado,
     NomeNaoEncontrado,
     PortalInacessivel,
@@ -20,23 +44,69 @@ from exceptions.scraping_exceptions import (
     FalhaAoColetarDados
 )
 
-load_dotenv()
+X_API_KEY = configuracoes.x_api_key
+POOL_INICIAR_EM_SEGUNDO_PLANO = configuracoes.pool_iniciar_em_segundo_plano
+FUSO_HORARIO_BRASILIA = timezone(timedelta(hours=-3), "America/Sao_Paulo") # Horário de Brasília (sem horário de verão desde 2019)
+
+worker_local = WorkerConsultas(fila_consultas)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia o cache de chaves públicas, o pool de navegadores e os workers de consultas assíncronas
+    junto com a aplicação e os encerra no desligamento.
+
+    Com FILA_BACKEND=redis as consultas são executadas pelos workers (worker.py) e a API não abre
+    navegadores. Com FILA_BACKEND=memoria um worker é executado no próprio processo da API.
+
+    Com POOL_INICIAR_EM_SEGUNDO_PLANO (padrão) a API passa a responder antes de os navegadores serem
+    abertos e a sessão aquecida; o endpoint /prontidao indica quando o pool está pronto.
+    """
+    configurar_rastreamento()
+    if PROFILE != "local":
+        await cache_jwks.iniciar()
+    if FILA_BACKEND != "redis":
+        if POOL_INICIAR_EM_SEGUNDO_PLANO:
+            pool_navegadores.iniciar_em_segundo_plano()
+        else:
+            await pool_navegadores.iniciar()
+    if FILA_BACKEND == "memoria":
+        await worker_local.iniciar()
+    await gerenciador_jobs.iniciar()
+    yield
+    await gerenciador_jobs.encerrar()
+    await worker_local.encerrar()
+    await cache_jwks.encerrar()
+    await pool_navegadores.encerrar()
+    if fila_consultas is not None:
+        await fila_consultas.fechar()
+    await fechar_cliente_http()
+    await asyncio.to_thread(repositorio_analitico.fechar)
 
-AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
-AUTH0_API_AUDIENCE = os.getenv("AUTH0_API_AUDIENCE")
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-X_API_KEY = os.getenv("X_API_KEY")
 
 app = FastAPI(
+    lifespan=lifespan,
     title="API de Consulta Pessoa Física no Portal da Transparência",
     description="API para consultar dados de pessoa física no Portal da Transparência com autenticação via OAuth2 (Auth0).",
     version="1.0.0",
     docs_url="/docs",      
 )
 
-token_em_cache = None
-token_expiracao = 0
+
+class SolicitacaoConsulta(BaseModel):
+    identificador: str = Field(..., description="Nome, CPF ou NIS da pessoa a ser consultada")
+    incluir_filtro_social: bool = Field(default=False, description="Incluir filtro social na consulta")
+    callback_url: str | None = Field(default=None, description="URL notificada via POST quando a consulta for finalizada")
+
+
+class EstadoConsulta(BaseModel):
+    id: str = Field(..., description="Identificador da consulta")
+    status: str = Field(..., description="na_fila, em_execucao, concluida ou falhou")
+    criado_em: float = Field(..., description="Instante (timestamp) em que a consulta foi agendada")
+    atualizado_em: float = Field(..., description="Instante (timestamp) da última mudança de estado")
+    resultado: dict | None = Field(default=None, description="Dados da pessoa física, quando concluída")
+    erro: str | None = Field(default=None, description="Mensagem de erro, quando falhou")
+    tipo_erro: str | None = Field(default=None, description="Tipo do erro, quando falhou")
 
 
 @app.get("/", summary="Endpoint de teste", tags=["Geral"])
@@ -47,37 +117,370 @@ def hello_world():
     return {"message": "hello, world!"}
 
 
+@app.get(
+    "/prontidao",
+    summary="Prontidão para consultas",
+    tags=["Geral"],
+    responses={
+        200: {"description": "Pronta para executar consultas sem esperar a inicialização"},
+        503: {"description": "Ainda iniciando (navegadores sendo abertos ou sessão sendo aquecida)"},
+    }
+)
+def prontidao():
+    """
+    Indica se a aplicação está pronta para executar consultas ao portal (readiness probe).
+
+    O endpoint "/" responde assim que o processo inicia; este responde 200 somente após o pool de
+    navegadores estar aberto e aquecido. Com FILA_BACKEND=redis a API não abre navegadores e está
+    sempre pronta. Não exige autenticação.
+    """
+    verificacoes = {}
+    if FILA_BACKEND != "redis":
+        verificacoes["pool_navegadores"] = pool_navegadores.pronto
+
+    pronta = all(verificacoes.values())
+    return JSONResponse(status_code=200 if pronta else 503, content={"pronta": pronta, "verificacoes": verificacoes})
+
+
+@app.get(
+    "/estatisticas",
+    summary="Estatísticas de utilização",
+    tags=["Geral"],
+    response_description="Contadores do pool de navegadores, do cache e da deduplicação de consultas",
+)
+async def estatisticas(user: dict = Depends(get_current_user)):
+    """
+    Retorna contadores de utilização do pool de navegadores, do cache de consultas
+    e da deduplicação de consultas idênticas em andamento.
+    """
+    return {
+        "pool_navegadores": pool_navegadores.estatisticas(),
+        "cache": cache_consultas.estatisticas(),
+        "cache_negativo": cache_negativo.estatisticas(),
+        "consultas_coalescidas": consultas_em_andamento.estatisticas(),
+        "consultas_assincronas": await gerenciador_jobs.estatisticas(),
+        "rede": totais_rede.estatisticas(),
+        "fila": await fila_consultas.estatisticas() if fila_consultas is not None else None,
+        "governador_portal": governador_portal.estatisticas(),
+        "historico_recursos": historico_recursos.estatisticas(),
+        "checkpoints": checkpoints_consultas.estatisticas(),
+        "analitico": repositorio_analitico.estatisticas(),
+        "escalonador": escalonador_consultas.estatisticas(),
+    }
+
+
+@app.get(
+    "/metrics",
+    summary="Métricas no formato Prometheus",
+    tags=["Geral"],
+    response_description="Latência das etapas, utilização do pool, páginas visitadas e erros por classe",
+    responses={
+        503: {"description": "Pacote prometheus-client não instalado"},
+    }
+)
+async def metricas():
+    """
+    Expõe as métricas das consultas ao portal para coleta pelo Prometheus.
+    Não exige autenticação: deve ser acessível somente pela rede interna.
+    """
+    if not metricas_disponiveis():
+        return JSONResponse(status_code=503, content={"erro": "A exposição de métricas requer o pacote prometheus-client."})
+
+    atualizar_indicadores(
+        pool=pool_navegadores.estatisticas(),
+        governador=governador_portal.estatisticas(),
+        fila=await fila_consultas.estatisticas() if fila_consultas is not None else None,
+        escalonador=escalonador_consultas.estatisticas(),
+    )
+    conteudo, tipo_conteudo = gerar_metricas()
+    return Response(content=conteudo, media_type=tipo_conteudo)
+
+
 @app.get(
     "/consulta-pessoa-fisica",
     summary="Consulta dados de pessoa física",
     tags=["Consulta"],
     response_description="Dados detalhados da pessoa física consultada",
     responses={
-        200: {"description": "Consulta realizada com sucesso"},
-        422: {"description": "Erro na consulta: dados não encontrados ou limite excedido"},
+        200: {"description": "Consulta realizada com sucesso (com permitir_resultado_parcial, pode conter \"incompleto\": true e \"secoes_incompletas\")"},
+        422: {"description": "Identificador inválido (CPF ou NIS com dígitos verificadores incorretos) ou erro na consulta: dados não encontrados ou limite excedido"},
         500: {"description": "Erro inesperado no servidor"},
+        429: {"description": "Cota de consultas do cliente atingida (ver Retry-After)"},
+        503: {"description": "Capacidade de consultas simultâneas esgotada ou consultas ao portal suspensas (ver Retry-After)"},
         401: {"description": "Usuário não autenticado"},
     }
 )
 async def consulta_pessoa_fisica(
+    response: Response,
     identificador: str = Query(..., description="Nome, CPF ou NIS da pessoa a ser consultada"),
     incluir_filtro_social: bool = Query(default=False, description="Incluir filtro social na consulta"),
+    incluir_screenshot: bool = Query(default=True, description="Realizar a captura de tela da página da pessoa"),
+    incluir_screenshot_base64: bool = Query(default=False, description="Incluir a captura de tela em base64 na resposta (por padrão é retornada apenas a referência ao artefato)"),
+    max_age: int | None = Query(default=None, ge=0, description="Idade máxima (s) aceita para um resultado em cache. Use 0 para forçar uma nova consulta"),
+    permitir_resultado_parcial: bool = Query(default=False, description="Retornar os dados já coletados, com as seções incompletas indicadas, se a consulta falhar após a coleta dos dados da pessoa"),
+    prioridade: str = Query(default=PRIORIDADE_INTERATIVA, pattern="^(interativa|lote)$", description="Prioridade da consulta ao portal: 'interativa' ou 'lote' (cargas em massa que não devem atrasar as consultas interativas)"),
+    cache_control: str | None = Header(default=None, description="Aceita 'no-cache' ou 'max-age=N' com o mesmo efeito do parâmetro max_age"),
     user: dict = Depends(get_current_user)
 ):
-    agora = datetime.now(pytz.timezone("America/Sao_Paulo"))
+    agora = datetime.now(FUSO_HORARIO_BRASILIA)
     print(f"[{agora.strftime('%H:%M:%S')}] Identificador recebido para busca: {identificador}")
+
+    if max_age is None:
+        max_age = extrair_max_age(cache_control)
     
     try:
-        dados_pessoa = await consultar_dados_pessoa_fisica(identificador, incluir_filtro_social)
+        dados_pessoa, estado_cache, idade = await obter_dados_pessoa_fisica(
+            identificador, incluir_filtro_social, max_age, incluir_screenshot, permitir_resultado_parcial,
+            identificar_cliente(user), prioridade
+        )
+        response.headers["X-Cache"] = estado_cache
+        response.headers["Age"] = str(idade)
+
+        if incluir_screenshot_base64 and dados_pessoa.get("screenshot"):
+            conteudo = b"".join([bloco async for bloco in armazenamento.ler_em_blocos(dados_pessoa["screenshot"]["id"])])
+            dados_pessoa["screenshot_base64"] = base64.b64encode(conteudo).decode("utf-8")
+
         return dados_pessoa
 
-    except (CPFouNISNaoEncontrado, NomeNaoEncontrado, PortalInacessivel, TempoLimiteExcedido) as e:
+    except NomeNaoEncontrado as e:
+        conteudo = {"erro": str(e)}
+        if e.candidatos:
+            conteudo["candidatos"] = e.candidatos
+        return JSONResponse(status_code=422, content=conteudo)
+
+    except (IdentificadorInvalido, CPFouNISNaoEncontrado, PortalInacessivel, TempoLimiteExcedido) as e:
         return JSONResponse(status_code=422, content={"erro": str(e)})
 
+    except CapacidadeEsgotada as e:
+        return JSONResponse(status_code=503, content={"erro": str(e)})
+
+    except CircuitoAberto as e:
+        return JSONResponse(status_code=503, content={"erro": str(e)}, headers={"Retry-After": str(e.retry_after)})
+
+    except CotaExcedida as e:
+        return JSONResponse(status_code=429, content={"erro": str(e)}, headers={"Retry-After": str(e.retry_after)})
+
     except ErroInesperadoDuranteConsulta as e:
         return JSONResponse(status_code=500, content={"erro": str(e)})
 
 
+class SolicitacaoLote(BaseModel):
+    identificadores: list[str] = Field(..., min_length=1, description="Nomes, CPFs ou NIS das pessoas a serem consultadas")
+    incluir_filtro_social: bool = Field(default=False, description="Incluir filtro social nas consultas")
+
+
+def status_http_do_erro(erro):
+    """
+    Retorna o status HTTP correspondente a um erro de consulta.
+    """
+    if isinstance(erro, (IdentificadorInvalido, CPFouNISNaoEncontrado, NomeNaoEncontrado, PortalInacessivel, TempoLimiteExcedido)):
+        return 422
+
+    if isinstance(erro, CotaExcedida):
+        return 429
+
+    if isinstance(erro, (CapacidadeEsgotada, CircuitoAberto)):
+        return 503
+
+    return 500
+
+
+@app.post(
+    "/consultas/lote",
+    summary="Consulta várias pessoas físicas em uma única chamada",
+    tags=["Consulta"],
+    response_description="Resultados em NDJSON (um JSON por linha), enviados à medida que cada consulta termina",
+    responses={
+        200: {"description": "Lote iniciado; cada linha traz o resultado ou o erro de um identificador"},
+        422: {"description": "Lote vazio ou maior que o limite permitido"},
+        401: {"description": "Usuário não autenticado"},
+    }
+)
+async def consultar_lote(solicitacao: SolicitacaoLote, user: dict = Depends(get_current_user)):
+    """
+    Executa as consultas do lote com paralelismo limitado (LOTE_PARALELISMO) e taxa compartilhada
+    com os demais lotes (LOTE_CONSULTAS_POR_MINUTO), retornando cada resultado assim que ele é concluído.
+    A falha de um identificador é retornada na sua própria linha e não interrompe o lote.
+    """
+    if len(solicitacao.identificadores) > LOTE_MAX_IDENTIFICADORES:
+        return JSONResponse(
+            status_code=422,
+            content={"erro": f"O lote deve conter no máximo {LOTE_MAX_IDENTIFICADORES} identificadores."}
+        )
+
+    async def gerar_linhas():
+        async for item in consultar_em_lote(
+            solicitacao.identificadores, solicitacao.incluir_filtro_social, identificar_cliente(user)
+        ):
+            linha = {
+                "indice": item["indice"],
+                "identificador": item["identificador"],
+                "tipo": item["tipo"],
+            }
+
+            if item["erro"] is None:
+                linha["status"] = 200
+                linha["dados"] = item["dados"]
+            else:
+                linha["status"] = status_http_do_erro(item["erro"])
+                linha["erro"] = str(item["erro"])
+                linha["tipo_erro"] = type(item["erro"]).__name__
+
+            yield json.dumps(linha, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(gerar_linhas(), media_type="application/x-ndjson")
+
+
+@app.post(
+    "/consultas",
+    status_code=202,
+    summary="Agenda uma consulta assíncrona de pessoa física",
+    tags=["Consulta"],
+    response_description="Identificador da consulta agendada",
+    responses={
+        202: {"description": "Consulta agendada"},
+        422: {"description": "Identificador não é um nome nem um CPF ou NIS válido, ou callback_url não permitido"},
+        503: {"description": "Fila de consultas cheia"},
+        401: {"description": "Usuário não autenticado"},
+    }
+)
+async def agendar_consulta(solicitacao: SolicitacaoConsulta, user: dict = Depends(get_current_user)):
+    """
+    Agenda a consulta e retorna imediatamente. O resultado pode ser acompanhado em
+    `GET /consultas/{id}` ou recebido no `callback_url` informado.
+    """
+    try:
+        job = await gerenciador_jobs.enfileirar(
+            solicitacao.identificador,
+            solicitacao.incluir_filtro_social,
+            solicitacao.callback_url,
+            identificar_cliente(user)
+        )
+    except (IdentificadorInvalido, CallbackInvalido) as e:
+        return JSONResponse(status_code=422, content={"erro": str(e)})
+    except CapacidadeEsgotada as e:
+        return JSONResponse(status_code=503, content={"erro": str(e)})
+
+    return {"id": job["id"], "status": job["status"]}
+
+
+@app.get(
+    "/consultas/{id_consulta}",
+    summary="Consulta o estado de uma consulta assíncrona",
+    tags=["Consulta"],
+    response_description="Estado e, quando finalizada, resultado da consulta",
+    response_model=EstadoConsulta,
+    responses={
+        200: {"description": "Consulta encontrada"},
+        404: {"description": "Consulta não encontrada"},
+        401: {"description": "Usuário não autenticado"},
+    }
+)
+async def obter_consulta(id_consulta: str, user: dict = Depends(get_current_user)):
+    """
+    Retorna a consulta somente ao cliente que a agendou. Consultas de outros clientes são tratadas
+    como inexistentes, para não revelar seus ids.
+    """
+    job = await gerenciador_jobs.obter(id_consulta)
+
+    if job is None or job["cliente"] != identificar_cliente(user):
+        raise HTTPException(status_code=404, detail="Consulta não encontrada.")
+
+    return estado_publico(job)
+
+
+@app.get(
+    "/artefatos/{id_artefato}",
+    summary="Obtém um artefato armazenado (ex: captura de tela)",
+    tags=["Consulta"],
+    response_description="Conteúdo do artefato",
+    responses={
+        200: {"description": "Artefato encontrado"},
+        404: {"description": "Artefato não encontrado"},
+        401: {"description": "Usuário não autenticado"},
+    }
+)
+async def obter_artefato(id_artefato: str, user: dict = Depends(get_current_user)):
+    """
+    Transmite o conteúdo de um artefato referenciado no resultado de uma consulta.
+    """
+    if not id_artefato_valido(id_artefato) or not await armazenamento.existe(id_artefato):
+        raise HTTPException(status_code=404, detail="Artefato não encontrado.")
+
+    return StreamingResponse(
+        armazenamento.ler_em_blocos(id_artefato),
+        media_type=tipo_conteudo_artefato(id_artefato),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@app.get(
+    "/analitico/recursos",
+    summary="Totais dos recursos recebidos pelas pessoas consultadas",
+    tags=["Analítico"],
+    response_description="Parcelas, pessoas e valor total por grupo",
+    responses={
+        200: {"description": "Agregação realizada com sucesso"},
+        422: {"description": "Agrupamento ou filtro inválido"},
+        401: {"description": "Usuário não autenticado"},
+    }
+)
+async def agregar_recursos(
+    agrupar_por: list[str] = Query(default=["mes"], description="Colunas de agrupamento: mes, tipo, uf, municipio ou cpf_fragmento"),
+    tipo: str | None = Query(default=None, description="Tipo de benefício (ex: auxílio emergencial)"),
+    uf: str | None = Query(default=None, description="UF do recebimento"),
+    municipio: str | None = Query(default=None, description="Município do recebimento"),
+    cpf_fragmento: str | None = Query(default=None, description="Dígitos visíveis do CPF (ex: 123.456)"),
+    mes_inicio: str | None = Query(default=None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Primeiro mês (AAAA-MM)"),
+    mes_fim: str | None = Query(default=None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Último mês (AAAA-MM)"),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Agrega as linhas de recursos de todas as pessoas já consultadas (base analítica), sem ler os arquivos JSON.
+    Os totais são retornados como texto decimal, sem perda de precisão.
+    """
+    inicio = time.perf_counter()
+
+    try:
+        grupos = await repositorio_analitico.agregar(
+            agrupar_por=agrupar_por, tipo=tipo, uf=uf, municipio=municipio, cpf_fragmento=cpf_fragmento,
+            mes_inicio=mes_inicio, mes_fim=mes_fim
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"erro": str(e)})
+
+    return {
+        "agrupado_por": agrupar_por,
+        "grupos": grupos,
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+    }
+
+
+def extrair_max_age(cache_control):
+    """
+    Interpreta o cabeçalho Cache-Control da requisição ('no-cache', 'no-store' ou 'max-age=N').
+
+    Retorna:
+    - int com a idade máxima aceita em segundos, ou None se o cabeçalho não restringir o cache.
+    """
+    if not cache_control:
+        return None
+
+    for diretiva in cache_control.lower().split(","):
+        diretiva = diretiva.strip()
+
+        if diretiva in ("no-cache", "no-store"):
+            return 0
+
+        if diretiva.startswith("max-age="):
+            try:
+                return max(int(diretiva.split("=", 1)[1]), 0)
+            except ValueError:
+                return None
+
+    return None
+
+
 @app.get(
     "/get-token",
     summary="Gera token de acesso via chave de API",
@@ -86,32 +489,17 @@ async def consulta_pessoa_fisica(
     responses={
         200: {"description": "Token gerado com sucesso"},
         401: {"description": "Chave de API inválida"},
+        502: {"description": "Falha ao emitir o token no Auth0"},
     }
 )
-def get_token(x_api_key: str = Header(..., description="Chave de API para autorização")):
+async def get_token(x_api_key: str = Header(..., description="Chave de API para autorização")):
     if x_api_key != X_API_KEY:
         raise HTTPException(status_code=401, detail="Chave para geração de token inválida.")
 
-    global token_em_cache, token_expiracao
-    now = time.time()
-
-    if token_em_cache and now < token_expiracao:
-        return {"access_token": token_em_cache}
-
-    resp = requests.post(
-        f"https://{AUTH0_DOMAIN}/oauth/token",
-        json={
-            "client_id": f"{CLIENT_ID}",
-            "client_secret": f"{CLIENT_SECRET}",
-            "audience": f"{AUTH0_API_AUDIENCE}",
-            "grant_type": "client_credentials"
-        }
-    )
-    resp.raise_for_status()
-    data = resp.json()
-
-    token_em_cache = data["access_token"]
-    token_expiracao = now + 86000
-    
-    return {"access_token": data["access_token"]}
+    try:
+        access_token = await gerenciador_token.obter_token()
+    except Exception as e:
+        print(f"Falha ao emitir token de acesso: {e}")
+        raise HTTPException(status_code=502, detail="Não foi possível emitir o token de acesso.")
 
+    return {"access_token": access_token}
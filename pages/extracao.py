@@ -0,0 +1,104 @@
+from unidecode import unidecode
+
+# Scripts executados no navegador para extrair listas e tabelas inteiras em uma única chamada,
+# evitando uma ida e volta (IPC) ao Chromium para cada elemento ou célula.
+
+SCRIPT_RESULTADOS_BUSCA = """
+itens => itens.map(item => ({
+    link: item.querySelector("a")?.getAttribute("href") ?? null,
+    nome: item.querySelector(".link-busca-nome")?.innerHTML ?? null
+}))
+"""
+
+SCRIPT_DADOS_TABELADOS = """
+blocos => ({
+    rotulos: blocos.flatMap(bloco => [...bloco.querySelectorAll("strong")].map(e => e.innerHTML)),
+    valores: blocos.flatMap(bloco => [...bloco.querySelectorAll("span")].map(e => e.innerHTML))
+})
+"""
+
+SCRIPT_RECEBIMENTOS = """
+tabelas => tabelas.map(tabela => ({
+    tipo: tabela.querySelector("strong")?.innerHTML ?? "",
+    valor_recebido: tabela.querySelector("tbody td:nth-child(4)")?.innerHTML ?? "",
+    link: tabela.querySelector("a")?.getAttribute("href") ?? null
+}))
+"""
+
+SCRIPT_TABELA = """
+tabela => {
+    const linhas = [...tabela.querySelectorAll("tr")];
+    const cabecalho = linhas.length ? [...linhas[0].querySelectorAll("th")].map(th => th.innerHTML) : [];
+    return {
+        cabecalho,
+        linhas: linhas.slice(1).map(linha => [...linha.querySelectorAll("span")].map(span => span.innerHTML))
+    };
+}
+"""
+
+def normalizar_cabecalho(campo_cabecalho):
+    """
+    Normaliza o nome de uma coluna de tabela (ex: "Valor (R$)" -> "valor", "Mês Folha" -> "mes_folha").
+    """
+    return unidecode(campo_cabecalho.lower().replace(" ", "_").replace("_(r$)", ""))
+
+async def extrair_resultados_busca(itens):
+    """
+    Extrai link e nome de todos os itens da lista #resultados.
+
+    Parâmetros:
+    - itens (Locator): itens da lista de resultados.
+
+    Retorna:
+    - lista de dicts com as chaves "link" e "nome".
+    """
+    return await itens.evaluate_all(SCRIPT_RESULTADOS_BUSCA)
+
+async def extrair_dados_tabelados(blocos, quantidade):
+    """
+    Extrai os pares rótulo/valor (strong/span) dos blocos `.dados-tabelados`.
+
+    Parâmetros:
+    - blocos (Locator): blocos `.dados-tabelados` da página da pessoa.
+    - quantidade (int): quantidade de pares a serem retornados.
+
+    Retorna:
+    - dict {rótulo em minúsculas: valor}.
+    """
+    dados = await blocos.evaluate_all(SCRIPT_DADOS_TABELADOS)
+    pares = list(zip(dados["rotulos"], dados["valores"]))[:quantidade]
+
+    if len(pares) < quantidade:
+        raise ValueError("Quantidade de dados tabelados menor que a esperada.")
+
+    return {rotulo.lower(): valor.strip() for rotulo, valor in pares}
+
+async def extrair_recebimentos(tabelas):
+    """
+    Extrai tipo, valor recebido e link de detalhes de todas as tabelas `.br-table` de recebimentos.
+
+    Parâmetros:
+    - tabelas (Locator): tabelas de recebimentos.
+
+    Retorna:
+    - lista de dicts com as chaves "tipo", "valor_recebido" e "link".
+    """
+    return await tabelas.evaluate_all(SCRIPT_RECEBIMENTOS)
+
+async def extrair_tabela(tabela):
+    """
+    Extrai o cabeçalho normalizado e as linhas de uma tabela `.dados-detalhados`.
+
+    Parâmetros:
+    - tabela (Locator): tabela de dados detalhados.
+
+    Retorna:
+    - Tuple (cabecalho: list, recursos: list[dict]) com as linhas indexadas pelo cabeçalho.
+    """
+    dados = await tabela.evaluate(SCRIPT_TABELA)
+    cabecalho = [normalizar_cabecalho(campo) for campo in dados["cabecalho"]]
+    recursos = [
+        {cabecalho[j]: valor for j, valor in enumerate(linha)}
+        for linha in dados["linhas"]
+    ]
+    return cabecalho, recursos
@@ -1,9 +1,21 @@
 import asyncio
-import os
+import copy
+import html
+import re
 
-from dotenv import load_dotenv
+from difflib import SequenceMatcher
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from unidecode import unidecode
 
+from config.configuracoes import configuracoes
+from pages.extracao import (
+    extrair_dados_tabelados,
+    extrair_recebimentos,
+    extrair_resultados_busca,
+    extrair_tabela
+)
 from exceptions.scraping_exceptions import (
     CPFouNISNaoEncontrado,
     NomeNaoEncontrado,
@@ -12,220 +24,744 @@ from exceptions.scraping_exceptions import (
     ElementoNaoEncontrado,
     FalhaAoColetarDados
 )
-
-load_dotenv()
-
-URL_BASE_PORTAL_TRANSPARENCIA = os.getenv("URL_BASE_PORTAL_TRANSPARENCIA") # URL base do Portal da Transparência
-TIPOS_RECEBIMENTO_PERMITIDOS =  os.getenv("TIPOS_RECEBIMENTO_PERMITIDOS").split(",") # Tipos de recebimentos que podem ser coletados
+from services.checkpoint_service import CheckpointConsulta
+from services.governador_service import governador_portal
+from services.historico_service import chave_linha, historico_recursos, mesclar_linhas
+from services.metricas_service import etapa, registrar_pagina_visitada
+
+URL_BASE_PORTAL_TRANSPARENCIA = configuracoes.url_base_portal_transparencia
+TIPOS_RECEBIMENTO_PERMITIDOS = configuracoes.tipos_recebimento_permitidos
+TEMPO_LIMITE_PASSO_MS = configuracoes.tempo_limite_passo_ms
+ATRASO_CORTESIA_SEGUNDOS = configuracoes.atraso_cortesia_segundos
+LIMITE_PAGINAS_RECURSOS_SIMULTANEAS = configuracoes.limite_paginas_recursos_simultaneas
+MODO_RAPIDO_RECURSOS = configuracoes.modo_rapido_recursos
+TAMANHO_PAGINA_MODO_RAPIDO = configuracoes.tamanho_pagina_modo_rapido
+BUSCA_NOME_MAX_PAGINAS = configuracoes.busca_nome_max_paginas
+BUSCA_NOME_PAGINAS_SIMULTANEAS = configuracoes.busca_nome_paginas_simultaneas
+QUANTIDADE_CANDIDATOS_NOME = 5 # Candidatos mais próximos mantidos para a resposta e para a mensagem de erro
+PADRAO_URL_RESULTADOS_BUSCA = "/busca/resultado" # Trecho da URL da requisição (XHR) que carrega a lista #resultados
+SELETOR_CONTAGEM_RESULTADOS = "#countResultados" # Contagem exibida pelo portal após a busca ("0" quando não há resultados)
+
+# A lista #resultados existe antes de os itens da busca serem renderizados (e, ao reenviar a busca, ainda com os itens
+# anteriores): a busca só é considerada carregada quando há itens novos ou o portal informa que não há resultados
+SCRIPT_MARCAR_RESULTADOS_ANTERIORES = """(seletorContagem) => {
+    document.querySelectorAll("#resultados li").forEach(item => item.dataset.anterior = "1");
+    const contagem = document.querySelector(seletorContagem);
+    if (contagem) contagem.textContent = "";
+}"""
+# Ao acessar a URL da lista, a página nova pode trazer itens e uma contagem provisória (ex: "0") antes da resposta
+# da busca: a mesma marcação é aplicada no DOMContentLoaded de cada documento carregado, antes da renderização
+SCRIPT_MARCAR_RESULTADOS_AO_CARREGAR = f"""document.addEventListener("DOMContentLoaded", () => {{
+    ({SCRIPT_MARCAR_RESULTADOS_ANTERIORES})("{SELETOR_CONTAGEM_RESULTADOS}");
+}});"""
+SCRIPT_RESULTADOS_RENDERIZADOS = """(seletorContagem) => {
+    if (document.querySelector("#resultados li:not([data-anterior])")) return true;
+    const contagem = document.querySelector(seletorContagem);
+    return !!contagem && contagem.textContent.trim() === "0";
+}"""
+PARAMETROS_TAMANHO_PAGINA = ("tamanhoPagina", "length") # Parâmetros de tamanho de página aceitos nas requisições das tabelas
+PARAMETROS_OFFSET = ("offset", "start") # Parâmetros de deslocamento aceitos nas requisições das tabelas
+
+def _chave_comparacao(texto):
+    """
+    Normaliza um nome de coluna ou campo JSON para comparação (ex: "Mês Folha", "mes_folha" e "mesFolha" -> "mesfolha").
+    """
+    return re.sub(r"[^a-z0-9]", "", unidecode(texto).lower().replace("(r$)", ""))
+
+def _normalizar_nome(nome):
+    """
+    Normaliza um nome para comparação, ignorando acentos, caixa, pontuação e espaços repetidos
+    (ex: "José  da Silva-Júnior" -> "jose da silva junior").
+    """
+    texto = unidecode(html.unescape(nome or "")).lower()
+    return " ".join(re.sub(r"[^a-z0-9]", " ", texto).split())
+
+def _pontuar_nome(nome_pesquisado, nome_candidato):
+    """
+    Calcula a semelhança entre o nome pesquisado e um nome da lista de resultados, usada somente para
+    ordenar e informar os candidatos (a escolha do nome é feita por _nome_corresponde).
+
+    Retorna:
+    - float entre 0 e 1, sendo 1 somente para nomes iguais após a normalização.
+    """
+    pesquisado = _normalizar_nome(nome_pesquisado)
+    candidato = _normalizar_nome(nome_candidato)
+
+    if not pesquisado or not candidato:
+        return 0.0
+    if pesquisado == candidato:
+        return 1.0
+
+    return round(min(SequenceMatcher(None, pesquisado, candidato).ratio(), 0.999), 3)
+
+def _nome_corresponde(nome_pesquisado, nome_candidato, aceitar_contido=False):
+    """
+    Indica se um nome da lista de resultados é o nome pesquisado.
+
+    Parâmetros:
+    - nome_pesquisado (str): nome informado na consulta.
+    - nome_candidato (str): nome exibido na lista de resultados.
+    - aceitar_contido (bool): se True, também aceita um candidato que contém o nome pesquisado, palavra
+      por palavra (comportamento da busca com filtro social).
+
+    Retorna:
+    - True somente para nomes iguais após a normalização (acentos, caixa, pontuação e espaços) ou, com
+      `aceitar_contido`, que contêm o nome pesquisado. Nomes apenas semelhantes nunca correspondem: poderiam
+      ser de outra pessoa.
+    """
+    pesquisado = _normalizar_nome(nome_pesquisado)
+    candidato = _normalizar_nome(nome_candidato)
+
+    if not pesquisado or not candidato:
+        return False
+
+    return pesquisado == candidato or (aceitar_contido and f" {pesquisado} " in f" {candidato} ")
+
+def _url_lista_resultados(identificador, pagina, aplicar_filtro_social):
+    """
+    Monta a URL da lista de resultados da busca para uma página específica.
+    """
+    parametros = {"termo": identificador, "pagina": pagina, "tamanhoPagina": 10}
+    if aplicar_filtro_social:
+        parametros["beneficiarioProgramaSocial"] = "true"
+    return f"{URL_BASE_PORTAL_TRANSPARENCIA}/pessoa-fisica/busca/lista?{urlencode(parametros)}"
+
+def _url_com_paginacao(url, offset, tamanho_pagina):
+    """
+    Reescreve os parâmetros de paginação da URL de uma tabela (DataTables).
+
+    Retorna:
+    - URL com offset e tamanho de página alterados, ou None se a URL não possuir os parâmetros esperados.
+    """
+    partes = urlsplit(url)
+    parametros = parse_qsl(partes.query, keep_blank_values=True)
+    nomes = [nome for nome, _ in parametros]
+
+    parametro_tamanho = next((p for p in PARAMETROS_TAMANHO_PAGINA if p in nomes), None)
+    parametro_offset = next((p for p in PARAMETROS_OFFSET if p in nomes), None)
+
+    if parametro_tamanho is None or parametro_offset is None:
+        return None
+
+    novos_parametros = []
+    for nome, valor in parametros:
+        if nome == parametro_tamanho:
+            valor = str(tamanho_pagina)
+        elif nome == parametro_offset:
+            valor = str(offset)
+        novos_parametros.append((nome, valor))
+
+    return urlunsplit(partes._replace(query=urlencode(novos_parametros)))
+
+def _mapear_cabecalho_para_campos(cabecalho, linha):
+    """
+    Associa cada coluna do cabeçalho a um campo do JSON retornado pela requisição da tabela.
+
+    Retorna:
+    - dict {coluna_cabecalho: campo_json}, ou None se alguma coluna não tiver campo correspondente.
+    """
+    campos = {_chave_comparacao(campo): campo for campo in linha}
+    mapeamento = {}
+
+    for coluna in cabecalho:
+        campo = campos.get(_chave_comparacao(coluna))
+        if campo is None:
+            return None
+        mapeamento[coluna] = campo
+
+    return mapeamento
 
 class PortalPage:
-    def __init__(self, page):
+    def __init__(self, page, sessao_aquecida=False, monitor_rede=None):
         self.page = page
-    
-    async def buscar_pessoa_fisica(self, search_data, aplicar_filtro_social):
+        self.sessao_aquecida = sessao_aquecida
+        self.monitor_rede = monitor_rede
+        self.requisicoes_tabelas = []
+        self.candidatos_nome = []
+        self._marcacao_ao_carregar_instalada = False
+
+    def __registrar_requisicao_tabela__(self, response):
         """
-        Realiza a busca da pessoa física no Portal da Transparência com base no identificador recebido.
+        Registra as URLs das requisições (XHR) paginadas que alimentam as tabelas de recursos.
+        """
+        if response.request.resource_type in ("xhr", "fetch") and _url_com_paginacao(response.url, 0, 1) is not None:
+            self.requisicoes_tabelas.append(response.url)
+
+    async def __coletar_tabela_via_http__(self, url_requisicao, cabecalho, recursos_primeira_pagina, chaves_conhecidas=None):
+        """
+        Coleta todas as páginas de uma tabela de recursos diretamente da requisição JSON que a alimenta,
+        com páginas grandes e reaproveitando os cookies e conexões do contexto do navegador.
 
         Parâmetros:
-        - search_data (dict): dict com "identificador" e "tipo" (nome ou nis/cpf).
-        - aplicar_filtro_social (bool): se deve aplicar filtro para beneficiários de programa social.
+        - url_requisicao (str): URL da requisição paginada capturada ao carregar a tabela.
+        - cabecalho (list): colunas normalizadas da tabela.
+        - recursos_primeira_pagina (list): linhas da primeira página lidas pelo DOM, usadas para validar o formato.
+        - chaves_conhecidas (set | None): linhas já coletadas anteriormente (ver chave_linha). A coleta para na
+          primeira página que contém uma delas, desde que as linhas novas e as conhecidas cubram o total informado.
 
         Retorna:
-        - URL da página da pessoa física encontrada.
+        - lista de recursos no mesmo formato do DOM, ou None se o formato da requisição não for reconhecido
+          (nesse caso a coleta continua pela paginação do DOM).
+        """
+        try:
+            recursos = []
+            mapeamento = None
+            offset = 0
+
+            while True:
+                url = _url_com_paginacao(url_requisicao, offset, TAMANHO_PAGINA_MODO_RAPIDO)
+                async with governador_portal.navegacao():
+                    resposta = await self.page.context.request.get(url, timeout=TEMPO_LIMITE_PASSO_MS)
+                if not resposta.ok:
+                    return None
+
+                corpo = await resposta.json()
+                linhas = corpo.get("data") if isinstance(corpo, dict) else None
+                if not isinstance(linhas, list):
+                    return None
+
+                if linhas and mapeamento is None:
+                    mapeamento = _mapear_cabecalho_para_campos(cabecalho, linhas[0])
+                    if mapeamento is None:
+                        return None
+
+                for linha in linhas:
+                    recursos.append({
+                        coluna: "" if linha.get(campo) is None else str(linha.get(campo))
+                        for coluna, campo in mapeamento.items()
+                    })
+
+                offset += len(linhas)
+                total = corpo.get("recordsTotal", corpo.get("recordsFiltered"))
+
+                # Coleta incremental: as páginas seguintes contêm somente linhas já conhecidas
+                if chaves_conhecidas and linhas \
+                        and any(chave_linha(recurso) in chaves_conhecidas for recurso in recursos[-len(linhas):]):
+                    novas = sum(1 for recurso in recursos if chave_linha(recurso) not in chaves_conhecidas)
+                    if total is None or novas + len(chaves_conhecidas) >= int(total):
+                        break
+
+                if not linhas or (total is not None and offset >= int(total)) \
+                    or (total is None and len(linhas) < TAMANHO_PAGINA_MODO_RAPIDO):
+                    break
+
+            # Confere se as linhas retornadas pela requisição correspondem à primeira página exibida
+            quantidade_primeira_pagina = len(recursos_primeira_pagina)
+            primeira_pagina_normalizada = [
+                {coluna: valor.strip() for coluna, valor in recurso.items()}
+                for recurso in recursos_primeira_pagina
+            ]
+            if recursos[:quantidade_primeira_pagina] != primeira_pagina_normalizada:
+                return None
+
+            return recursos_primeira_pagina + recursos[quantidade_primeira_pagina:]
+        except Exception:
+            return None
+
+    async def __pausa_cortesia__(self):
+        """
+        Aplica a pausa de cortesia configurada (ATRASO_CORTESIA_SEGUNDOS), se houver.
         """
+        if ATRASO_CORTESIA_SEGUNDOS > 0:
+            await asyncio.sleep(ATRASO_CORTESIA_SEGUNDOS)
+
+    async def __clicar__(self, locator, etapa):
+        """
+        Clica em um elemento aguardando que ele esteja visível e habilitado, dentro do tempo limite da etapa.
+        """
+        await self.__pausa_cortesia__()
+        try:
+            await locator.click(timeout=TEMPO_LIMITE_PASSO_MS)
+        except PlaywrightTimeoutError:
+            raise TempoLimiteExcedido(f"Tempo limite excedido na etapa: {etapa}.")
 
+    async def __aguardar_elemento__(self, locator, etapa, estado="visible"):
+        """
+        Aguarda um elemento atingir o estado informado (visible, attached...) dentro do tempo limite da etapa.
+        """
+        try:
+            await locator.first.wait_for(state=estado, timeout=TEMPO_LIMITE_PASSO_MS)
+        except PlaywrightTimeoutError:
+            raise TempoLimiteExcedido(f"Tempo limite excedido na etapa: {etapa}.")
+
+    async def __navegar__(self, url, etapa):
+        """
+        Acessa a URL aguardando somente o carregamento do DOM, dentro do tempo limite da etapa.
+        """
+        await self.__pausa_cortesia__()
+        registrar_pagina_visitada()
+        try:
+            async with governador_portal.navegacao():
+                await self.page.goto(url, wait_until="domcontentloaded", timeout=TEMPO_LIMITE_PASSO_MS)
+        except PlaywrightTimeoutError:
+            raise TempoLimiteExcedido(f"Tempo limite excedido na etapa: {etapa}.")
+
+    async def __aguardar_resultados_renderizados__(self):
+        """
+        Aguarda itens novos na lista #resultados ou a contagem "0" (ver SCRIPT_RESULTADOS_RENDERIZADOS).
+        """
+        await self.page.wait_for_function(
+            SCRIPT_RESULTADOS_RENDERIZADOS, arg=SELETOR_CONTAGEM_RESULTADOS, timeout=TEMPO_LIMITE_PASSO_MS
+        )
+
+    async def __clicar_e_aguardar_resultados__(self, locator, etapa):
+        """
+        Clica em um elemento, aguarda a resposta da requisição que carrega a lista #resultados e,
+        em seguida, a renderização dos novos itens (ou da contagem "0" quando não há resultados).
+        """
+        await self.__pausa_cortesia__()
+        registrar_pagina_visitada()
+        try:
+            await self.page.evaluate(SCRIPT_MARCAR_RESULTADOS_ANTERIORES, SELETOR_CONTAGEM_RESULTADOS)
+            async with governador_portal.navegacao(), self.page.expect_response(
+                lambda response: PADRAO_URL_RESULTADOS_BUSCA in response.url,
+                timeout=TEMPO_LIMITE_PASSO_MS
+            ):
+                await locator.click(timeout=TEMPO_LIMITE_PASSO_MS)
+            await self.__aguardar_resultados_renderizados__()
+        except PlaywrightTimeoutError:
+            raise TempoLimiteExcedido(f"Tempo limite excedido na etapa: {etapa}.")
+
+    async def __clicar_e_aguardar_mudanca_tabela__(self, tabela, botao, etapa):
+        """
+        Clica em um botão de paginação e aguarda o conteúdo do corpo da tabela mudar.
+        """
+        await self.__pausa_cortesia__()
+        registrar_pagina_visitada()
+        try:
+            corpo = await tabela.locator("tbody").first.element_handle(timeout=TEMPO_LIMITE_PASSO_MS)
+            conteudo_anterior = await corpo.inner_text()
+            async with governador_portal.navegacao():
+                await botao.click(timeout=TEMPO_LIMITE_PASSO_MS)
+                await self.page.wait_for_function(
+                    "([corpo, anterior]) => corpo.innerText !== anterior",
+                    arg=[corpo, conteudo_anterior],
+                    timeout=TEMPO_LIMITE_PASSO_MS
+                )
+        except PlaywrightTimeoutError:
+            raise TempoLimiteExcedido(f"Tempo limite excedido na etapa: {etapa}.")
+    
+    async def aceitar_cookies(self):
+        """
+        Acessa a página de visão geral e aceita os cookies do portal.
+
+        Utilizado para aquecer a sessão que é reaproveitada pelos contextos do pool de navegadores.
+        """
+        await self.__navegar__(f"{URL_BASE_PORTAL_TRANSPARENCIA}/pessoa/visao-geral", "acesso à visão geral")
+        await self.__clicar__(self.page.locator("#accept-all-btn"), "aceite de cookies")
+
+    async def __carregar_lista_resultados__(self, url, etapa):
+        """
+        Acessa a URL da lista de resultados, aguarda a requisição que carrega a lista #resultados e,
+        em seguida, a renderização dos itens (ou da contagem "0" quando não há resultados).
+
+        Os itens e a contagem presentes no carregamento do documento são marcados como anteriores
+        (ver SCRIPT_MARCAR_RESULTADOS_AO_CARREGAR), como no reenvio da busca.
+        """
+        await self.__pausa_cortesia__()
+        registrar_pagina_visitada()
+        if not self._marcacao_ao_carregar_instalada:
+            await self.page.add_init_script(SCRIPT_MARCAR_RESULTADOS_AO_CARREGAR)
+            self._marcacao_ao_carregar_instalada = True
+        try:
+            async with governador_portal.navegacao(), self.page.expect_response(
+                lambda response: PADRAO_URL_RESULTADOS_BUSCA in response.url,
+                timeout=TEMPO_LIMITE_PASSO_MS
+            ):
+                await self.page.goto(url, wait_until="domcontentloaded", timeout=TEMPO_LIMITE_PASSO_MS)
+            await self.__aguardar_resultados_renderizados__()
+        except PlaywrightTimeoutError:
+            raise TempoLimiteExcedido(f"Tempo limite excedido na etapa: {etapa}.")
+
+    async def __buscar_pela_url__(self, search_data, aplicar_filtro_social):
+        """
+        Acessa diretamente a URL da lista de resultados da busca, sem passar pela visão geral.
+
+        Retorna:
+        - True se a lista de resultados foi carregada, False caso contrário.
+        """
+        try:
+            async with etapa("busca_por_url"):
+                await self.__carregar_lista_resultados__(
+                    _url_lista_resultados(search_data["identificador"], 1, aplicar_filtro_social),
+                    "busca pela URL"
+                )
+            return True
+        except Exception:
+            return False
+
+    async def __buscar_pelo_formulario__(self, search_data, aplicar_filtro_social):
+        """
+        Realiza a busca pelo fluxo completo: visão geral, botão de consulta, aceite de cookies e formulário de busca.
+        """
         # Tenta acessar a página principal da visão geral
         try:
-            await self.page.goto(f"{URL_BASE_PORTAL_TRANSPARENCIA}/pessoa/visao-geral", wait_until="load")
+            async with etapa("navegacao_inicial"):
+                await self.__navegar__(f"{URL_BASE_PORTAL_TRANSPARENCIA}/pessoa/visao-geral", "acesso à visão geral")
+        except TempoLimiteExcedido:
+            raise
         except Exception:
             raise PortalInacessivel("Não foi possível acessar o Portal da Transparência.")
 
         # Tenta clicar no botão de consulta, aceitar cookies e preencher o campo de busca
         try:
-            await asyncio.sleep(5)
-            await self.page.locator("#button-consulta-pessoa-fisica").click()
-            await asyncio.sleep(5)
-            await self.page.locator("#accept-all-btn").click()
-            await asyncio.sleep(5)
+            await self.__clicar__(self.page.locator("#button-consulta-pessoa-fisica"), "botão de consulta")
+            botao_aceite = self.page.locator("#accept-all-btn")
+            if not self.sessao_aquecida or await botao_aceite.is_visible():
+                async with etapa("aceite_cookies"):
+                    await self.__clicar__(botao_aceite, "aceite de cookies")
+            await self.__aguardar_elemento__(self.page.locator("#termo"), "campo de busca")
             await self.page.locator("#termo").fill(search_data["identificador"])
+        except TempoLimiteExcedido:
+            raise
         except Exception:
             raise ElementoNaoEncontrado("Erro ao preencher ou localizar o campo de busca.")
         
         # Submete a busca, aplicando filtro social se solicitado
         try:
-            if aplicar_filtro_social:
-                await asyncio.sleep(5)
-                await self.page.get_by_role("button", name="Refine a Busca").click()
-                await asyncio.sleep(5)
-                await self.page.click('label[for="beneficiarioProgramaSocial"]')
-                await asyncio.sleep(5)
-                await self.page.click("#btnConsultarPF")
-            else:
-                await self.page.locator(".busca-indice").locator("[type=submit]").click()
-            await asyncio.sleep(5)
+            async with etapa("envio_busca", filtro_social=aplicar_filtro_social):
+                if aplicar_filtro_social:
+                    await self.__clicar__(self.page.get_by_role("button", name="Refine a Busca"), "refinar busca")
+                    await self.__clicar__(self.page.locator('label[for="beneficiarioProgramaSocial"]'), "filtro social")
+                    botao_consultar = self.page.locator("#btnConsultarPF")
+                else:
+                    botao_consultar = self.page.locator(".busca-indice").locator("[type=submit]")
+                await self.__clicar_e_aguardar_resultados__(botao_consultar, "envio da busca")
+        except TempoLimiteExcedido:
+            raise
         except Exception:
             raise TempoLimiteExcedido("A ação de busca excedeu o tempo esperado.")
 
-        url_resultado = None
-        avancos_proxima_pagina_cont = 0
-
-        # Caso a busca seja por nome, realiza paginação e busca exata pelo nome
-        if search_data["tipo"] == "nome":
-            avancar_para_proxima_pagina = True
+    async def buscar_pessoa_fisica(self, search_data, aplicar_filtro_social):
+        """
+        Realiza a busca da pessoa física no Portal da Transparência com base no identificador recebido.
 
-            while avancar_para_proxima_pagina == True:
-                listitem = self.page.locator("#resultados").get_by_role("listitem") 
-                listitem_count = await listitem.count()
+        Parâmetros:
+        - search_data (dict): dict com "identificador" e "tipo" (nome ou nis/cpf).
+        - aplicar_filtro_social (bool): se deve aplicar filtro para beneficiários de programa social.
 
-                for i in range(listitem_count):
-                    item = listitem.nth(i)
-                    link = await item.locator("a").get_attribute("href")
-                    nome = await item.locator(".link-busca-nome").inner_html()
-                    url_resultado = (f'{URL_BASE_PORTAL_TRANSPARENCIA}{link}')
+        Retorna:
+        - URL da página da pessoa física encontrada.
+        """
 
-                    if aplicar_filtro_social == True and search_data["identificador"].lower().strip() in nome.lower().strip():
-                        return url_resultado
+        # Com a sessão aquecida (cookies já aceitos), acessa diretamente a lista de resultados da busca.
+        # Se não for possível, realiza o fluxo completo pela página de visão geral
+        if not (self.sessao_aquecida and await self.__buscar_pela_url__(search_data, aplicar_filtro_social)):
+            await self.__buscar_pelo_formulario__(search_data, aplicar_filtro_social)
 
-                    # Se encontrar nome exatamente igual ao pesquisado, captura a URL resultado e a retorna
-                    if nome.lower().strip() == search_data["identificador"].lower().strip():
-                        return url_resultado
+        url_resultado = None
 
-                avancar_para_proxima_pagina = True
-    
-                # Verifica se existe botão "próxima" e se paginações não excederam o limite de avanços definido (2)
-                # Este limite foi definido para evitar buscas muito longas
-                next_button = self.page.locator("#paginacao").locator('.pagination li[class$="next"]')
-
-                if avancos_proxima_pagina_cont > 2 \
-                    or await next_button.count() == 0 \
-                    or await self.page.locator("#boxPaginacaoBuscaLista").get_attribute("style") == "display: none;":
-                    avancar_para_proxima_pagina = False
-    
-                if avancar_para_proxima_pagina == True:
-                    await self.page.get_by_text("Próxima").click()
-                    await asyncio.sleep(10)
-                    avancos_proxima_pagina_cont = avancos_proxima_pagina_cont + 1
-                else:
-                    raise NomeNaoEncontrado(f"Foram encontrados 0 resultados para o termo {search_data["identificador"]}")
+        # Caso a busca seja por nome, classifica os resultados pela semelhança com o nome pesquisado
+        if search_data["tipo"] == "nome":
+            return await self.__buscar_melhor_nome__(search_data, aplicar_filtro_social)
 
         # Caso a busca seja por CPF ou NIS, tenta localizar diretamente
-        listitem = self.page.locator("#resultados").get_by_role("listitem") 
-        listitem_count = await listitem.count()
+        itens = await extrair_resultados_busca(self.page.locator("#resultados").get_by_role("listitem"))
 
-        for i in range(listitem_count):
-            item = listitem.nth(i)
-            link = await item.locator("a").get_attribute("href")
-            nome = await item.locator(".link-busca-nome").inner_html()
-            url_resultado = f'{URL_BASE_PORTAL_TRANSPARENCIA}{link}'
+        for item in itens:
+            url_resultado = f'{URL_BASE_PORTAL_TRANSPARENCIA}{item["link"]}'
 
         if url_resultado is None:
             raise CPFouNISNaoEncontrado(f"Não foi possível retornar os dados no tempo de resposta solicitado")
         return url_resultado
     
-    async def coletar_dados_pessoa_fisica(self, url_pagina_pessoa_encontrada):
+    async def __buscar_melhor_nome__(self, search_data, aplicar_filtro_social):
+        """
+        Localiza, nas páginas da lista de resultados, o nome pesquisado.
+
+        Funcionamento:
+        - Verifica os nomes da primeira página, já carregada (ver _nome_corresponde): somente um nome igual ao
+          pesquisado (ou, com filtro social, que o contém) é aceito.
+        - Se nenhum corresponder e houver mais páginas, carrega as páginas seguintes (até BUSCA_NOME_MAX_PAGINAS)
+          em paralelo pela URL da lista, em novas páginas do mesmo contexto, e interrompe as restantes assim
+          que um nome corresponder.
+        - Entre os nomes que correspondem, prefere o nome igual e, em seguida, o que aparece primeiro na lista.
+
+        Os candidatos (o escolhido primeiro, seguido dos mais semelhantes, ver _pontuar_nome) ficam disponíveis
+        em `self.candidatos_nome`.
+
+        Retorna:
+        - URL da página da pessoa física encontrada.
+
+        Levanta:
+        - NomeNaoEncontrado se nenhum nome corresponder, com os nomes mais semelhantes em `candidatos`.
+        - O erro de carregamento de uma página de resultados, se nenhum nome corresponder.
+        """
+        identificador = search_data["identificador"]
+        candidatos = {}
+
+        def pontuar(itens, numero_pagina):
+            for posicao, item in enumerate(itens):
+                url = f'{URL_BASE_PORTAL_TRANSPARENCIA}{item["link"]}'
+                if not item["link"] or url in candidatos:
+                    continue
+                candidatos[url] = {
+                    "nome": (item["nome"] or "").strip(),
+                    "pontuacao": _pontuar_nome(identificador, item["nome"]),
+                    "corresponde": _nome_corresponde(identificador, item["nome"], aceitar_contido=aplicar_filtro_social),
+                    "url": url,
+                    "ordem": (numero_pagina, posicao),
+                }
+            return any(c["corresponde"] for c in candidatos.values())
+
+        encontrado = pontuar(await extrair_resultados_busca(self.page.locator("#resultados").get_by_role("listitem")), 1)
+
+        next_button = self.page.locator("#paginacao").locator('.pagination li[class$="next"]')
+        ha_mais_paginas = BUSCA_NOME_MAX_PAGINAS > 1 \
+            and await next_button.count() > 0 \
+            and await self.page.locator("#boxPaginacaoBuscaLista").get_attribute("style") != "display: none;"
+
+        erros = []
+        if not encontrado and ha_mais_paginas:
+            semaforo = asyncio.Semaphore(BUSCA_NOME_PAGINAS_SIMULTANEAS)
+
+            async def carregar_pagina(numero_pagina):
+                async with semaforo:
+                    pagina_resultados = PortalPage(await self.page.context.new_page(), self.sessao_aquecida, self.monitor_rede)
+                    try:
+                        async with etapa("paginacao_nomes", pagina=numero_pagina):
+                            await pagina_resultados.__carregar_lista_resultados__(
+                                _url_lista_resultados(identificador, numero_pagina, aplicar_filtro_social),
+                                "paginação dos resultados"
+                            )
+                            itens = await extrair_resultados_busca(
+                                pagina_resultados.page.locator("#resultados").get_by_role("listitem")
+                            )
+                            return itens, numero_pagina
+                    finally:
+                        await pagina_resultados.page.close()
+
+            tarefas = [asyncio.create_task(carregar_pagina(n)) for n in range(2, BUSCA_NOME_MAX_PAGINAS + 1)]
+            try:
+                for proxima in asyncio.as_completed(tarefas):
+                    try:
+                        encontrado = pontuar(*await proxima)
+                    except Exception as e:
+                        erros.append(e)
+                        continue
+                    if encontrado:
+                        break
+            finally:
+                for tarefa in tarefas:
+                    tarefa.cancel()
+                await asyncio.gather(*tarefas, return_exceptions=True)
+
+        ordenados = sorted(candidatos.values(), key=lambda c: (not c["corresponde"], -c["pontuacao"], c["ordem"]))
+        self.candidatos_nome = [
+            {chave: valor for chave, valor in c.items() if chave != "ordem"} for c in ordenados[:QUANTIDADE_CANDIDATOS_NOME]
+        ]
+
+        if self.candidatos_nome and self.candidatos_nome[0]["corresponde"]:
+            return self.candidatos_nome[0]["url"]
+
+        if erros:
+            raise erros[0]
+
+        if not self.candidatos_nome:
+            raise NomeNaoEncontrado(f"Foram encontrados 0 resultados para o termo {identificador}")
+
+        semelhantes = [{"nome": c["nome"], "pontuacao": c["pontuacao"]} for c in self.candidatos_nome]
+        proximos = ", ".join(f'{c["nome"]} ({c["pontuacao"]:.2f})' for c in semelhantes)
+        raise NomeNaoEncontrado(
+            f"Nenhum resultado corresponde ao termo {identificador}. Nomes mais próximos: {proximos}",
+            candidatos=semelhantes
+        )
+
+    def __definir_renderizacao_completa__(self, habilitada):
+        """
+        Habilita ou desabilita o carregamento de todos os recursos (imagens, CSS, fontes) no contexto.
+        """
+        if self.monitor_rede is not None:
+            self.monitor_rede.renderizacao_completa = habilitada
+
+    async def coletar_dados_pessoa_fisica(self, url_pagina_pessoa_encontrada, capturar_screenshot=True,
+                                          formato_screenshot="png", qualidade_screenshot=None, checkpoint=None):
         """
         Coleta os dados detalhados da pessoa física a partir da URL da página.
 
         Parâmetros:
         - url_pagina_pessoa_encontrada (str): URL da página detalhada da pessoa.
+        - capturar_screenshot (bool): se False, a captura de tela não é realizada.
+        - formato_screenshot (str): formato da captura de tela ("png" ou "jpeg").
+        - qualidade_screenshot (int | None): qualidade da captura em jpeg (0-100).
+        - checkpoint (CheckpointConsulta | None): progresso da consulta. As etapas já concluídas em uma
+          tentativa anterior (página da pessoa, benefícios e páginas das tabelas) não são repetidas,
+          e cada etapa concluída agora é registrada.
 
         Retorna:
-        - Tuple (dados_pessoa: dict, screenshot_bytes: bytes) com os dados extraídos e captura de tela.
+        - Tuple (dados_pessoa: dict, screenshot_bytes: bytes | None) com os dados extraídos e captura de tela.
         """
-        try:
-            # Acessa a página detalhada da pessoa física e aguarda o carregamento
-            await asyncio.sleep(10)
-            await self.page.goto(url_pagina_pessoa_encontrada, wait_until="load")
-            await asyncio.sleep(5)
-            
-            dados_pessoa = {}
+        if checkpoint is None:
+            checkpoint = CheckpointConsulta(None, persistir=False)
+
+        if checkpoint.pessoa is None:
+            dados_pessoa, recebimentos, screenshot_bytes = await self.__coletar_pagina_pessoa__(
+                url_pagina_pessoa_encontrada, capturar_screenshot, formato_screenshot, qualidade_screenshot
+            )
+            await checkpoint.registrar_pessoa(dados_pessoa, recebimentos, screenshot_bytes)
+        else:
+            # A página da pessoa já foi coletada em uma tentativa anterior
+            dados_pessoa = copy.deepcopy(checkpoint.pessoa)
+            recebimentos = copy.deepcopy(checkpoint.recebimentos)
+            screenshot_bytes = await checkpoint.screenshot() if capturar_screenshot else None
 
-            strongs = self.page.locator(".dados-tabelados").locator("strong")
-            spans = self.page.locator(".dados-tabelados").locator("span")
+        try:
+            # Coleta os recursos detalhados de todos os recebimentos em paralelo,
+            # cada um em sua própria página do mesmo contexto (evitando o go_back na página da pessoa)
+            semaforo = asyncio.Semaphore(LIMITE_PAGINAS_RECURSOS_SIMULTANEAS)
+
+            async def coletar_recursos(recebimento):
+                recebimento["recursos"] = checkpoint.recursos_concluidos(recebimento["url_recursos"])
+                if recebimento["recursos"] is not None:
+                    return
+
+                async with semaforo:
+                    pagina_recurso = PortalPage(await self.page.context.new_page(), self.sessao_aquecida, self.monitor_rede)
+                    try:
+                        async with etapa("recursos_beneficio", tipo=recebimento["tipo"]):
+                            recebimento["recursos"] = await pagina_recurso.__coletar_recursos_pessoa_fisica__(
+                                recebimento["url_recursos"], checkpoint
+                            )
+                    finally:
+                        await pagina_recurso.page.close()
+
+            resultados = await asyncio.gather(
+                *(coletar_recursos(recebimento) for recebimento in recebimentos),
+                return_exceptions=True
+            )
+
+            for resultado in resultados:
+                if isinstance(resultado, BaseException):
+                    raise resultado
+
+            dados_pessoa["recebimentos"] = [
+                {"tipo": r["tipo"], "valor_recebido": r["valor_recebido"], "recursos": r["recursos"]}
+                for r in recebimentos
+            ]
+            return dados_pessoa, screenshot_bytes
+        except (TempoLimiteExcedido, PortalInacessivel):
+            raise
+        except Exception:
+            raise FalhaAoColetarDados("Erro ao coletar os dados de recebimentos.")
 
-            for i in range(3):
-                strong = strongs.nth(i)
-                span = spans.nth(i)
+    async def __coletar_pagina_pessoa__(self, url_pagina_pessoa_encontrada, capturar_screenshot,
+                                        formato_screenshot, qualidade_screenshot):
+        """
+        Coleta os dados tabelados da página da pessoa, a lista de recebimentos e a captura de tela.
 
-                strong_data = await strong.inner_html()
-                span_data = await span.inner_html()
+        Retorna:
+        - Tuple (dados_pessoa: dict, recebimentos: list, screenshot_bytes: bytes | None), onde cada recebimento
+          possui "tipo", "valor_recebido" e "url_recursos" (página de detalhes do benefício).
+        """
+        # A página da pessoa é a única renderizada por completo, pois é a que aparece na captura de tela
+        self.__definir_renderizacao_completa__(capturar_screenshot)
 
-                dados_pessoa[strong_data.lower()] = span_data.strip()
+        try:
+            # Acessa a página detalhada da pessoa física e aguarda os dados tabelados
+            async with etapa("pagina_pessoa"):
+                await self.__navegar__(url_pagina_pessoa_encontrada, "página da pessoa")
+                await self.__aguardar_elemento__(self.page.locator(".dados-tabelados"), "dados da pessoa")
+
+                dados_pessoa = await extrair_dados_tabelados(self.page.locator(".dados-tabelados"), 3)
+        except TempoLimiteExcedido:
+            self.__definir_renderizacao_completa__(False)
+            raise
         except Exception:
+            self.__definir_renderizacao_completa__(False)
             raise FalhaAoColetarDados("Não foi possível coletar os dados da página da pessoa.")
 
         try:
             # Clica no botão para mostrar recebimentos e aceita cookies do modal
-            await self.page.get_by_role("button", name="Recebimentos de recursos").click()
-            await self.page.locator("#cookiebar-modal-footer-buttons").locator("#accept-all-btn").click()
-            screenshot_bytes = await self.page.screenshot()
+            async with etapa("recebimentos"):
+                await self.__clicar__(self.page.get_by_role("button", name="Recebimentos de recursos"), "recebimentos de recursos")
+                # Com a sessão aquecida o modal de cookies normalmente não é exibido
+                botao_aceite = self.page.locator("#cookiebar-modal-footer-buttons").locator("#accept-all-btn")
+                if not self.sessao_aquecida or await botao_aceite.is_visible():
+                    async with etapa("aceite_cookies"):
+                        await self.__clicar__(botao_aceite, "aceite de cookies")
+                await self.__aguardar_elemento__(self.page.locator(".box-ficha__resultados"), "tabela de recebimentos", estado="attached")
+            screenshot_bytes = None
+            if capturar_screenshot:
+                async with etapa("captura_tela", formato=formato_screenshot):
+                    screenshot_bytes = await self.page.screenshot(type=formato_screenshot, quality=qualidade_screenshot)
+        except TempoLimiteExcedido:
+            raise
         except Exception:
             raise ElementoNaoEncontrado("Erro ao acessar os dados de recebimentos.")
+        finally:
+            self.__definir_renderizacao_completa__(False)
 
         try:
             # Captura os elementos da tabela de recebimentos
             # Cada recebimento tem seu tipo (ex: auxílio brasil, bolsa família)
             recebimentos_elements = self.page.locator(".box-ficha__resultados").locator(".br-table")
-            count_recebimentos_elements = await recebimentos_elements.count()
             recebimentos = []
 
-            for i in range(count_recebimentos_elements):
-                elemento = recebimentos_elements.nth(i)
-                tipo = (await elemento.locator("strong").inner_html()).lower()
-                valor_recebido = await elemento.locator("tbody >> td:nth-child(4)").inner_html()
+            for elemento in await extrair_recebimentos(recebimentos_elements):
+                tipo = elemento["tipo"].lower()
+                valor_recebido = elemento["valor_recebido"]
 
                 # Ignora tipos de recebimento não permitidos conforme configuração
                 if not any(tipo_permitido in tipo for tipo_permitido in TIPOS_RECEBIMENTO_PERMITIDOS):
                     continue
 
-                recebimento = {
+                recebimentos.append({
                     "tipo": tipo,
-                    "valor_recebido": valor_recebido.strip().replace("R$ ", "").replace(".", "")
-                }
-
-                recursos_path = await elemento.locator("a").get_attribute("href")
-                recursos_url = f"{URL_BASE_PORTAL_TRANSPARENCIA}{recursos_path}"
-
-                # Coleta recursos detalhados para cada recebimento
-                recebimento["recursos"] = await self.__coletar_recursos_pessoa_fisica__(recursos_url)
-                recebimentos.append(recebimento)
-
-                # Volta para página anterior e aguarda
-                #
-                # Isso deve ser feito, pois a função __coletar_recursos_pessoa_fisica__ acessa a página do recurso 
-                # para coletar os recebimentos. Portanto, é necessário voltar para a página anterior para acessar os próximos recursos
-                await self.page.go_back()
-                await asyncio.sleep(15)
+                    "valor_recebido": valor_recebido.strip().replace("R$ ", "").replace(".", ""),
+                    "url_recursos": f"{URL_BASE_PORTAL_TRANSPARENCIA}{elemento['link']}",
+                })
 
-            dados_pessoa["recebimentos"] = recebimentos
-            return dados_pessoa, screenshot_bytes
+            return dados_pessoa, recebimentos, screenshot_bytes
         except Exception:
             raise FalhaAoColetarDados("Erro ao coletar os dados de recebimentos.")
-    
-    async def __coletar_recursos_pessoa_fisica__(self, recurso_url):
+
+    async def __coletar_recursos_pessoa_fisica__(self, recurso_url, checkpoint=None):
         """
         Coleta detalhes dos recursos financeiros a partir da URL de recurso.
 
         Parâmetros:
         - recurso_url (str): URL da página de detalhes do recurso.
+        - checkpoint (CheckpointConsulta | None): progresso da consulta. Tabelas já concluídas não são
+          coletadas novamente, e uma tabela interrompida é retomada após a última página registrada.
 
         Retorna:
         - lista com tabelas de dados detalhados de recursos.
+
+        Se houver histórico do benefício (ver HistoricoRecursos), cada tabela é percorrida somente até a
+        primeira página com uma linha já conhecida, e as linhas coletadas são mescladas às conhecidas.
         """
+        if checkpoint is None:
+            checkpoint = CheckpointConsulta(None, persistir=False)
+
+        historico = await historico_recursos.obter(recurso_url)
+        tabelas_registradas = checkpoint.tabelas(recurso_url)
+        self.requisicoes_tabelas = []
+        self.page.on("response", self.__registrar_requisicao_tabela__)
+
         try:
-            await asyncio.sleep(10)
-            await self.page.goto(recurso_url, wait_until="load")
-            await asyncio.sleep(5)
+            await self.__navegar__(recurso_url, "página de detalhes do recurso")
+            await self.__aguardar_elemento__(self.page.locator(".dados-detalhados"), "tabelas de recursos", estado="attached")
+        except TempoLimiteExcedido:
+            raise
         except Exception:
             raise PortalInacessivel("Erro ao acessar página de detalhes do recurso.")
 
         recursos_totais = []
+        cabecalhos = []
         try:
             dados_detalhados_list = self.page.locator(".dados-detalhados")
             dados_detalhados_list_count = await dados_detalhados_list.count()
 
             # Para cada seção de dados detalhados (tabelas)
             for i in range(dados_detalhados_list_count):
+                tabela_registrada = tabelas_registradas[i] if i < len(tabelas_registradas) else None
+
+                # Tabela concluída em uma tentativa anterior
+                if tabela_registrada and tabela_registrada["completa"]:
+                    recursos_totais.append(tabela_registrada["linhas"])
+                    cabecalhos.append(tabela_registrada["cabecalho"])
+                    continue
+
                 dados_detalhados = dados_detalhados_list.nth(i)
                 recursos = []
                 cabecalho = []
@@ -233,40 +769,65 @@ class PortalPage:
 
                 # Se não for a primeira tabela, expande a seção clicando
                 # (Somente a primeira tabela é inicializada expandida)
+                requisicoes_anteriores = 0 if i == 0 else len(self.requisicoes_tabelas)
                 if i != 0:
-                    await dados_detalhados.click()
-                    await asyncio.sleep(5)
+                    await self.__clicar__(dados_detalhados, "expansão da tabela de recursos")
+
+                await self.__aguardar_elemento__(dados_detalhados.get_by_role("row"), "linhas da tabela de recursos")
+
+                # Requisição que carregou esta tabela (usada no modo rápido)
+                novas_requisicoes = self.requisicoes_tabelas[requisicoes_anteriores:]
+                requisicao_tabela = novas_requisicoes[0] if novas_requisicoes else None
+                primeira_pagina = True
+                paginas = 0
+                linhas_conhecidas = []
+                chaves_conhecidas = set()
             
                 # Loop para paginação dos dados detalhados
                 while tem_proxima_pagina == True:
-                    rows_list = dados_detalhados.get_by_role("row")
-                    recursos_count = await rows_list.count()
-                    
+                    # Extrai o cabeçalho e todas as linhas da página atual em uma única chamada
+                    cabecalho_pagina, recursos_pagina = await extrair_tabela(dados_detalhados)
+                    paginas += 1
+
                     # Incluir o cabeçalho na primeira passagem pelas páginas da tabela
                     if len(recursos) == 0:
-                        row = rows_list.nth(0)
-                        ths = row.locator("th")
-                        count_ths = await ths.count()
-                        cabecalho = []
-
-                        for i in range(count_ths):
-                            campo_cabecalho = await ths.nth(i).inner_html()
-                            cabecalho.append(unidecode(campo_cabecalho.lower().replace(" ", "_").replace("_(r$)", "")))
-
-                    # Coleta dados de cada linha (exceto cabeçalho)
-                    for i in range(1, recursos_count):
-                        row = rows_list.nth(i)
-                        spans = row.locator("span")
-                        recurso = {}
-
-                        count_span = await spans.count()
-                
-                        for j in range(count_span):
-                            span = spans.nth(j)
-                            data = await span.inner_html()
-                            recurso[cabecalho[j]] = data
-
-                        recursos.append(recurso)
+                        cabecalho = cabecalho_pagina
+
+                    if primeira_pagina:
+                        linhas_conhecidas = historico_recursos.linhas_conhecidas(historico, i, cabecalho)
+                        chaves_conhecidas = {chave_linha(linha) for linha in linhas_conhecidas}
+
+                    recursos.extend(recursos_pagina)
+
+                    # No modo rápido, busca as demais páginas diretamente da requisição JSON da tabela
+                    if primeira_pagina and MODO_RAPIDO_RECURSOS and requisicao_tabela:
+                        async with etapa("tabela_recursos_via_http"):
+                            recursos_http = await self.__coletar_tabela_via_http__(
+                                requisicao_tabela, cabecalho, recursos, chaves_conhecidas
+                            )
+                        if recursos_http is not None:
+                            recursos = recursos_http
+                            break
+
+                    # Coleta incremental: as páginas seguintes contêm somente linhas já conhecidas
+                    if chaves_conhecidas and any(chave_linha(recurso) in chaves_conhecidas for recurso in recursos_pagina):
+                        break
+
+                    # Retomada: avança, sem extrair, até a última página registrada em uma tentativa anterior
+                    if primeira_pagina and tabela_registrada and tabela_registrada["cabecalho"] == cabecalho \
+                            and tabela_registrada["paginas"] > 1:
+                        recursos = list(tabela_registrada["linhas"])
+                        while paginas < tabela_registrada["paginas"]:
+                            async with etapa("pagina_tabela_recursos", tabela=i):
+                                await self.__clicar_e_aguardar_mudanca_tabela__(
+                                    dados_detalhados,
+                                    dados_detalhados.locator('.box-paginacao li[id$="_next"]'),
+                                    "paginação da tabela de recursos"
+                                )
+                            paginas += 1
+                    primeira_pagina = False
+
+                    await checkpoint.registrar_tabela(recurso_url, i, cabecalho, recursos, paginas)
 
                     # Verifica se botão "próxima" está desabilitado (fim da paginação)
                     next_button = dados_detalhados.locator('.box-paginacao li[id$="_next"][class$="disabled"]')
@@ -274,12 +835,30 @@ class PortalPage:
                     if await next_button.count() > 0:
                         tem_proxima_pagina = False
                     else:
-                        # Clica no botão "próxima" e aguarda carregamento da nova página
-                        await dados_detalhados.locator('.box-paginacao li[id$="_next"]').click()
-                        await asyncio.sleep(5)
+                        # Clica no botão "próxima" e aguarda as linhas da nova página
+                        async with etapa("pagina_tabela_recursos", tabela=i):
+                            await self.__clicar_e_aguardar_mudanca_tabela__(
+                                dados_detalhados,
+                                dados_detalhados.locator('.box-paginacao li[id$="_next"]'),
+                                "paginação da tabela de recursos"
+                            )
                         tem_proxima_pagina = True
 
+                if linhas_conhecidas:
+                    coletadas = {chave_linha(recurso) for recurso in recursos}
+                    historico_recursos.linhas_reaproveitadas += sum(
+                        1 for linha in linhas_conhecidas if chave_linha(linha) not in coletadas
+                    )
+                    recursos = mesclar_linhas(recursos, linhas_conhecidas)
+
+                await checkpoint.registrar_tabela(recurso_url, i, cabecalho, recursos, paginas, completa=True)
                 recursos_totais.append(recursos)
+                cabecalhos.append(cabecalho)
+
+            await historico_recursos.salvar(recurso_url, cabecalhos, recursos_totais, historico)
+            await checkpoint.registrar_beneficio_concluido(recurso_url, cabecalhos, recursos_totais)
             return recursos_totais
+        except TempoLimiteExcedido:
+            raise
         except Exception:
-            raise FalhaAoColetarDados("Erro ao coletar os recursos detalhados.")
\ No newline at end of file
+            raise FalhaAoColetarDados("Erro ao coletar os recursos detalhados.")
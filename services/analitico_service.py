@@ -0,0 +1,412 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from decimal import Decimal, InvalidOperation
+
+from config.configuracoes import configuracoes
+
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+ANALITICO_ATIVO = configuracoes.analitico_ativo
+ANALITICO_BACKEND = configuracoes.analitico_backend
+PATH_BANCO_ANALITICO = configuracoes.path_banco_analitico
+
+# Colunas das tabelas de recursos (nomes normalizados, ver normalizar_cabecalho) armazenadas em colunas próprias.
+# As demais colunas (ex: parcela, observação) são armazenadas em "outros", como JSON.
+COLUNAS_MES = ("mes_folha", "mes_disponibilizacao", "mes_de_disponibilizacao", "mes_competencia", "mes")
+COLUNAS_VALOR = ("valor", "valor_parcela", "valor_recebido")
+
+# Agrupamentos aceitos na consulta agregada e a coluna correspondente
+AGRUPAMENTOS = {
+    "mes": "mes",
+    "tipo": "tipo",
+    "uf": "uf",
+    "municipio": "municipio",
+    "cpf_fragmento": "cpf_fragmento",
+}
+
+ESQUEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS pessoas (
+        chave_pessoa TEXT PRIMARY KEY,
+        nome TEXT,
+        cpf_fragmento TEXT,
+        localidade TEXT,
+        coletado_em DOUBLE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recebimentos (
+        chave_pessoa TEXT NOT NULL,
+        cpf_fragmento TEXT,
+        tipo TEXT,
+        valor_centavos BIGINT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recursos (
+        chave_pessoa TEXT NOT NULL,
+        cpf_fragmento TEXT,
+        tipo TEXT,
+        tabela INTEGER,
+        mes DATE,
+        mes_referencia DATE,
+        uf TEXT,
+        municipio TEXT,
+        valor_centavos BIGINT,
+        outros TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_recebimentos_pessoa ON recebimentos (chave_pessoa)",
+    "CREATE INDEX IF NOT EXISTS idx_recursos_pessoa ON recursos (chave_pessoa)",
+    "CREATE INDEX IF NOT EXISTS idx_recursos_cpf ON recursos (cpf_fragmento)",
+    "CREATE INDEX IF NOT EXISTS idx_recursos_tipo_mes ON recursos (tipo, mes)",
+    "CREATE INDEX IF NOT EXISTS idx_recursos_mes ON recursos (mes)",
+)
+
+
+def converter_valor(texto):
+    """
+    Converte um valor monetário no formato brasileiro (ex: "R$ 1.234,56", "15000,00") em Decimal.
+
+    Retorna:
+    - Decimal com duas casas, ou None se o texto estiver vazio ou não for um valor.
+    """
+    texto = (texto or "").replace("R$", "").replace("\xa0", "").replace(" ", "").strip()
+
+    if not texto:
+        return None
+
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+
+    try:
+        return Decimal(texto).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+
+def converter_mes(texto):
+    """
+    Converte uma data do portal ("MM/AAAA" ou "DD/MM/AAAA") em data ISO (o dia 1 para meses).
+
+    Retorna:
+    - str "AAAA-MM-DD", ou None se o texto não for uma data.
+    """
+    partes = re.findall(r"\d+", texto or "")
+
+    if len(partes) == 2 and len(partes[1]) == 4:
+        dia, mes, ano = 1, int(partes[0]), int(partes[1])
+    elif len(partes) == 3 and len(partes[2]) == 4:
+        dia, mes, ano = int(partes[0]), int(partes[1]), int(partes[2])
+    else:
+        return None
+
+    if not 1 <= mes <= 12 or not 1 <= dia <= 31:
+        return None
+
+    return f"{ano:04d}-{mes:02d}-{dia:02d}"
+
+
+def centavos(valor):
+    return int(valor * 100) if valor is not None else None
+
+
+def fragmento_cpf(cpf):
+    """
+    Retorna os dígitos visíveis do CPF mascarado pelo portal (ex: "***.123.456-**" -> "123456").
+    """
+    return re.sub(r"\D", "", (cpf or "")[3:11])
+
+
+def chave_pessoa(dados_pessoa):
+    """
+    Identifica a pessoa como o diretório em que seus dados são salvos ({nome}{fragmento do CPF}).
+    """
+    nome_normalizado = dados_pessoa["nome"].lower().replace(" ", "_")
+    cpf_fragmento_normalizado = dados_pessoa["cpf"][3:11].replace(".", "_")
+    return f"{nome_normalizado}{cpf_fragmento_normalizado}"
+
+
+def _primeira_coluna(linha, nomes):
+    for nome in nomes:
+        if nome in linha:
+            return nome
+    return None
+
+
+def linhas_recursos(chave, cpf_fragmento, tipo, indice_tabela, linhas):
+    """
+    Normaliza as linhas de uma tabela de recursos nas colunas da tabela `recursos`.
+    """
+    normalizadas = []
+
+    for linha in linhas:
+        coluna_mes = _primeira_coluna(linha, COLUNAS_MES)
+        coluna_valor = _primeira_coluna(linha, COLUNAS_VALOR)
+        tipadas = {coluna_mes, coluna_valor, "mes_referencia", "uf", "municipio"}
+        outros = {coluna: valor for coluna, valor in linha.items() if coluna not in tipadas}
+
+        normalizadas.append((
+            chave,
+            cpf_fragmento,
+            tipo,
+            indice_tabela,
+            converter_mes(linha.get(coluna_mes)) if coluna_mes else None,
+            converter_mes(linha.get("mes_referencia")),
+            (linha.get("uf") or "").strip() or None,
+            (linha.get("municipio") or "").strip() or None,
+            centavos(converter_valor(linha.get(coluna_valor))) if coluna_valor else None,
+            json.dumps(outros, ensure_ascii=False) if outros else None,
+        ))
+
+    return normalizadas
+
+
+def _valor_saida(coluna, valor):
+    if coluna == "mes" and valor is not None:
+        return str(valor)[:7]
+    return valor
+
+
+class RepositorioAnalitico:
+    """
+    Base analítica com as linhas de recebimentos e recursos de todas as pessoas consultadas, em colunas tipadas:
+    valores em centavos (inteiros, sem perda de precisão), meses como datas e as demais colunas normalizadas.
+
+    Funcionamento:
+    - Cada consulta concluída substitui as linhas da pessoa (a ingestão é idempotente).
+    - O backend padrão é SQLite, com índices por fragmento do CPF, tipo de benefício e mês.
+    - Com ANALITICO_BACKEND=duckdb as agregações usam o motor colunar e vetorizado do DuckDB, e a base pode
+      ser exportada em arquivos Parquet particionados. O DuckDB admite um único processo escrevendo no arquivo,
+      portanto não deve ser usado com workers (FILA_BACKEND=redis) em processos separados.
+    """
+
+    def __init__(self, caminho_banco=None, backend=ANALITICO_BACKEND, ativo=ANALITICO_ATIVO):
+        extensao = "duckdb" if backend == "duckdb" else "db"
+        self.caminho_banco = caminho_banco or PATH_BANCO_ANALITICO or os.path.join(
+            PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", f"analitico.{extensao}"
+        )
+        self.backend = backend
+        self.ativo = ativo
+        self.pessoas_ingeridas = 0
+        self.linhas_ingeridas = 0
+        self._lock = threading.Lock()
+        self._conexao = None
+
+    def _conectar(self):
+        if self._conexao is not None:
+            return self._conexao
+
+        os.makedirs(os.path.dirname(self.caminho_banco) or ".", exist_ok=True)
+
+        if self.backend == "duckdb":
+            import duckdb
+            self._conexao = duckdb.connect(self.caminho_banco)
+        else:
+            self._conexao = sqlite3.connect(self.caminho_banco, check_same_thread=False, isolation_level=None)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+
+        for comando in ESQUEMA:
+            self._conexao.execute(comando)
+
+        return self._conexao
+
+    def fechar(self):
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+    def ingerir_sincrono(self, dados_pessoa):
+        """
+        Substitui na base as linhas de uma pessoa pelas de uma consulta concluída.
+
+        Retorna:
+        - int com a quantidade de linhas de recursos ingeridas.
+        """
+        chave = chave_pessoa(dados_pessoa)
+        cpf_fragmento = fragmento_cpf(dados_pessoa["cpf"])
+        recebimentos = []
+        recursos = []
+
+        for recebimento in dados_pessoa.get("recebimentos", []):
+            tipo = recebimento["tipo"].strip().lower()
+            recebimentos.append(
+                (chave, cpf_fragmento, tipo, centavos(converter_valor(recebimento["valor_recebido"])))
+            )
+            for indice_tabela, linhas in enumerate(recebimento.get("recursos") or []):
+                recursos.extend(linhas_recursos(chave, cpf_fragmento, tipo, indice_tabela, linhas))
+
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute("BEGIN TRANSACTION")
+            try:
+                for tabela in ("pessoas", "recebimentos", "recursos"):
+                    conexao.execute(f"DELETE FROM {tabela} WHERE chave_pessoa = ?", (chave,))
+
+                conexao.execute(
+                    "INSERT INTO pessoas VALUES (?, ?, ?, ?, ?)",
+                    (chave, dados_pessoa["nome"], cpf_fragmento, dados_pessoa.get("localidade"), time.time())
+                )
+                if recebimentos:
+                    conexao.executemany("INSERT INTO recebimentos VALUES (?, ?, ?, ?)", recebimentos)
+                if recursos:
+                    conexao.executemany("INSERT INTO recursos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", recursos)
+                conexao.execute("COMMIT")
+            except Exception:
+                conexao.execute("ROLLBACK")
+                raise
+
+        self.pessoas_ingeridas += 1
+        self.linhas_ingeridas += len(recursos)
+        return len(recursos)
+
+    async def ingerir(self, dados_pessoa):
+        """
+        Ingere os dados de uma consulta concluída. Falhas na ingestão são registradas e não afetam a consulta.
+        """
+        if not self.ativo:
+            return
+
+        try:
+            await asyncio.to_thread(self.ingerir_sincrono, dados_pessoa)
+        except Exception as e:
+            print(f"Falha ao ingerir os dados de {dados_pessoa.get('nome')} na base analítica: {e}")
+
+    def importar_diretorio(self, diretorio=None):
+        """
+        Ingere os arquivos dados.json já salvos no caminho base (um diretório por pessoa).
+
+        Retorna:
+        - Tuple (pessoas, linhas) com as quantidades ingeridas.
+        """
+        diretorio = diretorio or PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data"
+        pessoas = 0
+        linhas = 0
+
+        for caminho in sorted(glob.glob(os.path.join(diretorio, "*", "dados.json"))):
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    dados_pessoa = json.load(f)
+                linhas += self.ingerir_sincrono(dados_pessoa)
+                pessoas += 1
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Arquivo ignorado ({caminho}): {e}")
+
+        return pessoas, linhas
+
+    def agregar_sincrono(self, agrupar_por=("mes",), tipo=None, uf=None, municipio=None, cpf_fragmento=None,
+                         mes_inicio=None, mes_fim=None):
+        """
+        Soma os valores das linhas de recursos agrupados pelas colunas informadas.
+
+        Parâmetros:
+        - agrupar_por (list): colunas de agrupamento (ver AGRUPAMENTOS).
+        - tipo, uf, municipio, cpf_fragmento (str | None): filtros por igualdade.
+        - mes_inicio, mes_fim (str | None): intervalo de meses ("AAAA-MM"), inclusivo.
+
+        Levanta:
+        - ValueError: se alguma coluna de agrupamento não for aceita.
+
+        Retorna:
+        - lista de dicts com as colunas de agrupamento, "parcelas", "pessoas" e "total" (str decimal).
+        """
+        colunas = []
+        for nome in agrupar_por:
+            if nome not in AGRUPAMENTOS:
+                raise ValueError(f"Agrupamento não suportado: {nome}. Use: {', '.join(AGRUPAMENTOS)}.")
+            if AGRUPAMENTOS[nome] not in colunas:
+                colunas.append(AGRUPAMENTOS[nome])
+
+        condicoes = []
+        parametros = []
+        for coluna, valor in (("tipo", tipo.strip().lower() if tipo else None), ("uf", uf),
+                              ("municipio", municipio), ("cpf_fragmento", re.sub(r"\D", "", cpf_fragmento or ""))):
+            if valor:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(valor)
+        if mes_inicio:
+            condicoes.append("mes >= ?")
+            parametros.append(f"{mes_inicio}-01")
+        if mes_fim:
+            ano, mes = (int(parte) for parte in mes_fim.split("-"))
+            condicoes.append("mes < ?")
+            parametros.append(f"{ano + mes // 12:04d}-{mes % 12 + 1:02d}-01")
+
+        selecao = ", ".join(colunas)
+        sql = (
+            f"SELECT {selecao + ', ' if selecao else ''}COUNT(*), COUNT(DISTINCT chave_pessoa), SUM(valor_centavos) "
+            "FROM recursos"
+            + (f" WHERE {' AND '.join(condicoes)}" if condicoes else "")
+            + (f" GROUP BY {selecao} ORDER BY {selecao}" if selecao else "")
+        )
+
+        with self._lock:
+            linhas = self._conectar().execute(sql, parametros).fetchall()
+
+        resultado = []
+        for linha in linhas:
+            grupo = {coluna: _valor_saida(coluna, valor) for coluna, valor in zip(colunas, linha)}
+            parcelas, pessoas, total_centavos = linha[len(colunas):]
+            grupo["parcelas"] = parcelas
+            grupo["pessoas"] = pessoas
+            grupo["total"] = str(Decimal(total_centavos).scaleb(-2)) if total_centavos is not None else None
+            resultado.append(grupo)
+
+        return resultado
+
+    async def agregar(self, **filtros):
+        return await asyncio.to_thread(self.agregar_sincrono, **filtros)
+
+    def exportar_parquet(self, diretorio):
+        """
+        Exporta as linhas de recursos em arquivos Parquet particionados por tipo de benefício e ano.
+
+        Levanta:
+        - RuntimeError: se o backend não for DuckDB.
+        """
+        if self.backend != "duckdb":
+            raise RuntimeError("A exportação em Parquet requer ANALITICO_BACKEND=duckdb.")
+
+        caminho = diretorio.replace("'", "''")
+        with self._lock:
+            self._conectar().execute(
+                "COPY (SELECT *, year(mes) AS ano FROM recursos) "
+                f"TO '{caminho}' (FORMAT PARQUET, PARTITION_BY (tipo, ano), OVERWRITE_OR_IGNORE)"
+            )
+
+    def estatisticas(self):
+        return {
+            "ativo": self.ativo,
+            "backend": self.backend,
+            "pessoas_ingeridas": self.pessoas_ingeridas,
+            "linhas_ingeridas": self.linhas_ingeridas,
+        }
+
+
+repositorio_analitico = RepositorioAnalitico()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa os dados já coletados para a base analítica.")
+    parser.add_argument("--diretorio", default=None, help="Diretório com as pastas das pessoas (padrão: caminho base)")
+    parser.add_argument("--exportar-parquet", default=None, help="Diretório de saída dos arquivos Parquet (requer duckdb)")
+    argumentos = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total_pessoas, total_linhas = repositorio_analitico.importar_diretorio(argumentos.diretorio)
+    print(f"{total_pessoas} pessoas e {total_linhas} linhas de recursos importadas em {time.perf_counter() - inicio:.1f} s "
+          f"para {repositorio_analitico.caminho_banco}")
+
+    if argumentos.exportar_parquet:
+        repositorio_analitico.exportar_parquet(argumentos.exportar_parquet)
+        print(f"Recursos exportados em {argumentos.exportar_parquet}")
+
+    repositorio_analitico.fechar()
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+
+from config.configuracoes import configuracoes
+
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+ARMAZENAMENTO_BACKEND = configuracoes.armazenamento_backend
+S3_BUCKET = configuracoes.s3_bucket
+S3_ENDPOINT_URL = configuracoes.s3_endpoint_url
+S3_PREFIXO = configuracoes.s3_prefixo
+SCREENSHOT_FORMATO = configuracoes.screenshot_formato
+SCREENSHOT_QUALIDADE = configuracoes.screenshot_qualidade
+
+TIPOS_CONTEUDO = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "json": "application/json",
+}
+
+PADRAO_ID_ARTEFATO = re.compile(r"^[0-9a-f]{64}\.(png|jpeg|webp|json)$")
+TAMANHO_BLOCO_LEITURA = 64 * 1024
+
+
+def id_artefato(conteudo, extensao):
+    """
+    Gera o identificador endereçado por conteúdo de um artefato (sha256 + extensão).
+    """
+    return f"{hashlib.sha256(conteudo).hexdigest()}.{extensao}"
+
+
+def tipo_conteudo_artefato(id_artefato):
+    return TIPOS_CONTEUDO[id_artefato.rsplit(".", 1)[1]]
+
+
+def id_artefato_valido(id_artefato):
+    return PADRAO_ID_ARTEFATO.match(id_artefato) is not None
+
+
+class ArmazenamentoLocal:
+    """
+    Armazena os artefatos no sistema de arquivos local, um arquivo por conteúdo.
+    """
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "artefatos")
+
+    def _caminho(self, id_artefato):
+        # Subdiretório com os dois primeiros caracteres do hash para não concentrar milhares de arquivos em um diretório
+        return os.path.join(self.diretorio, id_artefato[:2], id_artefato)
+
+    def _salvar(self, id_artefato, conteudo):
+        caminho = self._caminho(id_artefato)
+
+        if os.path.exists(caminho):
+            return
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        caminho_temporario = f"{caminho}.tmp"
+
+        with open(caminho_temporario, "wb") as f:
+            f.write(conteudo)
+
+        os.replace(caminho_temporario, caminho)
+
+    async def salvar(self, conteudo, extensao):
+        id_novo = id_artefato(conteudo, extensao)
+        await asyncio.to_thread(self._salvar, id_novo, conteudo)
+        return id_novo
+
+    async def existe(self, id_artefato):
+        return await asyncio.to_thread(os.path.exists, self._caminho(id_artefato))
+
+    async def ler_em_blocos(self, id_artefato):
+        """
+        Lê o artefato em blocos, sem carregar o arquivo inteiro em memória.
+        """
+        with open(self._caminho(id_artefato), "rb") as f:
+            while True:
+                bloco = await asyncio.to_thread(f.read, TAMANHO_BLOCO_LEITURA)
+                if not bloco:
+                    break
+                yield bloco
+
+
+class ArmazenamentoS3:
+    """
+    Armazena os artefatos em um bucket S3 ou compatível (ex: MinIO), um objeto por conteúdo.
+
+    Requer o pacote opcional `boto3`. As credenciais seguem a configuração padrão do boto3
+    (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY...).
+    """
+
+    def __init__(self, bucket=S3_BUCKET, endpoint_url=S3_ENDPOINT_URL, prefixo=S3_PREFIXO):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("O backend de armazenamento S3 requer o pacote boto3 (pip install boto3).")
+
+        if not bucket:
+            raise RuntimeError("Informe o bucket do backend de armazenamento S3 (S3_BUCKET).")
+
+        self.bucket = bucket
+        self.prefixo = prefixo
+        self._cliente = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _chave(self, id_artefato):
+        return f"{self.prefixo}{id_artefato}"
+
+    def _existe(self, id_artefato):
+        try:
+            self._cliente.head_object(Bucket=self.bucket, Key=self._chave(id_artefato))
+            return True
+        except self._cliente.exceptions.ClientError:
+            return False
+
+    def _salvar(self, id_artefato, conteudo):
+        if self._existe(id_artefato):
+            return
+
+        self._cliente.put_object(
+            Bucket=self.bucket,
+            Key=self._chave(id_artefato),
+            Body=conteudo,
+            ContentType=tipo_conteudo_artefato(id_artefato),
+        )
+
+    async def salvar(self, conteudo, extensao):
+        id_novo = id_artefato(conteudo, extensao)
+        await asyncio.to_thread(self._salvar, id_novo, conteudo)
+        return id_novo
+
+    async def existe(self, id_artefato):
+        return await asyncio.to_thread(self._existe, id_artefato)
+
+    async def ler_em_blocos(self, id_artefato):
+        resposta = await asyncio.to_thread(
+            self._cliente.get_object, Bucket=self.bucket, Key=self._chave(id_artefato)
+        )
+        corpo = resposta["Body"]
+        try:
+            while True:
+                bloco = await asyncio.to_thread(corpo.read, TAMANHO_BLOCO_LEITURA)
+                if not bloco:
+                    break
+                yield bloco
+        finally:
+            corpo.close()
+
+
+def criar_armazenamento(backend=ARMAZENAMENTO_BACKEND):
+    """
+    Cria o backend de armazenamento configurado em ARMAZENAMENTO_BACKEND.
+    """
+    if backend == "s3":
+        return ArmazenamentoS3()
+
+    return ArmazenamentoLocal()
+
+
+def opcoes_screenshot():
+    """
+    Retorna o formato e a qualidade a serem utilizados na captura de tela pelo Playwright.
+
+    O Playwright gera somente png e jpeg; para webp a captura é feita em png e convertida depois.
+    """
+    if SCREENSHOT_FORMATO == "jpeg":
+        return "jpeg", SCREENSHOT_QUALIDADE
+
+    return "png", None
+
+
+def converter_screenshot(conteudo, formato_captura):
+    """
+    Converte a captura de tela para o formato configurado, quando necessário.
+
+    Retorna:
+    - Tuple (conteudo: bytes, extensao: str).
+    """
+    if SCREENSHOT_FORMATO != "webp":
+        return conteudo, formato_captura
+
+    try:
+        from PIL import Image
+    except ImportError:
+        print("SCREENSHOT_FORMATO=webp requer o pacote Pillow; a captura será mantida em png.")
+        return conteudo, formato_captura
+
+    saida = io.BytesIO()
+    Image.open(io.BytesIO(conteudo)).save(saida, format="WEBP", quality=SCREENSHOT_QUALIDADE)
+    return saida.getvalue(), "webp"
+
+
+armazenamento = criar_armazenamento()
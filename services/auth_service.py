@@ -1,33 +1,155 @@
-import requests
-import os
+import asyncio
+import time
 
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from dotenv import load_dotenv
 
-load_dotenv()
+from config.configuracoes import configuracoes
+from services.http_client_service import obter_cliente_http
 
-AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN") # Domínio da instância Auth0
-API_AUDIENCE = os.getenv("AUTH0_API_AUDIENCE") # Identificador da API configurado no painel do Auth0
+
+AUTH0_DOMAIN = configuracoes.auth0_domain
+API_AUDIENCE = configuracoes.auth0_api_audience
 ALGORITHMS = ["RS256"] # Algoritmo usado para assinar os tokens JWT
-PROFILE = os.getenv("PROFILE", "prod") # Ambiente de execução: "local" ou "prod" (default = "prod")
+PROFILE = configuracoes.profile
+JWKS_URL = configuracoes.jwks_url or f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
+JWKS_TTL_SEGUNDOS = configuracoes.jwks_ttl_segundos
+JWKS_INTERVALO_MINIMO_SEGUNDOS = configuracoes.jwks_intervalo_minimo_segundos
+TOKENS_VERIFICADOS_MAX = configuracoes.tokens_verificados_max
 
 http_bearer = HTTPBearer()
 
-def get_jwk():
+
+class CacheJWKS:
     """
-    Obtém as chaves públicas (JWKs) do endpoint do Auth0 para verificação dos tokens JWT.
+    Cache das chaves públicas (JWKs) do Auth0, indexadas pelo 'kid'.
+
+    Funcionamento:
+    - As chaves são buscadas com o cliente HTTP assíncrono compartilhado e mantidas por JWKS_TTL_SEGUNDOS.
+    - Uma tarefa em segundo plano renova as chaves antes de expirarem.
+    - Um 'kid' desconhecido provoca uma nova busca, limitada a uma a cada JWKS_INTERVALO_MINIMO_SEGUNDOS
+      (evita que tokens forjados gerem uma requisição ao Auth0 cada).
     """
-    jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-    response = requests.get(jwks_url)
-    return response.json()["keys"]
 
-def verify_jwt(token: str):
+    def __init__(self, url=JWKS_URL, ttl=JWKS_TTL_SEGUNDOS, intervalo_minimo=JWKS_INTERVALO_MINIMO_SEGUNDOS):
+        self.url = url
+        self.ttl = ttl
+        self.intervalo_minimo = intervalo_minimo
+        self._chaves = {}
+        self._atualizado_em = 0
+        self._lock = asyncio.Lock()
+        self._tarefa_renovacao = None
+
+    async def atualizar(self):
+        """
+        Busca as chaves públicas no endpoint JWKS e substitui o cache.
+        """
+        resposta = await obter_cliente_http().get(self.url)
+        resposta.raise_for_status()
+
+        chaves = {}
+        for key in resposta.json()["keys"]:
+            chaves[key["kid"]] = {
+                "kty": key["kty"],
+                "kid": key["kid"],
+                "use": key["use"],
+                "n": key["n"],
+                "e": key["e"]
+            }
+
+        self._chaves = chaves
+        self._atualizado_em = time.monotonic()
+
+    async def obter_chave(self, kid):
+        """
+        Retorna a chave pública correspondente ao 'kid', ou None se ela não existir.
+        """
+        if time.monotonic() - self._atualizado_em > self.ttl:
+            await self._atualizar_uma_vez(lambda: time.monotonic() - self._atualizado_em > self.ttl)
+
+        if kid not in self._chaves:
+            await self._atualizar_uma_vez(
+                lambda: kid not in self._chaves and time.monotonic() - self._atualizado_em >= self.intervalo_minimo
+            )
+
+        return self._chaves.get(kid)
+
+    async def _atualizar_uma_vez(self, ainda_necessario):
+        # Requisições concorrentes aguardam a mesma atualização em vez de dispararem buscas duplicadas
+        async with self._lock:
+            if ainda_necessario():
+                await self.atualizar()
+
+    async def iniciar(self):
+        """
+        Carrega as chaves e agenda a renovação periódica em segundo plano.
+        """
+        try:
+            await self.atualizar()
+        except Exception as e:
+            print(f"Não foi possível carregar as chaves públicas (JWKS): {e}")
+
+        self._tarefa_renovacao = asyncio.create_task(self._renovar_periodicamente())
+
+    async def encerrar(self):
+        if self._tarefa_renovacao:
+            self._tarefa_renovacao.cancel()
+            self._tarefa_renovacao = None
+
+    async def _renovar_periodicamente(self):
+        while True:
+            await asyncio.sleep(self.ttl * 0.8)
+            try:
+                await self.atualizar()
+            except Exception as e:
+                print(f"Falha ao renovar as chaves públicas (JWKS): {e}")
+
+
+class TokensVerificados:
+    """
+    Memoriza o payload de tokens já verificados até a expiração ('exp') de cada um.
+    """
+
+    def __init__(self, max_itens=TOKENS_VERIFICADOS_MAX):
+        self.max_itens = max_itens
+        self._tokens = OrderedDict()
+
+    def obter(self, token):
+        item = self._tokens.get(token)
+
+        if item is None:
+            return None
+
+        payload, expiracao = item
+        if time.time() >= expiracao:
+            del self._tokens[token]
+            return None
+
+        self._tokens.move_to_end(token)
+        return payload
+
+    def guardar(self, token, payload):
+        if "exp" not in payload:
+            return
+
+        self._tokens[token] = (payload, payload["exp"])
+        self._tokens.move_to_end(token)
+
+        while len(self._tokens) > self.max_itens:
+            self._tokens.popitem(last=False)
+
+
+cache_jwks = CacheJWKS()
+tokens_verificados = TokensVerificados()
+
+
+async def verify_jwt(token: str):
     """
     Valida o JWT recebido:
+    - Retorna o payload memorizado se o token já foi verificado e ainda não expirou.
     - Obtém o cabeçalho sem verificar a assinatura.
-    - Busca a chave pública correspondente (com base no 'kid' do cabeçalho).
+    - Busca a chave pública correspondente (com base no 'kid' do cabeçalho) no cache de JWKs.
     - Usa a chave para decodificar e validar o token.
     - Verifica o emissor (issuer) e o público (audience).
 
@@ -37,20 +159,19 @@ def verify_jwt(token: str):
     Retorna:
         dict: Payload decodificado do JWT se válido.
     """
+    payload = tokens_verificados.obter(token)
+    if payload is not None:
+        return payload
+
+    from jose import jwt, JWTError
+
     try:
         unverified_header = jwt.get_unverified_header(token)
-        jwks = get_jwk()
-
-        rsa_key = {}
-        for key in jwks:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
+
+        try:
+            rsa_key = await cache_jwks.obter_chave(unverified_header["kid"])
+        except Exception:
+            raise HTTPException(status_code=503, detail="Não foi possível obter as chaves públicas de autenticação.")
 
         if not rsa_key:
             raise HTTPException(status_code=401, detail="Chave pública não encontrada.")
@@ -62,17 +183,18 @@ def verify_jwt(token: str):
             audience=API_AUDIENCE,
             issuer=f"https://{AUTH0_DOMAIN}/"
         )
+        tokens_verificados.guardar(token, payload)
         return payload
 
-    except JWTError:
+    except (JWTError, KeyError):
         raise HTTPException(status_code=401, detail="Token inválido.")
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Security(http_bearer)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(http_bearer)):
     """
     Dependency utilizada pelo FastAPI para proteger rotas com autenticação JWT via Auth0.
 
     - Em ambiente local (`PROFILE=local`), a autenticação é ignorada.
-    - Em produção, valida o token com o Auth0.
+    - Em produção, valida o token com as chaves públicas do Auth0 mantidas em cache.
 
     Parâmetros:
         credentials (HTTPAuthorizationCredentials): Token JWT extraído do cabeçalho Authorization.
@@ -82,5 +204,5 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Security(http_b
     """
     if PROFILE == "local":
         return
-    
-    return verify_jwt(credentials.credentials)
+
+    return await verify_jwt(credentials.credentials)
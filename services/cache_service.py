@@ -0,0 +1,363 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+
+from collections import OrderedDict
+
+from config.configuracoes import configuracoes
+
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+CACHE_TTL_SEGUNDOS = configuracoes.cache_ttl_segundos
+CACHE_STALE_WHILE_REVALIDATE_SEGUNDOS = configuracoes.cache_stale_while_revalidate_segundos
+CACHE_MAX_ITENS_MEMORIA = configuracoes.cache_max_itens_memoria
+CACHE_NEGATIVO_ATIVO = configuracoes.cache_negativo_ativo
+CACHE_NEGATIVO_TTL_SEGUNDOS = configuracoes.cache_negativo_ttl_segundos
+CACHE_NEGATIVO_CAPACIDADE = configuracoes.cache_negativo_capacidade
+CACHE_NEGATIVO_TAXA_FALSOS_POSITIVOS = configuracoes.cache_negativo_taxa_falsos_positivos
+CACHE_NEGATIVO_RECARGA_SEGUNDOS = configuracoes.cache_negativo_recarga_segundos
+
+
+def normalizar_identificador(identificador):
+    """
+    Normaliza o identificador para uso como chave (CPF/NIS somente com dígitos, nomes sem acentos e em minúsculas).
+    """
+    numeros = ''.join(c for c in identificador if c.isdigit())
+
+    if len(numeros) == 11:
+        return numeros
+
+    from unidecode import unidecode
+
+    return " ".join(unidecode(identificador).lower().split())
+
+
+def chave_consulta(identificador, aplicar_filtro_social=False, incluir_screenshot=True):
+    """
+    Monta a chave de cache de uma consulta a partir do identificador normalizado e do filtro social.
+    Consultas sem captura de tela recebem uma chave própria.
+    """
+    chave = f"{normalizar_identificador(identificador)}|{int(bool(aplicar_filtro_social))}"
+
+    if not incluir_screenshot:
+        chave = f"{chave}|sem_screenshot"
+
+    return chave
+
+
+class CacheConsultas:
+    """
+    Cache de resultados de consultas com duas camadas:
+    - LRU em memória, para acertos em milissegundos.
+    - Armazenamento persistente em disco (um arquivo JSON por chave), que sobrevive a reinicializações.
+
+    Cada registro guarda o momento em que foi coletado; a decisão de validade (TTL, max_age,
+    stale-while-revalidate) é feita por quem consulta o cache.
+    """
+
+    def __init__(self, diretorio=None, max_itens_memoria=CACHE_MAX_ITENS_MEMORIA):
+        self.diretorio = diretorio or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "cache")
+        self.max_itens_memoria = max_itens_memoria
+        self._memoria = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def _caminho(self, chave):
+        nome_arquivo = hashlib.sha256(chave.encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"{nome_arquivo}.json")
+
+    def _guardar_em_memoria(self, chave, registro):
+        self._memoria[chave] = registro
+        self._memoria.move_to_end(chave)
+
+        while len(self._memoria) > self.max_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    def _ler_disco(self, chave):
+        try:
+            with open(self._caminho(chave), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _escrever_disco(self, chave, registro):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._caminho(chave)
+        caminho_temporario = f"{caminho}.tmp"
+
+        with open(caminho_temporario, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False)
+
+        os.replace(caminho_temporario, caminho)
+
+    def _remover_disco(self, chave):
+        try:
+            os.remove(self._caminho(chave))
+        except FileNotFoundError:
+            pass
+
+    async def obter(self, chave):
+        """
+        Busca um registro no cache (memória e, em seguida, disco).
+
+        Retorna:
+        - dict {"coletado_em": timestamp, "dados": dict} ou None se não houver registro.
+        """
+        registro = self._memoria.get(chave)
+
+        if registro is None:
+            registro = await asyncio.to_thread(self._ler_disco, chave)
+            if registro is not None:
+                self._guardar_em_memoria(chave, registro)
+        else:
+            self._memoria.move_to_end(chave)
+
+        if registro is None:
+            self.faltas += 1
+        else:
+            self.acertos += 1
+
+        return registro
+
+    async def salvar(self, chave, dados):
+        """
+        Salva o resultado de uma consulta na memória e no disco.
+        """
+        registro = {"coletado_em": time.time(), "dados": dados}
+        self._guardar_em_memoria(chave, registro)
+        await asyncio.to_thread(self._escrever_disco, chave, registro)
+        return registro
+
+    async def invalidar(self, chave):
+        """
+        Remove um registro do cache.
+        """
+        self._memoria.pop(chave, None)
+        await asyncio.to_thread(self._remover_disco, chave)
+
+    def estatisticas(self):
+        return {
+            "itens_em_memoria": len(self._memoria),
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+        }
+
+
+cache_consultas = CacheConsultas()
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom: conjunto probabilístico que responde, em memória, "certamente ausente" ou
+    "possivelmente presente" (com a taxa de falsos positivos definida no dimensionamento).
+
+    Os itens são resumos SHA-256 em hexadecimal; as posições dos bits são derivadas do próprio
+    resumo por hash duplo, sem calcular novos hashes.
+    """
+
+    def __init__(self, capacidade, taxa_falsos_positivos):
+        capacidade = max(1, capacidade)
+        taxa_falsos_positivos = min(max(taxa_falsos_positivos, 1e-6), 0.5)
+
+        self.tamanho = max(64, int(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2))
+        self.quantidade_hashes = max(1, round(self.tamanho / capacidade * math.log(2)))
+        self.itens = 0
+        self._bits = bytearray((self.tamanho + 7) // 8)
+
+    def _posicoes(self, resumo):
+        h1 = int(resumo[:16], 16)
+        h2 = int(resumo[16:32], 16) | 1
+        return [(h1 + i * h2) % self.tamanho for i in range(self.quantidade_hashes)]
+
+    def adicionar(self, resumo):
+        for posicao in self._posicoes(resumo):
+            self._bits[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+
+    def __contains__(self, resumo):
+        return all(self._bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(resumo))
+
+
+class CacheNegativo:
+    """
+    Cache das consultas que terminaram com a pessoa não encontrada no portal (CPFouNISNaoEncontrado ou
+    NomeNaoEncontrado), com validade própria (CACHE_NEGATIVO_TTL_SEGUNDOS), menor que a dos resultados
+    encontrados: a pessoa pode passar a constar no portal.
+
+    Funcionamento:
+    - Cada ausência é persistida em disco (um arquivo JSON por chave, como no CacheConsultas).
+    - Um filtro de Bloom com as chaves registradas, montado a partir dos arquivos no primeiro uso,
+      descarta em memória os identificadores que não são ausências conhecidas (a grande maioria),
+      sem acessar o disco. Somente as chaves "possivelmente presentes" são lidas.
+    - O filtro é remontado a partir do disco a cada CACHE_NEGATIVO_RECARGA_SEGUNDOS: com vários processos
+      compartilhando o diretório, as ausências registradas por um processo passam a ser vistas pelos demais
+      nesse intervalo, e as ausências removidas deixam o filtro.
+    - O filtro não remove itens: até a próxima recarga, ausências expiradas ou removidas custam apenas uma
+      leitura em disco.
+    """
+
+    def __init__(
+        self,
+        diretorio=None,
+        ativo=CACHE_NEGATIVO_ATIVO,
+        ttl=CACHE_NEGATIVO_TTL_SEGUNDOS,
+        capacidade=CACHE_NEGATIVO_CAPACIDADE,
+        taxa_falsos_positivos=CACHE_NEGATIVO_TAXA_FALSOS_POSITIVOS,
+        intervalo_recarga=CACHE_NEGATIVO_RECARGA_SEGUNDOS,
+    ):
+        self.diretorio = diretorio or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "cache_negativo")
+        self.ativo = ativo
+        self.ttl = ttl
+        self.capacidade = capacidade
+        self.taxa_falsos_positivos = taxa_falsos_positivos
+        self.intervalo_recarga = intervalo_recarga
+        self._filtro = FiltroBloom(capacidade, taxa_falsos_positivos)
+        self._carregado_em = None
+        self._registrados_durante_recarga = None
+        self._lock = asyncio.Lock()
+        self.acertos = 0
+        self.descartados_pelo_filtro = 0
+        self.falsos_positivos = 0
+
+    @staticmethod
+    def _resumo(chave):
+        return hashlib.sha256(chave.encode("utf-8")).hexdigest()
+
+    def _caminho(self, resumo):
+        return os.path.join(self.diretorio, f"{resumo}.json")
+
+    def _listar_resumos(self):
+        try:
+            return [nome[:-5] for nome in os.listdir(self.diretorio) if nome.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def _ler_disco(self, resumo):
+        try:
+            with open(self._caminho(resumo), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _escrever_disco(self, resumo, registro):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._caminho(resumo)
+        caminho_temporario = f"{caminho}.tmp"
+
+        with open(caminho_temporario, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False)
+
+        os.replace(caminho_temporario, caminho)
+
+    def _remover_disco(self, resumo):
+        try:
+            os.remove(self._caminho(resumo))
+        except FileNotFoundError:
+            pass
+
+    def _montar_filtro(self):
+        filtro = FiltroBloom(self.capacidade, self.taxa_falsos_positivos)
+        for resumo in self._listar_resumos():
+            filtro.adicionar(resumo)
+        return filtro
+
+    def _carregamento_vencido(self):
+        return self._carregado_em is None or time.monotonic() - self._carregado_em >= self.intervalo_recarga
+
+    async def _carregar(self):
+        """
+        Monta o filtro a partir do disco no primeiro uso e sempre que o último carregamento tiver mais de
+        `intervalo_recarga` segundos.
+        """
+        if not self._carregamento_vencido():
+            return
+
+        async with self._lock:
+            if not self._carregamento_vencido():
+                return
+
+            # Chaves registradas por este processo enquanto o diretório é listado podem não constar na listagem
+            self._registrados_durante_recarga = set()
+            try:
+                filtro = await asyncio.to_thread(self._montar_filtro)
+                for resumo in self._registrados_durante_recarga:
+                    if resumo not in filtro:
+                        filtro.adicionar(resumo)
+            finally:
+                self._registrados_durante_recarga = None
+
+            self._filtro = filtro
+            self._carregado_em = time.monotonic()
+
+    async def obter(self, chave):
+        """
+        Busca uma ausência registrada e ainda dentro da validade.
+
+        Retorna:
+        - dict {"registrado_em": timestamp, "tipo_erro": str, "erro": str} ou None.
+        """
+        if not self.ativo:
+            return None
+
+        await self._carregar()
+        resumo = self._resumo(chave)
+
+        if resumo not in self._filtro:
+            self.descartados_pelo_filtro += 1
+            return None
+
+        registro = await asyncio.to_thread(self._ler_disco, resumo)
+
+        if registro is None:
+            self.falsos_positivos += 1
+            return None
+
+        if time.time() - registro["registrado_em"] > self.ttl:
+            await asyncio.to_thread(self._remover_disco, resumo)
+            return None
+
+        self.acertos += 1
+        return registro
+
+    async def registrar(self, chave, erro):
+        """
+        Registra que a consulta da chave terminou com a pessoa não encontrada.
+        """
+        if not self.ativo:
+            return
+
+        await self._carregar()
+        resumo = self._resumo(chave)
+        registro = {"registrado_em": time.time(), "tipo_erro": type(erro).__name__, "erro": str(erro)}
+
+        await asyncio.to_thread(self._escrever_disco, resumo, registro)
+        if resumo not in self._filtro:
+            self._filtro.adicionar(resumo)
+        if self._registrados_durante_recarga is not None:
+            self._registrados_durante_recarga.add(resumo)
+
+    async def remover(self, chave):
+        """
+        Remove a ausência registrada para a chave (ex: a pessoa passou a ser encontrada).
+
+        O arquivo é removido mesmo que a chave não esteja no filtro: a ausência pode ter sido registrada
+        por outro processo depois da última recarga (o filtro só evita leituras).
+        """
+        if not self.ativo:
+            return
+
+        await asyncio.to_thread(self._remover_disco, self._resumo(chave))
+
+    def estatisticas(self):
+        return {
+            "ativo": self.ativo,
+            "itens_no_filtro": self._filtro.itens,
+            "acertos": self.acertos,
+            "descartados_pelo_filtro": self.descartados_pelo_filtro,
+            "falsos_positivos": self.falsos_positivos,
+        }
+
+
+cache_negativo = CacheNegativo()
@@ -0,0 +1,254 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from config.configuracoes import configuracoes
+
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+CHECKPOINT_ATIVO = configuracoes.checkpoint_ativo
+CHECKPOINT_VALIDADE_SEGUNDOS = configuracoes.checkpoint_validade_segundos
+
+NOME_ARQUIVO_ESTADO = "estado.json"
+NOME_ARQUIVO_SCREENSHOT = "screenshot.bin"
+
+
+class CheckpointConsulta:
+    """
+    Progresso de uma consulta ao portal, atualizado a cada etapa concluída:
+    - URL da pessoa encontrada na busca (e os candidatos da busca por nome).
+    - Dados da página da pessoa, lista de recebimentos e captura de tela.
+    - Por benefício, cada tabela de recursos: linhas e páginas já coletadas, e se a tabela foi concluída.
+
+    Uma nova tentativa da consulta retoma a partir do último estado registrado, sem repetir as etapas concluídas.
+    Sem persistência em disco, o progresso é mantido somente em memória (válido entre as tentativas da mesma requisição).
+    """
+
+    def __init__(self, diretorio, estado=None, persistir=True):
+        self.diretorio = diretorio
+        self.persistir = persistir
+        self.retomado = estado is not None
+        self.estado = estado or {
+            "criado_em": time.time(),
+            "atualizado_em": time.time(),
+            "url_pessoa": None,
+            "candidatos_nome": [],
+            "pessoa": None,
+            "recebimentos": [],
+            "beneficios": {},
+        }
+        self._screenshot = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def url_pessoa(self):
+        return self.estado["url_pessoa"]
+
+    @property
+    def candidatos_nome(self):
+        return self.estado["candidatos_nome"]
+
+    @property
+    def pessoa(self):
+        return self.estado["pessoa"]
+
+    @property
+    def recebimentos(self):
+        return self.estado["recebimentos"]
+
+    def _escrever_disco(self, screenshot_bytes=None):
+        os.makedirs(self.diretorio, exist_ok=True)
+
+        if screenshot_bytes is not None:
+            with open(os.path.join(self.diretorio, NOME_ARQUIVO_SCREENSHOT), "wb") as f:
+                f.write(screenshot_bytes)
+
+        caminho = os.path.join(self.diretorio, NOME_ARQUIVO_ESTADO)
+        caminho_temporario = f"{caminho}.tmp"
+
+        with open(caminho_temporario, "w", encoding="utf-8") as f:
+            json.dump(self.estado, f, ensure_ascii=False)
+
+        os.replace(caminho_temporario, caminho)
+
+    def _ler_screenshot(self):
+        try:
+            with open(os.path.join(self.diretorio, NOME_ARQUIVO_SCREENSHOT), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def _salvar(self, screenshot_bytes=None):
+        self.estado["atualizado_em"] = time.time()
+
+        if self.persistir:
+            await asyncio.to_thread(self._escrever_disco, screenshot_bytes)
+
+    async def registrar_url_pessoa(self, url_pessoa, candidatos_nome=None):
+        async with self._lock:
+            self.estado["url_pessoa"] = url_pessoa
+            self.estado["candidatos_nome"] = candidatos_nome or []
+            await self._salvar()
+
+    async def registrar_pessoa(self, dados_pessoa, recebimentos, screenshot_bytes=None):
+        """
+        Registra os dados da página da pessoa e os recebimentos (cada um com "tipo", "valor_recebido" e "url_recursos").
+        """
+        async with self._lock:
+            self.estado["pessoa"] = copy.deepcopy(dados_pessoa)
+            self.estado["recebimentos"] = copy.deepcopy(recebimentos)
+            self._screenshot = screenshot_bytes
+            await self._salvar(screenshot_bytes)
+
+    async def screenshot(self):
+        """
+        Retorna a captura de tela registrada com os dados da pessoa, se houver.
+        """
+        if self._screenshot is None and self.persistir:
+            self._screenshot = await asyncio.to_thread(self._ler_screenshot)
+        return self._screenshot
+
+    def tabelas(self, url_recursos):
+        """
+        Retorna o estado das tabelas de recursos de um benefício: lista de dicts com
+        "cabecalho", "linhas", "paginas" e "completa".
+        """
+        return self.estado["beneficios"].get(url_recursos, {}).get("tabelas", [])
+
+    def recursos_concluidos(self, url_recursos):
+        """
+        Retorna as tabelas de recursos de um benefício já concluído, ou None.
+        """
+        beneficio = self.estado["beneficios"].get(url_recursos)
+        if not beneficio or not beneficio.get("completo"):
+            return None
+        return [tabela["linhas"] for tabela in beneficio["tabelas"]]
+
+    async def registrar_tabela(self, url_recursos, indice, cabecalho, linhas, paginas, completa=False):
+        async with self._lock:
+            beneficio = self.estado["beneficios"].setdefault(url_recursos, {"completo": False, "tabelas": []})
+            tabelas = beneficio["tabelas"]
+
+            while len(tabelas) <= indice:
+                tabelas.append({"cabecalho": [], "linhas": [], "paginas": 0, "completa": False})
+
+            tabelas[indice] = {"cabecalho": cabecalho, "linhas": list(linhas), "paginas": paginas, "completa": completa}
+            await self._salvar()
+
+    async def registrar_beneficio_concluido(self, url_recursos, cabecalhos, tabelas):
+        async with self._lock:
+            self.estado["beneficios"][url_recursos] = {
+                "completo": True,
+                "tabelas": [
+                    {"cabecalho": cabecalho, "linhas": linhas, "paginas": 0, "completa": True}
+                    for cabecalho, linhas in zip(cabecalhos, tabelas)
+                ],
+            }
+            await self._salvar()
+
+    def resultado_parcial(self, erro):
+        """
+        Monta o resultado com tudo o que foi coletado até a falha.
+
+        Os recebimentos cujas tabelas de recursos não foram concluídas recebem as linhas já coletadas
+        e são listados em "secoes_incompletas".
+
+        Retorna:
+        - dict com os dados da pessoa, "incompleto": True e "secoes_incompletas", ou None se os
+          dados da pessoa ainda não tiverem sido coletados.
+        """
+        if self.pessoa is None:
+            return None
+
+        dados_pessoa = copy.deepcopy(self.pessoa)
+        recebimentos = []
+        secoes_incompletas = []
+
+        for recebimento in self.recebimentos:
+            url_recursos = recebimento["url_recursos"]
+            concluidos = self.recursos_concluidos(url_recursos)
+            tabelas = self.tabelas(url_recursos)
+
+            recebimentos.append({
+                "tipo": recebimento["tipo"],
+                "valor_recebido": recebimento["valor_recebido"],
+                "recursos": concluidos if concluidos is not None else [tabela["linhas"] for tabela in tabelas],
+            })
+
+            if concluidos is None:
+                secoes_incompletas.append({
+                    "secao": "recursos",
+                    "tipo": recebimento["tipo"],
+                    "tabelas_concluidas": sum(1 for tabela in tabelas if tabela["completa"]),
+                    "linhas_coletadas": sum(len(tabela["linhas"]) for tabela in tabelas),
+                })
+
+        dados_pessoa["recebimentos"] = recebimentos
+        dados_pessoa["incompleto"] = True
+        dados_pessoa["secoes_incompletas"] = secoes_incompletas
+        dados_pessoa["erro"] = {"tipo": type(erro).__name__, "mensagem": str(erro)}
+        return dados_pessoa
+
+
+class CheckpointsConsultas:
+    """
+    Armazena o progresso das consultas em andamento (um diretório por consulta), indexado pela chave
+    da consulta (ver chave_consulta). O progresso é removido quando a consulta é concluída e ignorado
+    após CHECKPOINT_VALIDADE_SEGUNDOS sem atualização.
+    """
+
+    def __init__(self, diretorio=None, ativo=CHECKPOINT_ATIVO, validade=CHECKPOINT_VALIDADE_SEGUNDOS):
+        self.diretorio = diretorio or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "checkpoints")
+        self.ativo = ativo
+        self.validade = validade
+        self.retomadas = 0
+
+    def _diretorio_consulta(self, chave):
+        return os.path.join(self.diretorio, hashlib.sha256(chave.encode("utf-8")).hexdigest())
+
+    def _ler_disco(self, diretorio):
+        try:
+            with open(os.path.join(diretorio, NOME_ARQUIVO_ESTADO), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    async def abrir(self, chave):
+        """
+        Abre o progresso de uma consulta, retomando o estado salvo se ele ainda for válido.
+
+        Retorna:
+        - CheckpointConsulta (com `retomado` True se houver progresso anterior).
+        """
+        diretorio = self._diretorio_consulta(chave)
+        estado = None
+
+        if self.ativo:
+            estado = await asyncio.to_thread(self._ler_disco, diretorio)
+            if estado is not None and time.time() - estado.get("atualizado_em", 0) > self.validade:
+                await asyncio.to_thread(shutil.rmtree, diretorio, True)
+                estado = None
+
+        if estado is not None:
+            self.retomadas += 1
+
+        return CheckpointConsulta(diretorio, estado, persistir=self.ativo)
+
+    async def remover(self, checkpoint):
+        """
+        Remove o progresso de uma consulta concluída.
+        """
+        if self.ativo:
+            await asyncio.to_thread(shutil.rmtree, checkpoint.diretorio, True)
+
+    def estatisticas(self):
+        return {
+            "ativo": self.ativo,
+            "consultas_retomadas": self.retomadas,
+        }
+
+
+checkpoints_consultas = CheckpointsConsultas()
@@ -0,0 +1,58 @@
+import asyncio
+
+
+class ConsultasEmAndamento:
+    """
+    Deduplicação (single-flight) de consultas idênticas em andamento.
+
+    Requisições concorrentes com a mesma chave aguardam uma única tarefa compartilhada e recebem
+    o mesmo resultado ou a mesma exceção. O cancelamento de uma requisição que está aguardando
+    não cancela a tarefa compartilhada das demais.
+    """
+
+    def __init__(self):
+        self._tarefas = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    async def executar(self, chave, funcao):
+        """
+        Executa `funcao()` uma única vez por chave entre as chamadas concorrentes.
+
+        Parâmetros:
+        - chave (str): chave que identifica consultas equivalentes.
+        - funcao (callable): função assíncrona sem argumentos que executa a consulta.
+
+        Retorna:
+        - resultado da tarefa compartilhada.
+        """
+        tarefa = self._tarefas.get(chave)
+
+        if tarefa is None:
+            tarefa = asyncio.create_task(funcao())
+            self._tarefas[chave] = tarefa
+            tarefa.add_done_callback(lambda t: self._finalizar(chave, t))
+            self.execucoes += 1
+        else:
+            self.coalescidas += 1
+
+        # shield impede que o cancelamento de quem aguarda cancele a consulta compartilhada
+        return await asyncio.shield(tarefa)
+
+    def _finalizar(self, chave, tarefa):
+        if self._tarefas.get(chave) is tarefa:
+            del self._tarefas[chave]
+
+        # Marca a exceção como consumida caso todas as requisições tenham sido canceladas
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    def estatisticas(self):
+        return {
+            "em_andamento": len(self._tarefas),
+            "execucoes": self.execucoes,
+            "coalescidas": self.coalescidas,
+        }
+
+
+consultas_em_andamento = ConsultasEmAndamento()
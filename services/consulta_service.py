@@ -1,13 +1,32 @@
-import base64
+import asyncio
 import json
 import os
+import re
+import time
 
-from pages.portal_page import PortalPage
-from playwright.async_api import async_playwright
-from dotenv import load_dotenv
+from config.configuracoes import configuracoes
+from services.pool_navegadores_service import pool_navegadores
+from services.coalescencia_service import consultas_em_andamento
+from services.fila_service import fila_consultas
+from services.governador_service import governador_portal
+from services.metricas_service import etapa, medir_consulta
+from services.rede_service import MonitorRede, totais_rede
+from services.armazenamento_service import armazenamento, converter_screenshot, opcoes_screenshot
+from services.checkpoint_service import checkpoints_consultas
+from services.analitico_service import chave_pessoa, repositorio_analitico
+from services.escalonador_service import escalonador_consultas, PRIORIDADE_INTERATIVA, PRIORIDADE_LOTE
+from services.cache_service import (
+    cache_consultas,
+    cache_negativo,
+    chave_consulta,
+    CACHE_TTL_SEGUNDOS,
+    CACHE_STALE_WHILE_REVALIDATE_SEGUNDOS
+)
 
 from exceptions.scraping_exceptions import (
+    CircuitoAberto,
     ErroInesperadoDuranteConsulta,
+    IdentificadorInvalido,
     TempoLimiteExcedido,
     PortalInacessivel,
     CPFouNISNaoEncontrado,
@@ -16,76 +35,267 @@ from exceptions.scraping_exceptions import (
     FalhaAoColetarDados
 )
 
-load_dotenv()
+URL_BASE_PORTAL_TRANSPARENCIA = configuracoes.url_base_portal_transparencia
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+COLETA_TENTATIVAS = configuracoes.coleta_tentativas
+COLETA_RECUO_INICIAL_SEGUNDOS = configuracoes.coleta_recuo_inicial_segundos
+
+ERROS_REPETIVEIS = (TempoLimiteExcedido, PortalInacessivel, ErroInesperadoDuranteConsulta)
+ERROS_AUSENCIA = (CPFouNISNaoEncontrado, NomeNaoEncontrado)
+FORMATO_CPF = re.compile(r"^\s*\d{3}\.\d{3}\.\d{3}-\d{2}\s*$") # 000.000.000-00
+FORMATO_NIS = re.compile(r"^\s*\d{3}\.\d{5}\.\d{2}-\d\s*$") # 000.00000.00-0
 
-URL_BASE_PORTAL_TRANSPARENCIA = os.getenv("URL_BASE_PORTAL_TRANSPARENCIA") # URL base do Portal da Transparência
-PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = os.getenv("PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA") # Caminho base para salvar os dados coletados localmente
+_revalidacoes_em_andamento = {}
 
-async def consultar_dados_pessoa_fisica(identificador, aplicar_filtro_social=False):
+async def obter_dados_pessoa_fisica(identificador, aplicar_filtro_social=False, max_age=None, incluir_screenshot=True,
+                                    permitir_resultado_parcial=False, cliente=None, prioridade=PRIORIDADE_INTERATIVA):
     """
-    Função principal para consultar dados de pessoa física no Portal da Transparência.
+    Obtém os dados de pessoa física utilizando o cache de consultas antes de acessar o portal.
 
     Parâmetros:
     - identificador (str): nome, CPF ou NIS da pessoa a ser consultada.
     - aplicar_filtro_social (bool): se True, aplica filtro para beneficiário de programa social.
+    - max_age (int | None): idade máxima (s) aceita para um resultado em cache. 0 força uma nova consulta.
+    - incluir_screenshot (bool): se False, a consulta é realizada sem captura de tela.
+    - permitir_resultado_parcial (bool): se True, uma consulta que falhar após a coleta dos dados da pessoa
+      retorna o que foi coletado (ver consultar_dados_pessoa_fisica). Resultados parciais não são salvos no cache.
+    - cliente (str | None): cliente que solicitou a consulta (ver identificar_cliente).
+    - prioridade (str): classe de prioridade da consulta ao portal, "interativa" ou "lote" (ver EscalonadorConsultas).
 
     Retorna:
-    - dict com os dados da pessoa física e screenshot em base64.
+    - Tuple (dados_pessoa: dict, estado_cache: str, idade: int), onde estado_cache é
+      "HIT" (cache atual), "STALE" (cache expirado servido enquanto é atualizado) ou "MISS" (nova consulta).
+
+    Levanta:
+    - IdentificadorInvalido: se o identificador não for um nome nem um CPF ou NIS válido (sem acessar o portal).
+    - CPFouNISNaoEncontrado / NomeNaoEncontrado: também quando a ausência da pessoa foi registrada no
+      cache negativo há menos de CACHE_NEGATIVO_TTL_SEGUNDOS (ou do max_age informado).
 
     Funcionamento:
-    - Inicializa o browser com Playwright.
-    - Cria contexto com headers personalizados para simular navegação real.
-    - Cria uma instância da classe PortalPage que possui métodos que executam ações na página.
-    - Classifica o identificador para saber se é nome ou CPF/NIS.
-    - Executa a busca da pessoa física e coleta os dados.
-    - Salva localmente os dados em arquivos JSON e as imagens em formato png e base64.
-    - Retorna os dados coletados.
+    - Valida o identificador (dígitos verificadores do CPF ou NIS) antes de qualquer outra etapa.
+    - Se a pessoa não foi encontrada em uma consulta recente (ver CacheNegativo), levanta o mesmo erro.
+    - Se houver resultado em cache com idade dentro do TTL (ou do max_age informado), retorna-o.
+    - Se o resultado expirou há menos de CACHE_STALE_WHILE_REVALIDATE_SEGUNDOS e o cliente não exigiu
+      max_age, retorna-o e dispara uma atualização em segundo plano.
+    - Caso contrário, consulta o portal e atualiza o cache.
+    - Se as consultas ao portal estiverem suspensas (ver Disjuntor), retorna qualquer resultado
+      em cache como "STALE", independentemente da idade; sem cache, levanta CircuitoAberto.
     """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+    classificar_e_estruturar_identificador(identificador)
+
+    chave = chave_consulta(identificador, aplicar_filtro_social, incluir_screenshot)
+    registro = None
+
+    if max_age is None or max_age > 0:
+        ausencia = await cache_negativo.obter(chave_consulta(identificador, aplicar_filtro_social))
+
+        if ausencia is not None and (max_age is None or time.time() - ausencia["registrado_em"] <= max_age):
+            tipo_erro = NomeNaoEncontrado if ausencia["tipo_erro"] == NomeNaoEncontrado.__name__ else CPFouNISNaoEncontrado
+            raise tipo_erro(ausencia["erro"])
+
+        registro = await cache_consultas.obter(chave)
+
+        if registro is not None:
+            idade = int(time.time() - registro["coletado_em"])
+            idade_maxima = CACHE_TTL_SEGUNDOS if max_age is None else min(max_age, CACHE_TTL_SEGUNDOS)
 
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64)...',
-            locale='pt-BR',
-            extra_http_headers={
-                "Accept-Language": "pt-BR,pt;q=0.9",
-                "Referer": f"{URL_BASE_PORTAL_TRANSPARENCIA}"
-            },
+            if idade <= idade_maxima:
+                return dict(registro["dados"]), "HIT", idade
+
+            if max_age is None and idade <= CACHE_TTL_SEGUNDOS + CACHE_STALE_WHILE_REVALIDATE_SEGUNDOS:
+                _revalidar_em_segundo_plano(chave, identificador, aplicar_filtro_social, incluir_screenshot, cliente)
+                return dict(registro["dados"]), "STALE", idade
+
+    try:
+        dados_pessoa = await _consultar_e_salvar_em_cache(
+            chave, identificador, aplicar_filtro_social, incluir_screenshot, permitir_resultado_parcial, cliente, prioridade
         )
+    except CircuitoAberto:
+        registro = registro or await cache_consultas.obter(chave)
+        if registro is None:
+            raise
+        return dict(registro["dados"]), "STALE", int(time.time() - registro["coletado_em"])
+
+    return dict(dados_pessoa), "MISS", 0
+
+async def _consultar_e_salvar_em_cache(chave, identificador, aplicar_filtro_social, incluir_screenshot=True,
+                                       permitir_resultado_parcial=False, cliente=None, prioridade=PRIORIDADE_INTERATIVA):
+    """
+    Consulta o portal e atualiza o cache, compartilhando uma única consulta entre
+    requisições concorrentes com a mesma chave (ver ConsultasEmAndamento).
+
+    A consulta aguarda a sua vez no escalonador (prioridade, divisão justa entre clientes e cotas);
+    requisições concorrentes que a compartilham seguem a prioridade e o cliente da primeira.
+
+    Com uma fila de consultas configurada (FILA_BACKEND), a consulta é executada por um worker
+    e este processo apenas aguarda o resultado.
+
+    Levanta CircuitoAberto sem acessar o portal se as consultas estiverem suspensas; o resultado
+    de cada consulta é registrado no disjuntor (um resultado parcial é registrado como falha).
+    Uma pessoa não encontrada é registrada no cache negativo, e removida dele quando for encontrada.
+    """
+    chave_ausencia = chave_consulta(identificador, aplicar_filtro_social)
 
-        await context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', { get: () => false });
-        """)
+    async def consultar():
+        try:
+            async with escalonador_consultas.vaga(cliente, prioridade):
+                if fila_consultas is not None:
+                    dados_pessoa = await fila_consultas.consultar({
+                        "identificador": identificador,
+                        "aplicar_filtro_social": aplicar_filtro_social,
+                        "incluir_screenshot": incluir_screenshot,
+                        "permitir_resultado_parcial": permitir_resultado_parcial,
+                    })
+                else:
+                    dados_pessoa = await consultar_dados_pessoa_fisica(
+                        identificador, aplicar_filtro_social, incluir_screenshot, permitir_resultado_parcial
+                    )
+        except Exception as e:
+            governador_portal.disjuntor.registrar(e)
+            if isinstance(e, ERROS_AUSENCIA):
+                await cache_negativo.registrar(chave_ausencia, e)
+            raise
+
+        if dados_pessoa.get("incompleto"):
+            governador_portal.disjuntor.registrar(FalhaAoColetarDados(dados_pessoa["erro"]["mensagem"]))
+            return dados_pessoa
+
+        governador_portal.disjuntor.registrar()
+        await cache_consultas.salvar(chave, dados_pessoa)
+        await cache_negativo.remover(chave_ausencia)
+        return dados_pessoa
 
-        pagina_portal = PortalPage(await context.new_page())
+    governador_portal.disjuntor.verificar()
 
+    # Requisições que aceitam resultado parcial não compartilham a consulta com as que exigem o resultado completo
+    chave_coalescencia = f"{chave}|parcial" if permitir_resultado_parcial else chave
+    return await consultas_em_andamento.executar(chave_coalescencia, consultar)
+
+def _revalidar_em_segundo_plano(chave, identificador, aplicar_filtro_social, incluir_screenshot=True, cliente=None):
+    """
+    Atualiza um resultado expirado do cache em segundo plano (no máximo uma atualização por chave),
+    com a prioridade das consultas de lote.
+    """
+    if chave in _revalidacoes_em_andamento:
+        return
+
+    async def revalidar():
         try:
-            search_data = classificar_e_estruturar_identificador(identificador)
-            url_resultado = await pagina_portal.buscar_pessoa_fisica(search_data, aplicar_filtro_social)
-            dados_pessoa, screenshot_bytes = await pagina_portal.coletar_dados_pessoa_fisica(url_resultado)
-            screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
+            await _consultar_e_salvar_em_cache(
+                chave, identificador, aplicar_filtro_social, incluir_screenshot, cliente=cliente, prioridade=PRIORIDADE_LOTE
+            )
+        except Exception as e:
+            print(f"Falha ao atualizar o cache da consulta {identificador}: {e}")
+        finally:
+            _revalidacoes_em_andamento.pop(chave, None)
 
-            nome_normalizado = dados_pessoa['nome'].lower().replace(" ", "_")
-            cpf_fragmento_normalizado = dados_pessoa['cpf'][3:11].replace(".", "_")
+    _revalidacoes_em_andamento[chave] = asyncio.create_task(revalidar())
 
-            path_pessoa = f"{PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA}/{nome_normalizado}{cpf_fragmento_normalizado}"
-            os.makedirs(path_pessoa, exist_ok=True)
+async def consultar_dados_pessoa_fisica(identificador, aplicar_filtro_social=False, incluir_screenshot=True,
+                                        permitir_resultado_parcial=False):
+    """
+    Função principal para consultar dados de pessoa física no Portal da Transparência.
 
-            # Salva os dados JSON
-            with open(f"{path_pessoa}/dados.json", "w", encoding="utf-8") as f:
-                json.dump(dados_pessoa, f, indent=4, ensure_ascii=False)
+    Parâmetros:
+    - identificador (str): nome, CPF ou NIS da pessoa a ser consultada.
+    - aplicar_filtro_social (bool): se True, aplica filtro para beneficiário de programa social.
+    - incluir_screenshot (bool): se False, a captura de tela não é realizada nem salva.
+    - permitir_resultado_parcial (bool): se True e as tentativas se esgotarem após a coleta dos dados da
+      pessoa, retorna o que foi coletado, com "incompleto": True e as seções em "secoes_incompletas".
 
-            # Salva screenshot base64 como texto
-            with open(f"{path_pessoa}/screenshot_base64.txt", "w", encoding="utf-8") as f:
-                f.write(screenshot_base64)
+    Retorna:
+    - dict com os dados da pessoa física e a referência ao artefato da captura de tela.
 
-            # Salva screenshot como imagem PNG
-            with open(f"{path_pessoa}/screenshot.png", "wb") as f:
-                f.write(screenshot_bytes)
+    Funcionamento:
+    - Abre o progresso da consulta (ver CheckpointConsulta), retomando uma consulta interrompida
+      anteriormente com os mesmos parâmetros.
+    - Executa a consulta (ver _executar_consulta). Em caso de falha transitória (ERROS_REPETIVEIS),
+      tenta novamente até COLETA_TENTATIVAS vezes, com espera crescente, a partir do último checkpoint.
+      Cada tentativa que falha é registrada no disjuntor, e as novas tentativas respeitam o seu estado.
+    - Remove o progresso salvo quando a consulta é concluída.
 
-            dados_pessoa["screenshot_base64"] = screenshot_base64
+    Cada etapa é medida (spans e métricas, ver metricas_service).
+    """
+    search_data = classificar_e_estruturar_identificador(identificador)
+    checkpoint = await checkpoints_consultas.abrir(chave_consulta(identificador, aplicar_filtro_social, incluir_screenshot))
 
-            return dados_pessoa
+    if checkpoint.retomado:
+        print(f"Retomando a consulta {identificador} a partir do progresso salvo.")
+
+    async with medir_consulta(tipo=search_data["tipo"], filtro_social=aplicar_filtro_social):
+        for tentativa in range(1, COLETA_TENTATIVAS + 1):
+            try:
+                dados_pessoa = await _executar_consulta(search_data, aplicar_filtro_social, incluir_screenshot, checkpoint)
+                if tentativa > 1:
+                    governador_portal.disjuntor.registrar()
+                break
+            except ERROS_REPETIVEIS as e:
+                if tentativa == COLETA_TENTATIVAS:
+                    dados_parciais = checkpoint.resultado_parcial(e) if permitir_resultado_parcial else None
+                    if dados_parciais is None:
+                        raise
+                    return await _persistir(dados_parciais, await checkpoint.screenshot() if incluir_screenshot else None)
+
+                espera = COLETA_RECUO_INICIAL_SEGUNDOS * 2 ** (tentativa - 1)
+                print(f"Tentativa {tentativa} da consulta {identificador} falhou ({type(e).__name__}: {e}). Nova tentativa em {espera:.0f} s.")
+                await asyncio.sleep(espera)
+
+                # A tentativa que falhou é registrada antes da nova verificação: se esta consulta for a de teste
+                # do disjuntor meio aberto, ele volta a abrir e a nova tentativa falha com CircuitoAberto
+                governador_portal.disjuntor.registrar(e)
+                governador_portal.disjuntor.verificar()
+
+    await checkpoints_consultas.remover(checkpoint)
+    return dados_pessoa
+
+async def _executar_consulta(search_data, aplicar_filtro_social, incluir_screenshot, checkpoint):
+    """
+    Executa uma tentativa da consulta ao portal, pulando as etapas já registradas no checkpoint.
+
+    Funcionamento:
+    - Aguarda uma vaga no limite adaptativo de consultas simultâneas ao portal (ver GovernadorPortal).
+    - Obtém um contexto novo de um navegador do pool compartilhado (ver PoolNavegadores).
+    - Aplica a política de bloqueio de recursos e mede o tráfego da consulta (ver MonitorRede).
+    - Cria uma instância da classe PortalPage que possui métodos que executam ações na página.
+    - Executa a busca da pessoa física (se a URL da pessoa ainda não foi registrada) e coleta os dados.
+    - Salva localmente os dados em arquivo JSON e a captura de tela, uma única vez, no backend de
+      armazenamento de artefatos (ver armazenamento_service).
+    - Retorna os dados coletados.
+    """
+    from pages.portal_page import PortalPage
+
+    identificador = search_data["identificador"]
+
+    async with governador_portal.consulta(), pool_navegadores.contexto() as context:
+        monitor_rede = MonitorRede()
+        await monitor_rede.instalar(context)
+        pagina_portal = PortalPage(await context.new_page(), pool_navegadores.sessao_aquecida, monitor_rede)
+
+        try:
+            if checkpoint.url_pessoa is None:
+                async with etapa("busca", tipo=search_data["tipo"]):
+                    url_resultado = await pagina_portal.buscar_pessoa_fisica(search_data, aplicar_filtro_social)
+                await checkpoint.registrar_url_pessoa(url_resultado, pagina_portal.candidatos_nome)
+            else:
+                url_resultado = checkpoint.url_pessoa
+                pagina_portal.candidatos_nome = checkpoint.candidatos_nome
+
+            formato_screenshot, qualidade_screenshot = opcoes_screenshot()
+            async with etapa("coleta"):
+                dados_pessoa, screenshot_bytes = await pagina_portal.coletar_dados_pessoa_fisica(
+                    url_resultado, incluir_screenshot, formato_screenshot, qualidade_screenshot, checkpoint
+                )
+
+            # Na busca por nome, informa a pontuação do nome escolhido e os demais candidatos
+            if pagina_portal.candidatos_nome:
+                dados_pessoa["correspondencia_nome"] = {
+                    "pontuacao": pagina_portal.candidatos_nome[0]["pontuacao"],
+                    "candidatos": [
+                        {"nome": c["nome"], "pontuacao": c["pontuacao"]} for c in pagina_portal.candidatos_nome
+                    ],
+                }
+
+            return await _persistir(dados_pessoa, screenshot_bytes)
 
         except TempoLimiteExcedido:
             raise
@@ -96,25 +306,108 @@ async def consultar_dados_pessoa_fisica(identificador, aplicar_filtro_social=Fal
         except Exception as e:
             raise ErroInesperadoDuranteConsulta(f"Erro inesperado: {e}")
         finally:
-            await context.close()
-            await browser.close()
+            totais_rede.acumular(monitor_rede)
+            resumo_rede = monitor_rede.resumo()
+            print(
+                f"Tráfego da consulta {identificador}: {resumo_rede['bytes_transferidos'] / 1024:.1f} KB, "
+                f"{resumo_rede['requisicoes']} requisições, {resumo_rede['requisicoes_bloqueadas']} bloqueadas, "
+                f"{resumo_rede['tempo_carregamento_segundos']} s de carregamento"
+            )
+
+async def _persistir(dados_pessoa, screenshot_bytes):
+    """
+    Salva a captura de tela no backend de artefatos, os dados em arquivo JSON e na base analítica.
+
+    Resultados parciais não sobrescrevem o arquivo JSON de uma consulta completa anterior.
+    """
+    formato_screenshot, _ = opcoes_screenshot()
+
+    async with etapa("persistencia"):
+        if screenshot_bytes is not None:
+            screenshot_bytes, extensao = converter_screenshot(screenshot_bytes, formato_screenshot)
+            id_screenshot = await armazenamento.salvar(screenshot_bytes, extensao)
+            dados_pessoa["screenshot"] = {
+                "id": id_screenshot,
+                "url": f"/artefatos/{id_screenshot}",
+                "tamanho_bytes": len(screenshot_bytes),
+            }
+
+        if dados_pessoa.get("incompleto"):
+            return dados_pessoa
+
+        path_pessoa = f"{PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA}/{chave_pessoa(dados_pessoa)}"
+        os.makedirs(path_pessoa, exist_ok=True)
+
+        # Salva os dados JSON
+        with open(f"{path_pessoa}/dados.json", "w", encoding="utf-8") as f:
+            json.dump(dados_pessoa, f, indent=4, ensure_ascii=False)
+
+        # Normaliza os recebimentos e recursos na base analítica
+        await repositorio_analitico.ingerir(dados_pessoa)
+
+    return dados_pessoa
+
+def cpf_valido(numeros: str):
+    """
+    Verifica os dois dígitos verificadores de um CPF (11 dígitos). Sequências de um único dígito são inválidas.
+    """
+    if len(numeros) != 11 or len(set(numeros)) == 1:
+        return False
+
+    digitos = [int(c) for c in numeros]
+
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        resto = soma * 10 % 11
+        if (0 if resto == 10 else resto) != digitos[tamanho]:
+            return False
+
+    return True
+
+def nis_valido(numeros: str):
+    """
+    Verifica o dígito verificador de um NIS/PIS/PASEP (11 dígitos). Sequências de um único dígito são inválidas.
+    """
+    if len(numeros) != 11 or len(set(numeros)) == 1:
+        return False
+
+    digitos = [int(c) for c in numeros]
+    resto = sum(d * peso for d, peso in zip(digitos, (3, 2, 9, 8, 7, 6, 5, 4, 3, 2))) % 11
+    return (0 if resto < 2 else 11 - resto) == digitos[10]
 
 def classificar_e_estruturar_identificador(identificador: str):
     """
     Classifica o identificador recebido como 'nome' ou 'nis/cpf'.
 
     Funcionamento:
-    - Se o identificador contiver 11 dígitos, é classificado como 'nis/cpf'.
-    - Caso contrário, 'nome'.
+    - Se o identificador contiver 11 dígitos, é classificado como 'nis/cpf', desde que os dígitos
+      verificadores sejam válidos para um CPF ou para um NIS (somente CPF ou somente NIS quando
+      informado com a máscara de um deles).
+    - Se contiver letras, 'nome'.
+    - Caso contrário (ex: número com mais ou menos de 11 dígitos), é inválido.
 
     Retorna:
     - dict com chaves "identificador" (string) e "tipo" (string).
+
+    Levanta:
+    - IdentificadorInvalido: se o identificador não for um nome nem um CPF ou NIS válido.
     """
     tipo = "nome"
     numeros = ''.join(c for c in identificador if c.isdigit())
-    
+
     if len(numeros) == 11:
+        if FORMATO_CPF.match(identificador):
+            valido = cpf_valido(numeros)
+        elif FORMATO_NIS.match(identificador):
+            valido = nis_valido(numeros)
+        else:
+            valido = cpf_valido(numeros) or nis_valido(numeros)
+
+        if not valido:
+            raise IdentificadorInvalido(f"O identificador {identificador} não é um CPF ou NIS válido (dígitos verificadores incorretos).")
         tipo = "nis/cpf"
+    elif not any(c.isalpha() for c in identificador):
+        raise IdentificadorInvalido(f"O identificador {identificador} não é um nome nem um CPF ou NIS com 11 dígitos.")
 
     return {
         "identificador": identificador,
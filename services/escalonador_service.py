@@ -0,0 +1,334 @@
+import asyncio
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager
+
+from config.configuracoes import configuracoes
+from exceptions.scraping_exceptions import CapacidadeEsgotada, CotaExcedida
+from services.governador_service import governador_portal
+from services.metricas_service import ESCALONADOR_ESPERA, ESCALONADOR_REJEICOES
+
+ESCALONADOR_MAX_SIMULTANEAS = configuracoes.escalonador_max_simultaneas or configuracoes.governador_concorrencia_maxima
+ESCALONADOR_MAX_LOTE_SIMULTANEAS = configuracoes.escalonador_max_lote_simultaneas or max(1, ESCALONADOR_MAX_SIMULTANEAS - 1)
+ESCALONADOR_MAX_SIMULTANEAS_POR_CLIENTE = configuracoes.escalonador_max_simultaneas_por_cliente
+ESCALONADOR_COTA_CONSULTAS_POR_HORA = configuracoes.escalonador_cota_consultas_por_hora
+ESCALONADOR_MAX_FILA = configuracoes.escalonador_max_fila
+ESCALONADOR_TEMPO_MAXIMO_FILA = configuracoes.escalonador_tempo_maximo_fila
+ESCALONADOR_PESOS_CLIENTES = configuracoes.escalonador_pesos_clientes
+
+PRIORIDADE_INTERATIVA = "interativa"
+PRIORIDADE_LOTE = "lote"
+PRIORIDADES = (PRIORIDADE_INTERATIVA, PRIORIDADE_LOTE)
+
+CLIENTE_INTERNO = "interno"
+JANELA_COTA_SEGUNDOS = 3600
+INTERVALO_LIMPEZA_CLIENTES_SEGUNDOS = 60
+AMOSTRAS_ESPERA = 500
+
+
+def identificar_cliente(user):
+    """
+    Identifica o cliente pelo payload do token: o `azp` (aplicação que solicitou o token) ou, na sua ausência, o `sub`.
+
+    Retorna:
+    - str com o identificador do cliente ("local" quando a autenticação está desativada).
+    """
+    if not user:
+        return "local"
+    return user.get("azp") or user.get("sub") or "anonimo"
+
+
+def _ler_pesos(texto):
+    pesos = {}
+    for item in texto.split(","):
+        if "=" in item:
+            cliente, peso = item.rsplit("=", 1)
+            pesos[cliente.strip()] = max(float(peso), 0.01)
+    return pesos
+
+
+def _percentil(amostras, percentil):
+    if not amostras:
+        return None
+    ordenadas = sorted(amostras)
+    return round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * percentil))], 3)
+
+
+class _Pedido:
+    def __init__(self, cliente, prioridade, etiqueta):
+        self.cliente = cliente
+        self.prioridade = prioridade
+        self.etiqueta = etiqueta
+        self.vaga = asyncio.get_running_loop().create_future()
+        self.enfileirado_em = time.monotonic()
+        self.cobrado_em = None
+
+
+class _Cliente:
+    def __init__(self, peso):
+        self.peso = peso
+        self.em_execucao = 0
+        self.aguardando = 0
+        self.ultima_etiqueta = {prioridade: 0.0 for prioridade in PRIORIDADES}
+        self.consultas_recentes = deque()
+
+
+class EscalonadorConsultas:
+    """
+    Decide a ordem em que as consultas ao portal são executadas quando não há vagas para todas.
+
+    Funcionamento:
+    - Classes de prioridade: consultas interativas são sempre liberadas antes das de lote, e as de lote
+      ocupam no máximo ESCALONADOR_MAX_LOTE_SIMULTANEAS vagas, de modo que uma consulta interativa nunca
+      espera o término de um lote inteiro.
+    - As vagas acompanham o limite adaptativo de consultas simultâneas do governador (ver GovernadorPortal):
+      quando o portal fica lento e o limite cai, o escalonador libera menos vagas (mantendo as reservadas às
+      interativas), de modo que as consultas liberadas não aguardam na fila do governador, por ordem de chegada,
+      à frente das interativas.
+    - Dentro de cada classe, as vagas são divididas entre os clientes por enfileiramento justo ponderado
+      (weighted fair queuing): cada pedido recebe uma etiqueta de término virtual (1/peso após o último
+      pedido do mesmo cliente) e é liberado o pedido com a menor etiqueta. Um cliente com muitos pedidos
+      não atrasa os clientes com poucos.
+    - Cada cliente tem um limite de consultas simultâneas e, opcionalmente, uma cota por hora (CotaExcedida).
+      A cota é cobrada no enfileiramento e devolvida se o pedido desistir da vaga (tempo esgotado ou cancelamento).
+    - Clientes sem consultas em execução, aguardando ou contadas na cota são descartados, para que o estado
+      não cresça com cada cliente que já usou a API.
+    - A espera de cada consulta é registrada por classe (histograma e p95 em `estatisticas`).
+    """
+
+    def __init__(
+        self,
+        max_simultaneas=ESCALONADOR_MAX_SIMULTANEAS,
+        max_lote_simultaneas=ESCALONADOR_MAX_LOTE_SIMULTANEAS,
+        max_simultaneas_por_cliente=ESCALONADOR_MAX_SIMULTANEAS_POR_CLIENTE,
+        cota_por_hora=ESCALONADOR_COTA_CONSULTAS_POR_HORA,
+        max_fila=ESCALONADOR_MAX_FILA,
+        tempo_maximo_fila=ESCALONADOR_TEMPO_MAXIMO_FILA,
+        pesos=None,
+        governador=None,
+    ):
+        self.max_simultaneas = max(1, max_simultaneas)
+        self.max_lote_simultaneas = max(1, min(max_lote_simultaneas, self.max_simultaneas))
+        self.max_simultaneas_por_cliente = max(1, max_simultaneas_por_cliente)
+        self.cota_por_hora = cota_por_hora
+        self.max_fila = max_fila
+        self.tempo_maximo_fila = tempo_maximo_fila
+        self.pesos = _ler_pesos(ESCALONADOR_PESOS_CLIENTES) if pesos is None else pesos
+        self.governador = governador
+        self._clientes = {}
+        self._ultima_limpeza = time.monotonic()
+        self._aguardando = {prioridade: [] for prioridade in PRIORIDADES}
+        self._em_execucao = {prioridade: 0 for prioridade in PRIORIDADES}
+        self._tempo_virtual = {prioridade: 0.0 for prioridade in PRIORIDADES}
+        self._esperas = {prioridade: deque(maxlen=AMOSTRAS_ESPERA) for prioridade in PRIORIDADES}
+        self.rejeicoes = {"fila_cheia": 0, "tempo_esgotado": 0, "cota": 0}
+
+    @asynccontextmanager
+    async def vaga(self, cliente=None, prioridade=PRIORIDADE_INTERATIVA):
+        """
+        Aguarda a vez do cliente na sua classe de prioridade e reserva uma vaga para a consulta.
+
+        Levanta:
+        - CotaExcedida: se o cliente atingiu a cota de consultas da última hora.
+        - CapacidadeEsgotada: se a fila estiver cheia ou uma consulta interativa esperar mais que
+          ESCALONADOR_TEMPO_MAXIMO_FILA.
+        """
+        cliente = cliente or CLIENTE_INTERNO
+        prioridade = prioridade if prioridade in PRIORIDADES else PRIORIDADE_INTERATIVA
+
+        pedido = await self._adquirir(cliente, prioridade)
+        try:
+            yield
+        finally:
+            self._liberar(pedido)
+
+    def _cliente(self, cliente):
+        if cliente not in self._clientes:
+            self._clientes[cliente] = _Cliente(self.pesos.get(cliente, 1.0))
+        return self._clientes[cliente]
+
+    def _descartar_consultas_antigas(self, cliente, agora):
+        while cliente.consultas_recentes and agora - cliente.consultas_recentes[0] > JANELA_COTA_SEGUNDOS:
+            cliente.consultas_recentes.popleft()
+
+    def _descartar_se_inativo(self, nome_cliente, agora):
+        cliente = self._clientes.get(nome_cliente)
+        if cliente is None or cliente.em_execucao or cliente.aguardando:
+            return
+
+        self._descartar_consultas_antigas(cliente, agora)
+        if not cliente.consultas_recentes:
+            del self._clientes[nome_cliente]
+
+    def _limpar_clientes_inativos(self):
+        agora = time.monotonic()
+        if agora - self._ultima_limpeza < INTERVALO_LIMPEZA_CLIENTES_SEGUNDOS:
+            return
+
+        self._ultima_limpeza = agora
+        for nome_cliente in list(self._clientes):
+            self._descartar_se_inativo(nome_cliente, agora)
+
+    def _verificar_cota(self, nome_cliente, cliente):
+        """
+        Cobra uma consulta da cota do cliente.
+
+        Retorna:
+        - O instante da cobrança (para devolvê-la se o pedido desistir da vaga) ou None se não há cota.
+        """
+        if self.cota_por_hora <= 0:
+            return None
+
+        agora = time.monotonic()
+        self._descartar_consultas_antigas(cliente, agora)
+
+        if len(cliente.consultas_recentes) >= self.cota_por_hora:
+            self._rejeitar("cota")
+            retry_after = int(JANELA_COTA_SEGUNDOS - (agora - cliente.consultas_recentes[0])) + 1
+            raise CotaExcedida(
+                f"Cota de {self.cota_por_hora} consultas por hora do cliente {nome_cliente} atingida.",
+                retry_after=retry_after
+            )
+
+        cliente.consultas_recentes.append(agora)
+        return agora
+
+    def _devolver_cota(self, pedido):
+        if pedido.cobrado_em is not None:
+            try:
+                self._clientes[pedido.cliente].consultas_recentes.remove(pedido.cobrado_em)
+            except ValueError:
+                pass
+
+    def _rejeitar(self, motivo):
+        self.rejeicoes[motivo] += 1
+        ESCALONADOR_REJEICOES.labels(motivo=motivo).inc()
+
+    async def _adquirir(self, nome_cliente, prioridade):
+        if sum(len(pedidos) for pedidos in self._aguardando.values()) >= self.max_fila:
+            self._rejeitar("fila_cheia")
+            raise CapacidadeEsgotada("Fila de consultas ao portal cheia. Tente novamente mais tarde.")
+
+        self._limpar_clientes_inativos()
+        cliente = self._cliente(nome_cliente)
+        try:
+            cobrado_em = self._verificar_cota(nome_cliente, cliente)
+        except CotaExcedida:
+            self._descartar_se_inativo(nome_cliente, time.monotonic())
+            raise
+
+        # Etiqueta de término virtual: o pedido "termina" 1/peso depois do último pedido do cliente
+        # ou do instante virtual atual da classe, o que for maior
+        etiqueta = max(self._tempo_virtual[prioridade], cliente.ultima_etiqueta[prioridade]) + 1 / cliente.peso
+        cliente.ultima_etiqueta[prioridade] = etiqueta
+
+        pedido = _Pedido(nome_cliente, prioridade, etiqueta)
+        pedido.cobrado_em = cobrado_em
+        self._aguardando[prioridade].append(pedido)
+        cliente.aguardando += 1
+        self._despachar()
+
+        tempo_maximo = self.tempo_maximo_fila if prioridade == PRIORIDADE_INTERATIVA else None
+
+        try:
+            await asyncio.wait_for(asyncio.shield(pedido.vaga), tempo_maximo)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if pedido.vaga.done():
+                # A vaga foi concedida no mesmo instante: devolve-a
+                self._devolver_cota(pedido)
+                self._liberar(pedido)
+            else:
+                # O pedido desistiu antes de ser atendido: a consulta não conta na cota
+                pedido.vaga.cancel()
+                self._aguardando[prioridade].remove(pedido)
+                cliente.aguardando -= 1
+                self._devolver_cota(pedido)
+                self._descartar_se_inativo(nome_cliente, time.monotonic())
+
+            if isinstance(e, asyncio.TimeoutError):
+                self._rejeitar("tempo_esgotado")
+                raise CapacidadeEsgotada("Tempo máximo de espera por uma vaga de consulta ao portal excedido.")
+            raise
+
+        espera = time.monotonic() - pedido.enfileirado_em
+        self._esperas[prioridade].append(espera)
+        ESCALONADOR_ESPERA.labels(prioridade=prioridade).observe(espera)
+        return pedido
+
+    def _liberar(self, pedido):
+        self._em_execucao[pedido.prioridade] -= 1
+        self._clientes[pedido.cliente].em_execucao -= 1
+        self._despachar()
+        self._descartar_se_inativo(pedido.cliente, time.monotonic())
+
+    def _limites(self):
+        """
+        Retorna as vagas atuais (total e de lote), reduzidas junto com o limite adaptativo do governador.
+        As vagas reservadas às consultas interativas são mantidas enquanto houver vagas suficientes.
+        """
+        if self.governador is None:
+            return self.max_simultaneas, self.max_lote_simultaneas
+
+        max_simultaneas = max(1, min(self.max_simultaneas, int(self.governador.limite)))
+        reservadas_interativas = self.max_simultaneas - self.max_lote_simultaneas
+        return max_simultaneas, max(1, min(self.max_lote_simultaneas, max_simultaneas - reservadas_interativas))
+
+    def _proximo_pedido(self, prioridade, max_lote_simultaneas):
+        if prioridade == PRIORIDADE_LOTE and self._em_execucao[PRIORIDADE_LOTE] >= max_lote_simultaneas:
+            return None
+
+        elegiveis = [
+            pedido for pedido in self._aguardando[prioridade]
+            if self._clientes[pedido.cliente].em_execucao < self.max_simultaneas_por_cliente
+        ]
+        return min(elegiveis, key=lambda pedido: pedido.etiqueta, default=None)
+
+    def _despachar(self):
+        max_simultaneas, max_lote_simultaneas = self._limites()
+
+        while sum(self._em_execucao.values()) < max_simultaneas:
+            pedido = None
+            for prioridade in PRIORIDADES:
+                pedido = self._proximo_pedido(prioridade, max_lote_simultaneas)
+                if pedido is not None:
+                    break
+
+            if pedido is None:
+                return
+
+            self._aguardando[pedido.prioridade].remove(pedido)
+            self._tempo_virtual[pedido.prioridade] = pedido.etiqueta
+            self._em_execucao[pedido.prioridade] += 1
+            self._clientes[pedido.cliente].em_execucao += 1
+            self._clientes[pedido.cliente].aguardando -= 1
+            pedido.vaga.set_result(None)
+
+    def estatisticas(self):
+        max_simultaneas, max_lote_simultaneas = self._limites()
+        return {
+            "max_simultaneas": max_simultaneas,
+            "max_lote_simultaneas": max_lote_simultaneas,
+            "por_prioridade": {
+                prioridade: {
+                    "em_execucao": self._em_execucao[prioridade],
+                    "aguardando": len(self._aguardando[prioridade]),
+                    "espera_p50_segundos": _percentil(self._esperas[prioridade], 0.5),
+                    "espera_p95_segundos": _percentil(self._esperas[prioridade], 0.95),
+                }
+                for prioridade in PRIORIDADES
+            },
+            "por_cliente": {
+                nome: {
+                    "peso": cliente.peso,
+                    "em_execucao": cliente.em_execucao,
+                    "aguardando": cliente.aguardando,
+                    "consultas_ultima_hora": len(cliente.consultas_recentes) if self.cota_por_hora > 0 else None,
+                }
+                for nome, cliente in self._clientes.items()
+            },
+            "rejeicoes": dict(self.rejeicoes),
+        }
+
+
+escalonador_consultas = EscalonadorConsultas(governador=governador_portal)
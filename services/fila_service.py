@@ -0,0 +1,435 @@
+import asyncio
+import json
+import time
+import uuid
+
+from config.configuracoes import configuracoes
+from exceptions import scraping_exceptions
+from exceptions.scraping_exceptions import (
+    CapacidadeEsgotada,
+    ErroConsultaPortal,
+    ErroInesperadoDuranteConsulta,
+    TempoLimiteExcedido
+)
+
+FILA_BACKEND = configuracoes.fila_backend
+REDIS_URL = configuracoes.redis_url
+FILA_PREFIXO = configuracoes.fila_prefixo
+FILA_VISIBILIDADE_SEGUNDOS = configuracoes.fila_visibilidade_segundos
+FILA_MAX_TENTATIVAS = configuracoes.fila_max_tentativas
+FILA_MAX_PENDENTES = configuracoes.fila_max_pendentes
+FILA_TEMPO_MAXIMO_RESULTADO_SEGUNDOS = configuracoes.fila_tempo_maximo_resultado_segundos
+
+INTERVALO_CONSULTA_REDIS_SEGUNDOS = 0.5
+ATRIBUTOS_ERRO = ("retry_after", "candidatos") # Atributos das exceções repassados do worker para a API
+
+
+def resultado_de_sucesso(dados):
+    return {"dados": dados}
+
+
+def resultado_de_erro(erro):
+    """
+    Monta o resultado de uma consulta que falhou, preservando a classe da exceção (e os atributos
+    retry_after de CircuitoAberto e CotaExcedida e candidatos de NomeNaoEncontrado) para que a API
+    possa recriá-la e responder da mesma forma.
+    """
+    if isinstance(erro, ErroConsultaPortal):
+        resultado = {"erro": str(erro), "tipo_erro": type(erro).__name__}
+        for atributo in ATRIBUTOS_ERRO:
+            if getattr(erro, atributo, None) is not None:
+                resultado[atributo] = getattr(erro, atributo)
+        return resultado
+
+    return {"erro": f"Erro inesperado: {erro}", "tipo_erro": ErroInesperadoDuranteConsulta.__name__}
+
+
+def _levantar_erro(resultado):
+    tipo_erro = getattr(scraping_exceptions, resultado["tipo_erro"], None)
+
+    if not (isinstance(tipo_erro, type) and issubclass(tipo_erro, ErroConsultaPortal)):
+        tipo_erro = ErroInesperadoDuranteConsulta
+
+    erro = tipo_erro(resultado["erro"])
+    for atributo in ATRIBUTOS_ERRO:
+        if atributo in resultado:
+            setattr(erro, atributo, resultado[atributo])
+    raise erro
+
+
+class _FilaBase:
+    """
+    Operações comuns aos backends da fila de consultas.
+
+    Ciclo de uma consulta:
+    - A API chama `enfileirar` e aguarda com `aguardar_resultado`.
+    - Um worker chama `reservar`, que retorna a consulta com um token de reserva válido por
+      FILA_VISIBILIDADE_SEGUNDOS; durante a execução o worker chama `renovar` periodicamente.
+    - Ao terminar, o worker chama `concluir`, que entrega o resultado a quem aguarda.
+    - Reservas vencidas (worker que caiu) voltam à fila em `recuperar_expiradas`; após
+      FILA_MAX_TENTATIVAS reservas a consulta é finalizada com erro.
+    """
+
+    async def consultar(self, parametros, tempo_maximo=FILA_TEMPO_MAXIMO_RESULTADO_SEGUNDOS):
+        """
+        Enfileira uma consulta e aguarda o resultado produzido por um worker.
+
+        Parâmetros:
+        - parametros (dict): argumentos de `consultar_dados_pessoa_fisica`.
+        - tempo_maximo (int): tempo (s) máximo de espera pelo resultado.
+
+        Retorna:
+        - dict com os dados da pessoa física.
+
+        Levanta:
+        - CapacidadeEsgotada: se a fila estiver cheia.
+        - TempoLimiteExcedido: se nenhum worker entregar o resultado a tempo.
+        - A mesma exceção de consulta levantada no worker.
+        """
+        id_consulta = await self.enfileirar(parametros)
+        resultado = await self.aguardar_resultado(id_consulta, tempo_maximo)
+
+        if resultado is None:
+            raise TempoLimiteExcedido("Tempo de espera pelo resultado da consulta excedido.")
+
+        if "erro" in resultado:
+            _levantar_erro(resultado)
+
+        return resultado["dados"]
+
+
+class FilaMemoria(_FilaBase):
+    """
+    Fila de consultas em memória, com a mesma semântica de reserva da fila Redis.
+
+    Atende somente workers no mesmo processo da API; útil para desenvolvimento local e para
+    validar o fluxo da fila sem um Redis.
+    """
+
+    def __init__(self, visibilidade=FILA_VISIBILIDADE_SEGUNDOS, max_tentativas=FILA_MAX_TENTATIVAS, max_pendentes=FILA_MAX_PENDENTES):
+        self.visibilidade = visibilidade
+        self.max_tentativas = max_tentativas
+        self.max_pendentes = max_pendentes
+        self._pendentes = asyncio.Queue()
+        self._consultas = {}
+        self._reservas = {}
+        self._resultados = {}
+
+    async def enfileirar(self, parametros):
+        if self._pendentes.qsize() >= self.max_pendentes:
+            raise CapacidadeEsgotada("Fila de consultas cheia. Tente novamente mais tarde.")
+
+        id_consulta = uuid.uuid4().hex
+        self._consultas[id_consulta] = {"parametros": parametros, "tentativas": 0}
+        self._resultados[id_consulta] = asyncio.get_running_loop().create_future()
+        self._pendentes.put_nowait(id_consulta)
+        return id_consulta
+
+    async def reservar(self, tempo_espera):
+        try:
+            id_consulta = await asyncio.wait_for(self._pendentes.get(), tempo_espera)
+        except asyncio.TimeoutError:
+            return None
+
+        consulta = self._consultas.get(id_consulta)
+        if consulta is None:
+            return None
+
+        consulta["tentativas"] += 1
+        token = uuid.uuid4().hex
+        self._reservas[id_consulta] = (token, time.time() + self.visibilidade)
+        return id_consulta, consulta["parametros"], token
+
+    async def renovar(self, id_consulta, token):
+        reserva = self._reservas.get(id_consulta)
+        if reserva is None or reserva[0] != token:
+            return False
+
+        self._reservas[id_consulta] = (token, time.time() + self.visibilidade)
+        return True
+
+    async def concluir(self, id_consulta, token, resultado):
+        reserva = self._reservas.get(id_consulta)
+        if reserva is None or reserva[0] != token:
+            return False
+
+        del self._reservas[id_consulta]
+        self._entregar(id_consulta, resultado)
+        return True
+
+    async def devolver(self, id_consulta, token):
+        reserva = self._reservas.get(id_consulta)
+        if reserva is None or reserva[0] != token:
+            return False
+
+        del self._reservas[id_consulta]
+        self._pendentes.put_nowait(id_consulta)
+        return True
+
+    async def recuperar_expiradas(self):
+        agora = time.time()
+        recuperadas = 0
+
+        for id_consulta, (_, prazo) in list(self._reservas.items()):
+            if prazo > agora:
+                continue
+
+            del self._reservas[id_consulta]
+            if self._consultas[id_consulta]["tentativas"] >= self.max_tentativas:
+                self._entregar(id_consulta, _resultado_tentativas_esgotadas())
+            else:
+                self._pendentes.put_nowait(id_consulta)
+                recuperadas += 1
+
+        return recuperadas
+
+    async def aguardar_resultado(self, id_consulta, tempo_maximo):
+        resultado = self._resultados[id_consulta]
+        try:
+            return await asyncio.wait_for(asyncio.shield(resultado), tempo_maximo)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if resultado.done():
+                self._resultados.pop(id_consulta, None)
+
+    def _entregar(self, id_consulta, resultado):
+        self._consultas.pop(id_consulta, None)
+        futuro = self._resultados.get(id_consulta)
+
+        if futuro is not None and not futuro.done():
+            futuro.set_result(resultado)
+
+    async def estatisticas(self):
+        return {
+            "backend": "memoria",
+            "pendentes": self._pendentes.qsize(),
+            "em_execucao": len(self._reservas),
+        }
+
+    async def fechar(self):
+        pass
+
+
+# Scripts Lua executados de forma atômica no Redis (reserva, renovação, conclusão e recuperação)
+SCRIPT_RESERVAR = """
+local id = redis.call('RPOP', KEYS[1])
+if not id then return nil end
+redis.call('ZADD', KEYS[2], ARGV[1], id)
+redis.call('HSET', KEYS[3], id, ARGV[2])
+redis.call('HINCRBY', KEYS[4], id, 1)
+local parametros = redis.call('HGET', KEYS[5], id)
+if not parametros then
+    -- Consulta sem parâmetros (ex: já finalizada): descartada
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HDEL', KEYS[3], id)
+    redis.call('HDEL', KEYS[4], id)
+    return {id, false}
+end
+return {id, parametros}
+"""
+
+SCRIPT_RENOVAR = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+SCRIPT_CONCLUIR = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+redis.call('RPUSH', KEYS[5], ARGV[3])
+redis.call('EXPIRE', KEYS[5], ARGV[4])
+return 1
+"""
+
+SCRIPT_DEVOLVER = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return 1
+"""
+
+SCRIPT_RECUPERAR_EXPIRADAS = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local esgotadas = {}
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('HDEL', KEYS[2], id)
+    if tonumber(redis.call('HGET', KEYS[4], id) or '0') >= tonumber(ARGV[2]) then
+        table.insert(esgotadas, id)
+    else
+        redis.call('RPUSH', KEYS[3], id)
+    end
+end
+return {#ids - #esgotadas, esgotadas}
+"""
+
+
+class FilaRedis(_FilaBase):
+    """
+    Fila de consultas compartilhada via Redis, consumida por workers em qualquer processo ou nó.
+
+    Requer o pacote `redis`. Estrutura das chaves (com o prefixo FILA_PREFIXO):
+    - pendentes (lista): ids aguardando um worker.
+    - processando (sorted set): ids reservados, com o prazo da reserva como score.
+    - reservas (hash): token da reserva atual de cada id.
+    - tentativas (hash): quantidade de reservas de cada id.
+    - consultas (hash): parâmetros de cada consulta.
+    - resultado:<id> (lista): resultado entregue a quem aguarda (BLPOP).
+    """
+
+    def __init__(
+        self,
+        url=REDIS_URL,
+        prefixo=FILA_PREFIXO,
+        visibilidade=FILA_VISIBILIDADE_SEGUNDOS,
+        max_tentativas=FILA_MAX_TENTATIVAS,
+        max_pendentes=FILA_MAX_PENDENTES,
+    ):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("O backend de fila Redis requer o pacote redis (pip install redis).")
+
+        self.visibilidade = visibilidade
+        self.max_tentativas = max_tentativas
+        self.max_pendentes = max_pendentes
+        self.tempo_retencao_resultado = FILA_TEMPO_MAXIMO_RESULTADO_SEGUNDOS
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+
+        self._chave_pendentes = f"{prefixo}:pendentes"
+        self._chave_processando = f"{prefixo}:processando"
+        self._chave_reservas = f"{prefixo}:reservas"
+        self._chave_tentativas = f"{prefixo}:tentativas"
+        self._chave_consultas = f"{prefixo}:consultas"
+        self._prefixo_resultado = f"{prefixo}:resultado:"
+
+        self._reservar = self._redis.register_script(SCRIPT_RESERVAR)
+        self._renovar = self._redis.register_script(SCRIPT_RENOVAR)
+        self._concluir = self._redis.register_script(SCRIPT_CONCLUIR)
+        self._devolver = self._redis.register_script(SCRIPT_DEVOLVER)
+        self._recuperar_expiradas = self._redis.register_script(SCRIPT_RECUPERAR_EXPIRADAS)
+
+    async def enfileirar(self, parametros):
+        if await self._redis.llen(self._chave_pendentes) >= self.max_pendentes:
+            raise CapacidadeEsgotada("Fila de consultas cheia. Tente novamente mais tarde.")
+
+        id_consulta = uuid.uuid4().hex
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._chave_consultas, id_consulta, json.dumps(parametros, ensure_ascii=False))
+            pipe.lpush(self._chave_pendentes, id_consulta)
+            await pipe.execute()
+
+        return id_consulta
+
+    async def reservar(self, tempo_espera):
+        limite = time.monotonic() + tempo_espera
+        token = uuid.uuid4().hex
+
+        while True:
+            reserva = await self._reservar(
+                keys=[self._chave_pendentes, self._chave_processando, self._chave_reservas,
+                      self._chave_tentativas, self._chave_consultas],
+                args=[time.time() + self.visibilidade, token],
+            )
+
+            if reserva is not None:
+                id_consulta, parametros = reserva
+                if parametros is None:
+                    continue
+                return id_consulta, json.loads(parametros), token
+
+            if time.monotonic() >= limite:
+                return None
+
+            await asyncio.sleep(INTERVALO_CONSULTA_REDIS_SEGUNDOS)
+
+    async def renovar(self, id_consulta, token):
+        renovada = await self._renovar(
+            keys=[self._chave_processando, self._chave_reservas],
+            args=[id_consulta, token, time.time() + self.visibilidade],
+        )
+        return bool(renovada)
+
+    async def concluir(self, id_consulta, token, resultado):
+        concluida = await self._concluir(
+            keys=[self._chave_processando, self._chave_reservas, self._chave_tentativas,
+                  self._chave_consultas, f"{self._prefixo_resultado}{id_consulta}"],
+            args=[id_consulta, token, json.dumps(resultado, ensure_ascii=False), self.tempo_retencao_resultado],
+        )
+        return bool(concluida)
+
+    async def devolver(self, id_consulta, token):
+        devolvida = await self._devolver(
+            keys=[self._chave_processando, self._chave_reservas, self._chave_pendentes],
+            args=[id_consulta, token],
+        )
+        return bool(devolvida)
+
+    async def recuperar_expiradas(self):
+        recuperadas, esgotadas = await self._recuperar_expiradas(
+            keys=[self._chave_processando, self._chave_reservas, self._chave_pendentes, self._chave_tentativas],
+            args=[time.time(), self.max_tentativas],
+        )
+
+        for id_consulta in esgotadas:
+            chave_resultado = f"{self._prefixo_resultado}{id_consulta}"
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.hdel(self._chave_consultas, id_consulta)
+                pipe.hdel(self._chave_tentativas, id_consulta)
+                pipe.rpush(chave_resultado, json.dumps(_resultado_tentativas_esgotadas(), ensure_ascii=False))
+                pipe.expire(chave_resultado, self.tempo_retencao_resultado)
+                await pipe.execute()
+
+        return recuperadas
+
+    async def aguardar_resultado(self, id_consulta, tempo_maximo):
+        resposta = await self._redis.blpop([f"{self._prefixo_resultado}{id_consulta}"], timeout=tempo_maximo)
+
+        if resposta is None:
+            return None
+
+        return json.loads(resposta[1])
+
+    async def estatisticas(self):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.llen(self._chave_pendentes)
+            pipe.zcard(self._chave_processando)
+            pendentes, em_execucao = await pipe.execute()
+
+        return {
+            "backend": "redis",
+            "pendentes": pendentes,
+            "em_execucao": em_execucao,
+        }
+
+    async def fechar(self):
+        await self._redis.aclose()
+
+
+def _resultado_tentativas_esgotadas():
+    return resultado_de_erro(
+        ErroInesperadoDuranteConsulta("A consulta foi interrompida repetidamente e não pôde ser concluída.")
+    )
+
+
+def criar_fila(backend=FILA_BACKEND):
+    """
+    Cria a fila de consultas configurada em FILA_BACKEND, ou None para consultar no próprio processo.
+    """
+    if backend == "redis":
+        return FilaRedis()
+
+    if backend == "memoria":
+        return FilaMemoria()
+
+    return None
+
+
+fila_consultas = criar_fila()
@@ -0,0 +1,284 @@
+import asyncio
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager
+
+from config.configuracoes import configuracoes
+from exceptions.scraping_exceptions import (
+    CapacidadeEsgotada,
+    CircuitoAberto,
+    CotaExcedida,
+    CPFouNISNaoEncontrado,
+    NomeNaoEncontrado
+)
+
+GOVERNADOR_NAVEGACOES_POR_SEGUNDO = configuracoes.governador_navegacoes_por_segundo
+GOVERNADOR_RAJADA_NAVEGACOES = configuracoes.governador_rajada_navegacoes
+GOVERNADOR_CONCORRENCIA_MINIMA = configuracoes.governador_concorrencia_minima
+GOVERNADOR_CONCORRENCIA_MAXIMA = configuracoes.governador_concorrencia_maxima
+GOVERNADOR_LATENCIA_ALVO_SEGUNDOS = configuracoes.governador_latencia_alvo_segundos
+GOVERNADOR_TEMPO_MAXIMO_ESPERA_SEGUNDOS = configuracoes.governador_tempo_maximo_espera_segundos
+DISJUNTOR_FALHAS_PARA_ABRIR = configuracoes.disjuntor_falhas_para_abrir
+DISJUNTOR_TEMPO_ABERTO_SEGUNDOS = configuracoes.disjuntor_tempo_aberto_segundos
+
+FATOR_REDUCAO_CONCORRENCIA = 0.5
+
+# Erros que indicam uma resposta normal do portal e, portanto, não contam como falha
+ERROS_NAO_CONTABILIZADOS = (CPFouNISNaoEncontrado, NomeNaoEncontrado, CapacidadeEsgotada, CircuitoAberto, CotaExcedida)
+
+ESTADO_FECHADO = "fechado"
+ESTADO_ABERTO = "aberto"
+ESTADO_MEIO_ABERTO = "meio_aberto"
+
+
+class BaldeTokens:
+    """
+    Limita a taxa de navegações (token bucket): permite rajadas de até `capacidade` navegações
+    e, depois, uma a cada 1/`taxa` segundos. As esperas são atendidas por ordem de chegada.
+    """
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = max(1, capacidade)
+        self._tokens = float(self.capacidade)
+        self._atualizado_em = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado_em) * self.taxa)
+        self._atualizado_em = agora
+
+    async def aguardar(self):
+        if self.taxa <= 0:
+            return
+
+        async with self._lock:
+            self._reabastecer()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.taxa)
+                self._reabastecer()
+
+            self._tokens -= 1
+
+
+class Disjuntor:
+    """
+    Circuit breaker das consultas ao portal.
+
+    Funcionamento:
+    - Fechado: as consultas são executadas normalmente.
+    - Aberto: após DISJUNTOR_FALHAS_PARA_ABRIR falhas consecutivas, novas consultas falham
+      imediatamente com CircuitoAberto durante DISJUNTOR_TEMPO_ABERTO_SEGUNDOS.
+    - Meio aberto: passado esse tempo, uma única consulta de teste é liberada; se ela funcionar
+      o disjuntor fecha, caso contrário volta a abrir.
+    """
+
+    def __init__(self, falhas_para_abrir=DISJUNTOR_FALHAS_PARA_ABRIR, tempo_aberto=DISJUNTOR_TEMPO_ABERTO_SEGUNDOS):
+        self.falhas_para_abrir = falhas_para_abrir
+        self.tempo_aberto = tempo_aberto
+        self.estado = ESTADO_FECHADO
+        self._falhas_consecutivas = 0
+        self._aberto_em = 0
+        self._teste_iniciado_em = 0
+        self.aberturas = 0
+        self.rejeitadas = 0
+
+    def verificar(self):
+        """
+        Levanta CircuitoAberto se as consultas ao portal estiverem suspensas.
+        """
+        agora = time.monotonic()
+
+        if self.estado == ESTADO_ABERTO and agora - self._aberto_em >= self.tempo_aberto:
+            self.estado = ESTADO_MEIO_ABERTO
+            self._teste_iniciado_em = 0
+
+        if self.estado == ESTADO_FECHADO:
+            return
+
+        # No estado meio aberto somente uma consulta de teste é liberada por vez
+        if self.estado == ESTADO_MEIO_ABERTO and agora - self._teste_iniciado_em >= self.tempo_aberto:
+            self._teste_iniciado_em = agora
+            return
+
+        self.rejeitadas += 1
+        raise CircuitoAberto(
+            "O Portal da Transparência está instável e as consultas foram suspensas temporariamente.",
+            retry_after=self.segundos_para_nova_tentativa()
+        )
+
+    def segundos_para_nova_tentativa(self):
+        if self.estado == ESTADO_ABERTO:
+            return max(1, int(self.tempo_aberto - (time.monotonic() - self._aberto_em)))
+
+        return max(1, int(self.tempo_aberto - (time.monotonic() - self._teste_iniciado_em)))
+
+    def registrar(self, erro=None):
+        """
+        Registra o resultado de uma consulta ao portal (erro=None indica sucesso).
+        """
+        if erro is not None and not isinstance(erro, ERROS_NAO_CONTABILIZADOS):
+            self._falhas_consecutivas += 1
+            if self.estado == ESTADO_MEIO_ABERTO or self._falhas_consecutivas >= self.falhas_para_abrir:
+                self._abrir()
+            return
+
+        if isinstance(erro, (CapacidadeEsgotada, CircuitoAberto)):
+            # Não houve acesso ao portal: libera uma nova consulta de teste, se for o caso
+            self._teste_iniciado_em = 0
+            return
+
+        self._falhas_consecutivas = 0
+        self.estado = ESTADO_FECHADO
+
+    def _abrir(self):
+        if self.estado != ESTADO_ABERTO:
+            self.aberturas += 1
+            print(f"Consultas ao portal suspensas por {self.tempo_aberto} s após {self._falhas_consecutivas} falha(s).")
+
+        self.estado = ESTADO_ABERTO
+        self._aberto_em = time.monotonic()
+
+    def estatisticas(self):
+        return {
+            "estado": self.estado,
+            "falhas_consecutivas": self._falhas_consecutivas,
+            "aberturas": self.aberturas,
+            "rejeitadas": self.rejeitadas,
+        }
+
+
+class GovernadorPortal:
+    """
+    Controle do tráfego de saída para o Portal da Transparência.
+
+    Funcionamento:
+    - `navegacao()` envolve cada navegação ou requisição ao portal: aguarda o limite de taxa
+      (BaldeTokens) e mede a latência da resposta.
+    - `consulta()` envolve cada consulta completa e limita quantas executam ao mesmo tempo.
+    - O limite de consultas simultâneas é adaptativo (AIMD): cresce aos poucos enquanto as
+      navegações respondem dentro de GOVERNADOR_LATENCIA_ALVO_SEGUNDOS e cai pela metade quando
+      elas ficam lentas ou falham (no máximo uma redução por janela de latência alvo).
+    - `disjuntor` suspende as consultas quando o portal falha repetidamente (ver Disjuntor).
+    """
+
+    def __init__(
+        self,
+        navegacoes_por_segundo=GOVERNADOR_NAVEGACOES_POR_SEGUNDO,
+        rajada_navegacoes=GOVERNADOR_RAJADA_NAVEGACOES,
+        concorrencia_minima=GOVERNADOR_CONCORRENCIA_MINIMA,
+        concorrencia_maxima=GOVERNADOR_CONCORRENCIA_MAXIMA,
+        latencia_alvo=GOVERNADOR_LATENCIA_ALVO_SEGUNDOS,
+        tempo_maximo_espera=GOVERNADOR_TEMPO_MAXIMO_ESPERA_SEGUNDOS,
+    ):
+        self.balde = BaldeTokens(navegacoes_por_segundo, rajada_navegacoes)
+        self.disjuntor = Disjuntor()
+        self.concorrencia_minima = max(1, concorrencia_minima)
+        self.concorrencia_maxima = max(self.concorrencia_minima, concorrencia_maxima)
+        self.latencia_alvo = latencia_alvo
+        self.tempo_maximo_espera = tempo_maximo_espera
+        self.limite = float(self.concorrencia_maxima)
+        self._em_execucao = 0
+        self._aguardando = deque()
+        self._ultima_reducao = 0
+        self.navegacoes = 0
+        self.navegacoes_lentas_ou_com_falha = 0
+        self.reducoes = 0
+
+    @asynccontextmanager
+    async def navegacao(self):
+        """
+        Aguarda a vez de acessar o portal e registra a latência (ou a falha) do acesso.
+        """
+        await self.balde.aguardar()
+        inicio = time.monotonic()
+
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._registrar_amostra(time.monotonic() - inicio, falhou=True)
+            raise
+
+        self._registrar_amostra(time.monotonic() - inicio, falhou=False)
+
+    @asynccontextmanager
+    async def consulta(self):
+        """
+        Reserva uma vaga entre as consultas simultâneas permitidas pelo limite adaptativo.
+
+        Levanta:
+        - CapacidadeEsgotada: se nenhuma vaga for liberada em GOVERNADOR_TEMPO_MAXIMO_ESPERA_SEGUNDOS.
+        """
+        await self._adquirir_vaga()
+        try:
+            yield
+        finally:
+            self._em_execucao -= 1
+            self._despertar()
+
+    async def _adquirir_vaga(self):
+        if self._em_execucao < int(self.limite) and not self._aguardando:
+            self._em_execucao += 1
+            return
+
+        vaga = asyncio.get_running_loop().create_future()
+        self._aguardando.append(vaga)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(vaga), self.tempo_maximo_espera)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if vaga.done():
+                # A vaga foi concedida no mesmo instante: devolve-a
+                self._em_execucao -= 1
+                self._despertar()
+            else:
+                vaga.cancel()
+
+            if isinstance(e, asyncio.TimeoutError):
+                raise CapacidadeEsgotada("O portal está respondendo lentamente e o limite de consultas simultâneas foi atingido.")
+            raise
+
+    def _despertar(self):
+        while self._aguardando and self._em_execucao < int(self.limite):
+            vaga = self._aguardando.popleft()
+            if vaga.done():
+                continue
+
+            self._em_execucao += 1
+            vaga.set_result(None)
+
+    def _registrar_amostra(self, duracao, falhou):
+        self.navegacoes += 1
+        agora = time.monotonic()
+
+        if falhou or duracao > self.latencia_alvo:
+            self.navegacoes_lentas_ou_com_falha += 1
+
+            # Uma única redução por janela, para que as navegações em andamento durante o mesmo
+            # episódio de lentidão não derrubem o limite várias vezes
+            if agora - self._ultima_reducao >= self.latencia_alvo:
+                self.limite = max(self.concorrencia_minima, self.limite * FATOR_REDUCAO_CONCORRENCIA)
+                self._ultima_reducao = agora
+                self.reducoes += 1
+            return
+
+        self.limite = min(self.concorrencia_maxima, self.limite + 1 / self.limite)
+        self._despertar()
+
+    def estatisticas(self):
+        return {
+            "limite_consultas_simultaneas": round(self.limite, 2),
+            "consultas_em_execucao": self._em_execucao,
+            "consultas_aguardando": sum(1 for vaga in self._aguardando if not vaga.done()),
+            "navegacoes": self.navegacoes,
+            "navegacoes_lentas_ou_com_falha": self.navegacoes_lentas_ou_com_falha,
+            "reducoes_de_concorrencia": self.reducoes,
+            "disjuntor": self.disjuntor.estatisticas(),
+        }
+
+
+governador_portal = GovernadorPortal()
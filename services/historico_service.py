@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from urllib.parse import urlsplit
+
+from config.configuracoes import configuracoes
+
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+HISTORICO_RECURSOS_ATIVO = configuracoes.historico_recursos_ativo
+HISTORICO_RECURSOS_REVALIDACAO_SEGUNDOS = configuracoes.historico_recursos_revalidacao_segundos
+
+
+def chave_linha(linha):
+    """
+    Identifica uma linha de tabela de recursos pelos seus campos (indexados pelo cabeçalho).
+    """
+    return tuple(sorted((coluna, (valor or "").strip()) for coluna, valor in linha.items()))
+
+
+def mesclar_linhas(linhas_novas, linhas_conhecidas):
+    """
+    Mescla as linhas coletadas agora com as linhas já conhecidas, sem duplicatas.
+
+    As linhas novas (mais recentes, no topo da tabela) vêm primeiro, seguidas das conhecidas na ordem
+    em que foram armazenadas.
+    """
+    vistas = set()
+    mescladas = []
+
+    for linha in list(linhas_novas) + list(linhas_conhecidas):
+        chave = chave_linha(linha)
+        if chave not in vistas:
+            vistas.add(chave)
+            mescladas.append(linha)
+
+    return mescladas
+
+
+class HistoricoRecursos:
+    """
+    Armazena, por pessoa e benefício, as tabelas de recursos já coletadas (um arquivo JSON por benefício),
+    permitindo que uma nova coleta percorra somente as páginas com linhas novas.
+
+    A chave de cada registro é o caminho da página de detalhes do benefício, que identifica a pessoa e o benefício.
+
+    Funcionamento:
+    - As tabelas do portal listam os meses mais recentes primeiro. A coleta incremental percorre as páginas
+      a partir da primeira e para assim que encontra uma linha já conhecida.
+    - As linhas coletadas são mescladas às conhecidas e deduplicadas pelos seus campos (ver mesclar_linhas).
+    - Após HISTORICO_RECURSOS_REVALIDACAO_SEGUNDOS da última coleta completa, o histórico é ignorado e as
+      tabelas são percorridas por inteiro, corrigindo eventuais alterações retroativas no portal.
+    """
+
+    def __init__(self, diretorio=None, ativo=HISTORICO_RECURSOS_ATIVO, revalidacao=HISTORICO_RECURSOS_REVALIDACAO_SEGUNDOS):
+        self.diretorio = diretorio or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "historico")
+        self.ativo = ativo
+        self.revalidacao = revalidacao
+        self.coletas_incrementais = 0
+        self.coletas_completas = 0
+        self.linhas_reaproveitadas = 0
+
+    def _caminho(self, url_recurso):
+        partes = urlsplit(url_recurso)
+        chave = f"{partes.path}?{partes.query}" if partes.query else partes.path
+        nome_arquivo = hashlib.sha256(chave.encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio, f"{nome_arquivo}.json")
+
+    def _ler_disco(self, url_recurso):
+        try:
+            with open(self._caminho(url_recurso), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _escrever_disco(self, url_recurso, registro):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._caminho(url_recurso)
+        caminho_temporario = f"{caminho}.tmp"
+
+        with open(caminho_temporario, "w", encoding="utf-8") as f:
+            json.dump(registro, f, ensure_ascii=False)
+
+        os.replace(caminho_temporario, caminho)
+
+    async def obter(self, url_recurso):
+        """
+        Busca as tabelas já coletadas de um benefício.
+
+        Retorna:
+        - dict {"atualizado_em", "completo_em", "tabelas": [{"cabecalho", "linhas"}]}, ou None se o histórico
+          estiver desativado, não existir ou precisar de uma nova coleta completa.
+        """
+        if not self.ativo:
+            return None
+
+        registro = await asyncio.to_thread(self._ler_disco, url_recurso)
+
+        if registro is None or time.time() - registro.get("completo_em", 0) > self.revalidacao:
+            return None
+
+        return registro
+
+    async def salvar(self, url_recurso, cabecalhos, tabelas, registro_anterior=None):
+        """
+        Salva as tabelas coletadas de um benefício.
+
+        Parâmetros:
+        - url_recurso (str): URL da página de detalhes do benefício.
+        - cabecalhos (list): cabeçalho de cada tabela.
+        - tabelas (list): linhas de cada tabela, já mescladas com o histórico.
+        - registro_anterior (dict | None): histórico utilizado na coleta; se None, a coleta foi completa.
+        """
+        if not self.ativo:
+            return
+
+        agora = time.time()
+        registro = {
+            "atualizado_em": agora,
+            "completo_em": registro_anterior["completo_em"] if registro_anterior else agora,
+            "tabelas": [
+                {"cabecalho": cabecalho, "linhas": linhas}
+                for cabecalho, linhas in zip(cabecalhos, tabelas)
+            ],
+        }
+
+        if registro_anterior:
+            self.coletas_incrementais += 1
+        else:
+            self.coletas_completas += 1
+
+        await asyncio.to_thread(self._escrever_disco, url_recurso, registro)
+
+    def linhas_conhecidas(self, registro, indice_tabela, cabecalho):
+        """
+        Retorna as linhas já conhecidas de uma tabela, desde que o cabeçalho não tenha mudado.
+        """
+        if registro is None or indice_tabela >= len(registro["tabelas"]):
+            return []
+
+        tabela = registro["tabelas"][indice_tabela]
+        if tabela["cabecalho"] != cabecalho:
+            return []
+
+        return tabela["linhas"]
+
+    def estatisticas(self):
+        return {
+            "ativo": self.ativo,
+            "coletas_incrementais": self.coletas_incrementais,
+            "coletas_completas": self.coletas_completas,
+            "linhas_reaproveitadas": self.linhas_reaproveitadas,
+        }
+
+
+historico_recursos = HistoricoRecursos()
@@ -0,0 +1,32 @@
+_cliente_http = None
+
+
+def obter_cliente_http():
+    """
+    Retorna o cliente HTTP assíncrono compartilhado pela aplicação.
+
+    O cliente mantém um pool de conexões keep-alive, evitando abrir uma conexão nova
+    a cada chamada para serviços externos (Auth0, callbacks de consultas...).
+    """
+    global _cliente_http
+
+    if _cliente_http is None or _cliente_http.is_closed:
+        import httpx
+
+        _cliente_http = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+        )
+
+    return _cliente_http
+
+
+async def fechar_cliente_http():
+    """
+    Fecha o cliente HTTP compartilhado (chamado no encerramento da aplicação).
+    """
+    global _cliente_http
+
+    if _cliente_http is not None:
+        await _cliente_http.aclose()
+        _cliente_http = None
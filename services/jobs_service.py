@@ -0,0 +1,408 @@
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from urllib.parse import urlsplit
+
+from config.configuracoes import configuracoes
+from services.consulta_service import classificar_e_estruturar_identificador, obter_dados_pessoa_fisica
+from services.escalonador_service import PRIORIDADE_LOTE
+from services.http_client_service import obter_cliente_http
+from exceptions.scraping_exceptions import CallbackInvalido, CapacidadeEsgotada, ErroConsultaPortal
+
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+JOBS_MAX_WORKERS = configuracoes.jobs_max_workers
+JOBS_MAX_FILA = configuracoes.jobs_max_fila
+JOBS_RESERVA_SEGUNDOS = configuracoes.jobs_reserva_segundos
+JOBS_INTERVALO_RECUPERACAO_SEGUNDOS = configuracoes.jobs_intervalo_recuperacao_segundos
+JOBS_CALLBACK_HOSTS_PERMITIDOS = configuracoes.jobs_callback_hosts_permitidos
+
+STATUS_NA_FILA = "na_fila"
+STATUS_EM_EXECUCAO = "em_execucao"
+STATUS_CONCLUIDA = "concluida"
+STATUS_FALHOU = "falhou"
+
+# Campos de uma consulta expostos ao cliente (GET /consultas/{id} e callback); os demais são de controle da fila
+CAMPOS_PUBLICOS = ("id", "status", "criado_em", "atualizado_em", "resultado", "erro", "tipo_erro")
+
+
+def estado_publico(job):
+    """
+    Retorna somente os campos da consulta que podem ser expostos ao cliente (ver CAMPOS_PUBLICOS).
+    """
+    return {campo: job[campo] for campo in CAMPOS_PUBLICOS}
+
+
+def _endereco_interno(endereco):
+    ip = ipaddress.ip_address(endereco.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return not ip.is_global or ip.is_multicast
+
+
+async def validar_callback_url(callback_url, hosts_permitidos=JOBS_CALLBACK_HOSTS_PERMITIDOS):
+    """
+    Verifica se o callback_url pode ser notificado, evitando que a API seja usada para enviar
+    requisições a serviços internos (SSRF).
+
+    Parâmetros:
+    - callback_url (str): URL informada na criação da consulta.
+    - hosts_permitidos (list): se preenchida, somente esses domínios (e subdomínios) são aceitos, sem verificar
+      os endereços resolvidos.
+
+    Funcionamento:
+    - Aceita somente URLs http(s) com host.
+    - Sem lista de hosts permitidos, resolve o host e rejeita a URL se algum endereço for privado, de loopback,
+      link-local, multicast ou reservado.
+
+    Levanta:
+    - CallbackInvalido: se a URL não puder ser notificada.
+    """
+    partes = urlsplit(callback_url)
+    host = (partes.hostname or "").lower().rstrip(".")
+    if partes.scheme not in ("http", "https") or not host:
+        raise CallbackInvalido("callback_url deve ser uma URL http(s) com host.")
+
+    if hosts_permitidos:
+        if not any(host == dominio or host.endswith(f".{dominio}") for dominio in hosts_permitidos):
+            raise CallbackInvalido(f"O host {host} não está entre os hosts permitidos para callback_url.")
+        return
+
+    try:
+        porta = partes.port or (443 if partes.scheme == "https" else 80)
+        enderecos = await asyncio.to_thread(socket.getaddrinfo, host, porta, proto=socket.IPPROTO_TCP)
+    except (OSError, ValueError):
+        raise CallbackInvalido(f"Não foi possível resolver o host {host} do callback_url.")
+
+    if any(_endereco_interno(endereco[4][0]) for endereco in enderecos):
+        raise CallbackInvalido(f"O host {host} do callback_url aponta para um endereço interno.")
+
+
+class RepositorioJobs:
+    """
+    Persistência das consultas assíncronas em SQLite, para que a fila sobreviva a reinicializações.
+
+    O banco pode ser compartilhado por vários processos (ex: workers do uvicorn): uma consulta só é
+    executada pelo processo que a reservar (ver `reservar`), e a reserva vence se não for renovada.
+    """
+
+    def __init__(self, caminho_banco):
+        self.caminho_banco = caminho_banco
+        self._lock = threading.Lock()
+        self._conexao = None
+
+    def abrir(self):
+        os.makedirs(os.path.dirname(self.caminho_banco) or ".", exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho_banco, check_same_thread=False, timeout=30)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                identificador TEXT NOT NULL,
+                incluir_filtro_social INTEGER NOT NULL,
+                callback_url TEXT,
+                status TEXT NOT NULL,
+                resultado TEXT,
+                erro TEXT,
+                tipo_erro TEXT,
+                criado_em REAL NOT NULL,
+                atualizado_em REAL NOT NULL,
+                cliente TEXT,
+                dono TEXT,
+                reservado_ate REAL
+            )
+        """)
+        # Bancos criados antes das colunas "cliente", "dono" e "reservado_ate"
+        colunas = [linha["name"] for linha in self._conexao.execute("PRAGMA table_info(jobs)")]
+        for coluna, tipo in (("cliente", "TEXT"), ("dono", "TEXT"), ("reservado_ate", "REAL")):
+            if coluna not in colunas:
+                self._conexao.execute(f"ALTER TABLE jobs ADD COLUMN {coluna} {tipo}")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, criado_em)")
+        self._conexao.commit()
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+
+    def _executar(self, sql, parametros=()):
+        with self._lock:
+            cursor = self._conexao.execute(sql, parametros)
+            self._conexao.commit()
+            return cursor
+
+    def inserir(self, job):
+        self._executar(
+            """
+            INSERT INTO jobs (id, identificador, incluir_filtro_social, callback_url, status, criado_em, atualizado_em, cliente)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job["id"], job["identificador"], int(job["incluir_filtro_social"]), job["callback_url"],
+             job["status"], job["criado_em"], job["atualizado_em"], job["cliente"])
+        )
+
+    def reservar(self, id_job, dono, validade):
+        """
+        Reserva atomicamente uma consulta na fila para execução pelo `dono`.
+
+        Retorna:
+        - True se a reserva foi obtida (a consulta estava na fila), False caso outro processo já a tenha reservado.
+        """
+        agora = time.time()
+        cursor = self._executar(
+            """
+            UPDATE jobs SET status = ?, dono = ?, reservado_ate = ?, atualizado_em = ?
+            WHERE id = ? AND status = ?
+            """,
+            (STATUS_EM_EXECUCAO, dono, agora + validade, agora, id_job, STATUS_NA_FILA)
+        )
+        return cursor.rowcount == 1
+
+    def renovar_reserva(self, id_job, dono, validade):
+        self._executar(
+            "UPDATE jobs SET reservado_ate = ? WHERE id = ? AND status = ? AND dono = ?",
+            (time.time() + validade, id_job, STATUS_EM_EXECUCAO, dono)
+        )
+
+    def finalizar(self, id_job, dono, status, resultado=None, erro=None, tipo_erro=None):
+        """
+        Registra o estado final de uma consulta reservada pelo `dono`.
+
+        Retorna:
+        - True se o estado foi registrado, False se a reserva venceu e a consulta foi reservada por outro processo.
+        """
+        cursor = self._executar(
+            """
+            UPDATE jobs SET status = ?, resultado = ?, erro = ?, tipo_erro = ?, atualizado_em = ?, reservado_ate = NULL
+            WHERE id = ? AND status = ? AND dono = ?
+            """,
+            (status, json.dumps(resultado, ensure_ascii=False) if resultado is not None else None,
+             erro, tipo_erro, time.time(), id_job, STATUS_EM_EXECUCAO, dono)
+        )
+        return cursor.rowcount == 1
+
+    def obter(self, id_job):
+        with self._lock:
+            linha = self._conexao.execute("SELECT * FROM jobs WHERE id = ?", (id_job,)).fetchone()
+        return _linha_para_job(linha) if linha else None
+
+    def listar_pendentes(self):
+        """
+        Retorna as consultas na fila, recolocando nela antes as consultas em execução cuja reserva venceu
+        (o processo que as executava foi encerrado). Consultas em execução com reserva válida não são afetadas.
+        """
+        agora = time.time()
+        self._executar(
+            """
+            UPDATE jobs SET status = ?, dono = NULL, reservado_ate = NULL, atualizado_em = ?
+            WHERE status = ? AND (reservado_ate IS NULL OR reservado_ate < ?)
+            """,
+            (STATUS_NA_FILA, agora, STATUS_EM_EXECUCAO, agora)
+        )
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY criado_em", (STATUS_NA_FILA,)
+            ).fetchall()
+        return [_linha_para_job(linha) for linha in linhas]
+
+    def contar_por_status(self):
+        with self._lock:
+            linhas = self._conexao.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: quantidade for status, quantidade in linhas}
+
+
+def _linha_para_job(linha):
+    job = dict(linha)
+    job["incluir_filtro_social"] = bool(job["incluir_filtro_social"])
+    job["resultado"] = json.loads(job["resultado"]) if job["resultado"] else None
+    return job
+
+
+class GerenciadorJobs:
+    """
+    Executa consultas de forma assíncrona (modo job).
+
+    Funcionamento:
+    - `enfileirar` persiste a consulta e retorna imediatamente o identificador do job.
+    - Uma quantidade fixa de workers (JOBS_MAX_WORKERS) consome a fila, de modo que a vazão
+      é controlada pelos workers e não pela quantidade de conexões mantidas pelos clientes.
+    - As consultas são executadas com a prioridade de lote, em nome do cliente que as agendou.
+    - Ao concluir, o resultado é persistido e, se informado, o callback_url é notificado via POST.
+    - Antes de executar, cada consulta é reservada no banco (RepositorioJobs.reservar): com vários processos
+      compartilhando o banco, cada consulta é executada (e notificada) uma única vez. A reserva é renovada
+      enquanto a consulta executa e vence após JOBS_RESERVA_SEGUNDOS se o processo for encerrado.
+    - Na inicialização e a cada JOBS_INTERVALO_RECUPERACAO_SEGUNDOS, as consultas pendentes (incluindo as
+      de reservas vencidas) são carregadas na fila em memória.
+    """
+
+    def __init__(self, executar_consulta, caminho_banco=None, max_workers=JOBS_MAX_WORKERS, max_fila=JOBS_MAX_FILA,
+                 validade_reserva=JOBS_RESERVA_SEGUNDOS, intervalo_recuperacao=JOBS_INTERVALO_RECUPERACAO_SEGUNDOS):
+        self.executar_consulta = executar_consulta
+        self.repositorio = RepositorioJobs(
+            caminho_banco or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "consultas.db")
+        )
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.validade_reserva = validade_reserva
+        self.intervalo_recuperacao = intervalo_recuperacao
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._fila = asyncio.Queue()
+        self._ids_na_fila = set()
+        self._workers = []
+
+    async def iniciar(self):
+        await asyncio.to_thread(self.repositorio.abrir)
+        await self._carregar_pendentes()
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        self._workers.append(asyncio.create_task(self._recuperar_periodicamente()))
+
+    async def encerrar(self):
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await asyncio.to_thread(self.repositorio.fechar)
+
+    async def enfileirar(self, identificador, incluir_filtro_social=False, callback_url=None, cliente=None):
+        """
+        Registra uma nova consulta assíncrona.
+
+        Levanta:
+        - IdentificadorInvalido: se o identificador não for um nome nem um CPF ou NIS válido.
+        - CallbackInvalido: se o callback_url não for http(s) ou apontar para um endereço interno.
+        - CapacidadeEsgotada: se a fila de consultas estiver cheia.
+
+        Retorna:
+        - dict com os dados do job criado.
+        """
+        classificar_e_estruturar_identificador(identificador)
+        if callback_url:
+            await validar_callback_url(callback_url)
+
+        if self._fila.qsize() >= self.max_fila:
+            raise CapacidadeEsgotada("Fila de consultas assíncronas cheia. Tente novamente mais tarde.")
+
+        agora = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "identificador": identificador,
+            "incluir_filtro_social": incluir_filtro_social,
+            "callback_url": callback_url,
+            "cliente": cliente,
+            "status": STATUS_NA_FILA,
+            "resultado": None,
+            "erro": None,
+            "tipo_erro": None,
+            "criado_em": agora,
+            "atualizado_em": agora,
+        }
+
+        await asyncio.to_thread(self.repositorio.inserir, job)
+        self._colocar_na_fila(job)
+        return job
+
+    def _colocar_na_fila(self, job):
+        if job["id"] not in self._ids_na_fila:
+            self._ids_na_fila.add(job["id"])
+            self._fila.put_nowait(job)
+
+    async def _carregar_pendentes(self):
+        for job in await asyncio.to_thread(self.repositorio.listar_pendentes):
+            self._colocar_na_fila(job)
+
+    async def _recuperar_periodicamente(self):
+        while True:
+            await asyncio.sleep(self.intervalo_recuperacao)
+            try:
+                await self._carregar_pendentes()
+            except Exception as e:
+                print(f"Falha ao recuperar as consultas assíncronas pendentes: {e}")
+
+    async def obter(self, id_job):
+        return await asyncio.to_thread(self.repositorio.obter, id_job)
+
+    async def estatisticas(self):
+        return {
+            "workers": self.max_workers,
+            "na_fila_em_memoria": self._fila.qsize(),
+            "por_status": await asyncio.to_thread(self.repositorio.contar_por_status),
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._fila.get()
+            self._ids_na_fila.discard(job["id"])
+            try:
+                await self._processar(job)
+            except Exception as e:
+                print(f"Falha ao processar a consulta assíncrona {job['id']}: {e}")
+            finally:
+                self._fila.task_done()
+
+    async def _renovar_reserva_periodicamente(self, id_job):
+        while True:
+            await asyncio.sleep(self.validade_reserva / 3)
+            try:
+                await asyncio.to_thread(self.repositorio.renovar_reserva, id_job, self.dono, self.validade_reserva)
+            except Exception as e:
+                print(f"Falha ao renovar a reserva da consulta assíncrona {id_job}: {e}")
+
+    async def _processar(self, job):
+        # Outro processo pode já ter reservado (ou concluído) a consulta
+        if not await asyncio.to_thread(self.repositorio.reservar, job["id"], self.dono, self.validade_reserva):
+            return
+
+        renovacao = asyncio.create_task(self._renovar_reserva_periodicamente(job["id"]))
+        try:
+            resultado = await self.executar_consulta(job["identificador"], job["incluir_filtro_social"], job["cliente"])
+            estado_final = {"status": STATUS_CONCLUIDA, "resultado": resultado}
+        except ErroConsultaPortal as e:
+            estado_final = {"status": STATUS_FALHOU, "erro": str(e), "tipo_erro": type(e).__name__}
+        except Exception as e:
+            estado_final = {
+                "status": STATUS_FALHOU, "erro": f"Erro inesperado: {e}", "tipo_erro": "ErroInesperadoDuranteConsulta"
+            }
+        finally:
+            renovacao.cancel()
+
+        finalizado = await asyncio.to_thread(
+            lambda: self.repositorio.finalizar(job["id"], self.dono, **estado_final)
+        )
+
+        # Se a reserva venceu e outro processo assumiu a consulta, ele é quem notifica o callback
+        if finalizado and job["callback_url"]:
+            await self._notificar(job["id"], job["callback_url"])
+
+    async def _notificar(self, id_job, callback_url):
+        """
+        Envia o estado final do job para o callback_url informado na criação.
+
+        A URL é validada novamente antes do envio, pois o DNS do host pode ter mudado desde a criação
+        (redirecionamentos não são seguidos pelo cliente HTTP).
+        """
+        job = await self.obter(id_job)
+        try:
+            await validar_callback_url(callback_url)
+            resposta = await obter_cliente_http().post(callback_url, json=estado_publico(job))
+            resposta.raise_for_status()
+        except Exception as e:
+            print(f"Falha ao notificar o callback da consulta {id_job}: {e}")
+
+
+async def _executar_consulta(identificador, incluir_filtro_social, cliente=None):
+    dados_pessoa, _, _ = await obter_dados_pessoa_fisica(
+        identificador, incluir_filtro_social, cliente=cliente, prioridade=PRIORIDADE_LOTE
+    )
+    return dados_pessoa
+
+
+gerenciador_jobs = GerenciadorJobs(_executar_consulta)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from config.configuracoes import configuracoes
+from services.consulta_service import classificar_e_estruturar_identificador, obter_dados_pessoa_fisica
+from services.escalonador_service import PRIORIDADE_LOTE
+from exceptions.scraping_exceptions import IdentificadorInvalido
+
+LOTE_PARALELISMO = configuracoes.lote_paralelismo
+LOTE_CONSULTAS_POR_MINUTO = configuracoes.lote_consultas_por_minuto
+LOTE_MAX_IDENTIFICADORES = configuracoes.lote_max_identificadores
+
+
+class LimitadorTaxa:
+    """
+    Espaça o início das consultas para respeitar uma quantidade máxima por minuto.
+
+    Uma única instância (limitador_lote) é compartilhada por todos os lotes do processo: lotes
+    simultâneos dividem a mesma taxa em vez de cada um somar LOTE_CONSULTAS_POR_MINUTO ao portal.
+    """
+
+    def __init__(self, consultas_por_minuto):
+        self.intervalo = 60 / consultas_por_minuto if consultas_por_minuto > 0 else 0
+        self._proximo_inicio = 0
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self):
+        if self.intervalo == 0:
+            return
+
+        async with self._lock:
+            agora = time.monotonic()
+            espera = self._proximo_inicio - agora
+            self._proximo_inicio = max(agora, self._proximo_inicio) + self.intervalo
+
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+limitador_lote = LimitadorTaxa(LOTE_CONSULTAS_POR_MINUTO)
+
+
+async def consultar_em_lote(identificadores, aplicar_filtro_social=False, cliente=None,
+                            paralelismo=LOTE_PARALELISMO, limitador=limitador_lote):
+    """
+    Consulta vários identificadores, retornando cada resultado assim que ele é concluído.
+
+    Parâmetros:
+    - identificadores (list[str]): nomes, CPFs ou NIS a serem consultados.
+    - aplicar_filtro_social (bool): se True, aplica filtro para beneficiário de programa social.
+    - cliente (str | None): cliente que solicitou o lote. As consultas são executadas com a prioridade de lote.
+    - paralelismo (int): quantidade de consultas executadas ao mesmo tempo.
+    - limitador (LimitadorTaxa): limita as consultas iniciadas por minuto. Por padrão, a taxa
+      (LOTE_CONSULTAS_POR_MINUTO) é compartilhada com os demais lotes em andamento.
+
+    Retorna:
+    - gerador assíncrono de dicts com "indice", "identificador", "tipo", "dados" e "erro"
+      (a exceção levantada pela consulta, ou None). A falha de um item não interrompe o lote.
+    """
+    semaforo = asyncio.Semaphore(paralelismo)
+
+    async def consultar(indice, identificador):
+        item = {"indice": indice, "identificador": identificador, "tipo": None, "dados": None, "erro": None}
+
+        # Identificadores inválidos são respondidos de imediato, sem ocupar o paralelismo nem a taxa do lote
+        try:
+            item["tipo"] = classificar_e_estruturar_identificador(identificador)["tipo"]
+        except IdentificadorInvalido as e:
+            item["erro"] = e
+            return item
+
+        async with semaforo:
+            await limitador.aguardar()
+            try:
+                item["dados"], _, _ = await obter_dados_pessoa_fisica(
+                    identificador, aplicar_filtro_social, cliente=cliente, prioridade=PRIORIDADE_LOTE
+                )
+            except Exception as e:
+                item["erro"] = e
+
+        return item
+
+    tarefas = [asyncio.create_task(consultar(i, identificador)) for i, identificador in enumerate(identificadores)]
+
+    try:
+        for proxima in asyncio.as_completed(tarefas):
+            yield await proxima
+    finally:
+        # Se o cliente se desconectar, as consultas restantes do lote são canceladas
+        for tarefa in tarefas:
+            tarefa.cancel()
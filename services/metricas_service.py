@@ -0,0 +1,241 @@
+import time
+
+from contextlib import asynccontextmanager, nullcontext
+from contextvars import ContextVar
+
+from config.configuracoes import configuracoes
+
+OTEL_EXPORTER_OTLP_ENDPOINT = configuracoes.otel_exporter_otlp_endpoint
+OTEL_SERVICE_NAME = configuracoes.otel_service_name
+
+BUCKETS_ETAPAS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+BUCKETS_CONSULTAS = (1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+BUCKETS_PAGINAS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+BUCKETS_ESPERA = (0.01, 0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.trace import Status, StatusCode
+    _tracer = trace.get_tracer("consulta-pessoa-fisica")
+except ImportError:
+    _tracer = None
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+class _MetricaNula:
+    """Substitui as métricas quando o pacote prometheus_client não está instalado."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, valor):
+        pass
+
+    def inc(self, valor=1):
+        pass
+
+    def set(self, valor):
+        pass
+
+
+def _histograma(nome, descricao, rotulos, buckets):
+    if prometheus_client is None:
+        return _MetricaNula()
+    return prometheus_client.Histogram(nome, descricao, rotulos, buckets=buckets)
+
+
+def _contador(nome, descricao, rotulos):
+    if prometheus_client is None:
+        return _MetricaNula()
+    return prometheus_client.Counter(nome, descricao, rotulos)
+
+
+def _indicador(nome, descricao, rotulos=()):
+    if prometheus_client is None:
+        return _MetricaNula()
+    return prometheus_client.Gauge(nome, descricao, rotulos)
+
+
+DURACAO_ETAPA = _histograma(
+    "portal_etapa_duracao_segundos", "Duração de cada etapa da consulta ao portal", ["etapa"], BUCKETS_ETAPAS
+)
+DURACAO_CONSULTA = _histograma(
+    "portal_consulta_duracao_segundos", "Duração das consultas completas ao portal", ["resultado"], BUCKETS_CONSULTAS
+)
+PAGINAS_POR_CONSULTA = _histograma(
+    "portal_paginas_visitadas_por_consulta", "Páginas do portal visitadas em cada consulta", [], BUCKETS_PAGINAS
+)
+CONSULTAS = _contador(
+    "portal_consultas", "Consultas ao portal por resultado (sucesso ou classe da exceção)", ["resultado"]
+)
+ERROS_ETAPA = _contador(
+    "portal_erros_etapa", "Erros por etapa e classe da exceção", ["etapa", "tipo_erro"]
+)
+POOL_NAVEGADORES = _indicador("pool_navegadores_abertos", "Navegadores abertos no pool")
+POOL_CONTEXTOS_ATIVOS = _indicador("pool_contextos_ativos", "Contextos em uso no pool de navegadores")
+POOL_CONTEXTOS_MAXIMOS = _indicador("pool_contextos_maximos", "Máximo de contextos simultâneos do pool")
+POOL_AGUARDANDO = _indicador("pool_consultas_aguardando", "Consultas aguardando um contexto livre no pool")
+GOVERNADOR_LIMITE = _indicador("governador_limite_consultas_simultaneas", "Limite adaptativo de consultas simultâneas ao portal")
+GOVERNADOR_DISJUNTOR_ABERTO = _indicador("governador_disjuntor_aberto", "1 se as consultas ao portal estão suspensas")
+FILA_PENDENTES = _indicador("fila_consultas_pendentes", "Consultas aguardando um worker na fila")
+ESCALONADOR_ESPERA = _histograma(
+    "escalonador_espera_segundos", "Espera das consultas por uma vaga, por classe de prioridade", ["prioridade"], BUCKETS_ESPERA
+)
+ESCALONADOR_REJEICOES = _contador(
+    "escalonador_rejeicoes", "Consultas rejeitadas pelo escalonador (fila cheia, tempo esgotado ou cota)", ["motivo"]
+)
+ESCALONADOR_AGUARDANDO = _indicador("escalonador_consultas_aguardando", "Consultas aguardando uma vaga, por classe de prioridade", ["prioridade"])
+ESCALONADOR_EM_EXECUCAO = _indicador("escalonador_consultas_em_execucao", "Consultas em execução, por classe de prioridade", ["prioridade"])
+
+_paginas_visitadas = ContextVar("paginas_visitadas", default=None)
+
+
+def metricas_disponiveis():
+    return prometheus_client is not None
+
+
+def configurar_rastreamento():
+    """
+    Configura a exportação dos traces via OTLP quando OTEL_EXPORTER_OTLP_ENDPOINT estiver definido.
+
+    Requer os pacotes opcionais opentelemetry-sdk e opentelemetry-exporter-otlp. Sem eles, os spans
+    são descartados (ou enviados ao provedor configurado externamente, ex: opentelemetry-instrument).
+    """
+    if not OTEL_EXPORTER_OTLP_ENDPOINT or _tracer is None:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        print("OTEL_EXPORTER_OTLP_ENDPOINT requer os pacotes opentelemetry-sdk e opentelemetry-exporter-otlp.")
+        return
+
+    provedor = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provedor.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provedor)
+
+
+def iniciar_servidor_metricas(porta):
+    """
+    Expõe as métricas do processo em uma porta própria (utilizado pelos workers, que não têm API HTTP).
+    """
+    if prometheus_client is None:
+        print("A exposição de métricas requer o pacote prometheus-client.")
+        return
+
+    prometheus_client.start_http_server(porta)
+
+
+def _iniciar_span(nome, atributos):
+    if _tracer is None:
+        return nullcontext()
+
+    return _tracer.start_as_current_span(
+        nome,
+        attributes={chave: valor for chave, valor in atributos.items() if valor is not None},
+        record_exception=False,
+        set_status_on_exception=False,
+    )
+
+
+def _registrar_erro_no_span(span, erro):
+    if span is None:
+        return
+
+    span.record_exception(erro)
+    span.set_status(Status(StatusCode.ERROR, type(erro).__name__))
+
+
+@asynccontextmanager
+async def etapa(nome, **atributos):
+    """
+    Mede uma etapa da consulta: cria um span (OpenTelemetry), registra a duração no histograma
+    da etapa e conta os erros pela classe da exceção.
+    """
+    inicio = time.perf_counter()
+
+    with _iniciar_span(nome, atributos) as span:
+        try:
+            yield span
+        except Exception as e:
+            _registrar_erro_no_span(span, e)
+            ERROS_ETAPA.labels(etapa=nome, tipo_erro=type(e).__name__).inc()
+            raise
+        finally:
+            DURACAO_ETAPA.labels(etapa=nome).observe(time.perf_counter() - inicio)
+
+
+@asynccontextmanager
+async def medir_consulta(**atributos):
+    """
+    Mede uma consulta completa (span raiz das etapas), contando as páginas visitadas e o resultado.
+    """
+    inicio = time.perf_counter()
+    paginas = [0]
+    token = _paginas_visitadas.set(paginas)
+    resultado = "sucesso"
+
+    with _iniciar_span("consulta_pessoa_fisica", atributos) as span:
+        try:
+            yield span
+        except Exception as e:
+            resultado = type(e).__name__
+            _registrar_erro_no_span(span, e)
+            raise
+        finally:
+            _paginas_visitadas.reset(token)
+            if span is not None:
+                span.set_attribute("paginas_visitadas", paginas[0])
+
+            DURACAO_CONSULTA.labels(resultado=resultado).observe(time.perf_counter() - inicio)
+            CONSULTAS.labels(resultado=resultado).inc()
+            PAGINAS_POR_CONSULTA.observe(paginas[0])
+
+
+def registrar_pagina_visitada():
+    """
+    Conta uma página do portal (ou página de resultados/tabela) visitada na consulta em andamento.
+    """
+    paginas = _paginas_visitadas.get()
+    if paginas is not None:
+        paginas[0] += 1
+
+
+def atualizar_indicadores(pool=None, governador=None, fila=None, escalonador=None):
+    """
+    Atualiza os indicadores instantâneos a partir das estatísticas dos serviços, antes da coleta.
+    """
+    if pool is not None:
+        POOL_NAVEGADORES.set(pool["navegadores"])
+        POOL_CONTEXTOS_ATIVOS.set(pool["contextos_ativos"])
+        POOL_CONTEXTOS_MAXIMOS.set(pool["max_contextos_simultaneos"])
+        POOL_AGUARDANDO.set(pool["aguardando"])
+
+    if governador is not None:
+        GOVERNADOR_LIMITE.set(governador["limite_consultas_simultaneas"])
+        GOVERNADOR_DISJUNTOR_ABERTO.set(int(governador["disjuntor"]["estado"] != "fechado"))
+
+    if fila is not None:
+        FILA_PENDENTES.set(fila["pendentes"])
+
+    if escalonador is not None:
+        for prioridade, valores in escalonador["por_prioridade"].items():
+            ESCALONADOR_AGUARDANDO.labels(prioridade=prioridade).set(valores["aguardando"])
+            ESCALONADOR_EM_EXECUCAO.labels(prioridade=prioridade).set(valores["em_execucao"])
+
+
+def gerar_metricas():
+    """
+    Retorna as métricas no formato de exposição do Prometheus.
+
+    Retorna:
+    - Tuple (conteudo: bytes, tipo_conteudo: str).
+    """
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
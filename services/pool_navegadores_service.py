@@ -0,0 +1,371 @@
+import asyncio
+import json
+import os
+import time
+
+from contextlib import asynccontextmanager
+
+from config.configuracoes import configuracoes
+
+from exceptions.scraping_exceptions import CapacidadeEsgotada
+
+URL_BASE_PORTAL_TRANSPARENCIA = configuracoes.url_base_portal_transparencia
+POOL_MAX_NAVEGADORES = configuracoes.pool_max_navegadores
+POOL_MAX_CONTEXTOS_SIMULTANEOS = configuracoes.pool_max_contextos_simultaneos
+POOL_MAX_FILA = configuracoes.pool_max_fila
+POOL_TEMPO_MAXIMO_FILA = configuracoes.pool_tempo_maximo_fila
+POOL_RECICLAR_APOS_CONTEXTOS = configuracoes.pool_reciclar_apos_contextos
+POOL_INTERVALO_VERIFICACAO_SAUDE = configuracoes.pool_intervalo_verificacao_saude
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+AQUECER_SESSAO = configuracoes.aquecer_sessao
+SESSAO_VALIDADE_SEGUNDOS = configuracoes.sessao_validade_segundos
+PATH_STORAGE_STATE = configuracoes.path_storage_state or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "sessao", "storage_state.json")
+
+
+class _NavegadorDoPool:
+    """Navegador Chromium mantido pelo pool, com contadores de uso."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.contextos_criados = 0
+        self.contextos_ativos = 0
+        self.aposentado = False
+
+    @property
+    def disponivel(self):
+        return not self.aposentado and self.browser.is_connected()
+
+
+class PoolNavegadores:
+    """
+    Pool de navegadores Chromium de longa duração.
+
+    Cada consulta recebe um `BrowserContext` novo (isolando cookies e storage),
+    mas o processo do navegador é reaproveitado entre consultas, evitando o
+    custo de inicialização do Chromium a cada requisição.
+
+    Funcionamento:
+    - Limita a quantidade de contextos simultâneos com um semáforo.
+    - Rejeita novas consultas (CapacidadeEsgotada) quando a fila de espera está cheia
+      ou quando o tempo máximo de espera é excedido.
+    - Recicla um navegador após N contextos criados ou quando ele é desconectado (crash).
+    - Executa uma verificação de saúde periódica substituindo navegadores inativos.
+    - Aquece a sessão (aceite de cookies) uma única vez e cria todos os contextos a partir
+      do `storage_state` resultante, persistido em disco para ser reaproveitado entre reinicializações.
+    """
+
+    def __init__(
+        self,
+        max_navegadores=POOL_MAX_NAVEGADORES,
+        max_contextos_simultaneos=POOL_MAX_CONTEXTOS_SIMULTANEOS,
+        max_fila=POOL_MAX_FILA,
+        tempo_maximo_fila=POOL_TEMPO_MAXIMO_FILA,
+        reciclar_apos_contextos=POOL_RECICLAR_APOS_CONTEXTOS,
+        intervalo_verificacao_saude=POOL_INTERVALO_VERIFICACAO_SAUDE,
+        aquecer_sessao=AQUECER_SESSAO,
+        path_storage_state=PATH_STORAGE_STATE,
+        sessao_validade=SESSAO_VALIDADE_SEGUNDOS,
+    ):
+        self.max_navegadores = max_navegadores
+        self.max_contextos_simultaneos = max_contextos_simultaneos
+        self.max_fila = max_fila
+        self.tempo_maximo_fila = tempo_maximo_fila
+        self.reciclar_apos_contextos = reciclar_apos_contextos
+        self.intervalo_verificacao_saude = intervalo_verificacao_saude
+        self.aquecer_sessao = aquecer_sessao
+        self.path_storage_state = path_storage_state
+        self.sessao_validade = sessao_validade
+
+        self._playwright = None
+        self._navegadores = []
+        self._semaforo = asyncio.Semaphore(max_contextos_simultaneos)
+        self._lock = asyncio.Lock()
+        self._aguardando = 0
+        self._proximo = 0
+        self._tarefa_saude = None
+        self._tarefa_inicializacao = None
+        self._storage_state = None
+        self._sessao_aquecida_em = 0
+        self.pronto = False
+
+    @property
+    def iniciado(self):
+        return self._playwright is not None
+
+    @property
+    def sessao_aquecida(self):
+        return self._storage_state is not None
+
+    def estatisticas(self):
+        """
+        Retorna um resumo da utilização do pool.
+        """
+        return {
+            "navegadores": len(self._navegadores),
+            "contextos_ativos": sum(n.contextos_ativos for n in self._navegadores),
+            "max_contextos_simultaneos": self.max_contextos_simultaneos,
+            "aguardando": self._aguardando,
+            "sessao_aquecida": self.sessao_aquecida,
+            "pronto": self.pronto,
+        }
+
+    async def iniciar(self):
+        """
+        Inicializa o Playwright e abre os navegadores do pool.
+
+        O Playwright é importado somente aqui, para que os processos que não abrem navegadores
+        (ex: a API com FILA_BACKEND=redis) não paguem o custo da importação na inicialização.
+        """
+        from playwright.async_api import async_playwright
+
+        async with self._lock:
+            if self.iniciado:
+                return
+
+            self._playwright = await async_playwright().start()
+
+            for _ in range(self.max_navegadores):
+                self._navegadores.append(await self._abrir_navegador())
+
+        if self.aquecer_sessao:
+            await self.aquecer()
+
+        self._tarefa_saude = asyncio.create_task(self._verificar_saude_periodicamente())
+        self.pronto = True
+
+    def iniciar_em_segundo_plano(self):
+        """
+        Inicia o pool em uma tarefa de fundo, sem bloquear quem a chamou.
+
+        As consultas recebidas antes do término aguardam a abertura dos navegadores em `contexto`.
+        O estado pode ser acompanhado pelo atributo `pronto`.
+        """
+        if self._tarefa_inicializacao is None or self._tarefa_inicializacao.done():
+            self._tarefa_inicializacao = asyncio.create_task(self._iniciar_registrando_falha())
+
+    async def _iniciar_registrando_falha(self):
+        try:
+            await self.iniciar()
+        except Exception as e:
+            print(f"Falha ao iniciar o pool de navegadores: {e}")
+
+    async def encerrar(self):
+        """
+        Fecha todos os navegadores e encerra o Playwright.
+        """
+        self.pronto = False
+
+        if self._tarefa_inicializacao:
+            self._tarefa_inicializacao.cancel()
+            try:
+                await self._tarefa_inicializacao
+            except asyncio.CancelledError:
+                pass
+            self._tarefa_inicializacao = None
+
+        if self._tarefa_saude:
+            self._tarefa_saude.cancel()
+            self._tarefa_saude = None
+
+        async with self._lock:
+            for navegador in self._navegadores:
+                await self._fechar_navegador(navegador)
+
+            self._navegadores = []
+
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+
+    @asynccontextmanager
+    async def contexto(self):
+        """
+        Fornece um `BrowserContext` novo de um dos navegadores do pool.
+
+        Levanta:
+        - CapacidadeEsgotada: se a fila estiver cheia ou a espera exceder o tempo máximo.
+        """
+        if not self.iniciado:
+            await self.iniciar()
+
+        if self._semaforo.locked() and self._aguardando >= self.max_fila:
+            raise CapacidadeEsgotada("Capacidade de consultas simultâneas esgotada. Tente novamente mais tarde.")
+
+        self._aguardando += 1
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), timeout=self.tempo_maximo_fila)
+        except asyncio.TimeoutError:
+            raise CapacidadeEsgotada("Tempo máximo de espera por um navegador disponível excedido.")
+        finally:
+            self._aguardando -= 1
+
+        navegador = None
+        context = None
+        try:
+            navegador = await self._escolher_navegador()
+            context = await self._criar_contexto(navegador)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if navegador is not None:
+                navegador.contextos_ativos -= 1
+                await self._descartar_se_aposentado(navegador)
+            self._semaforo.release()
+
+    async def aquecer(self):
+        """
+        Prepara a sessão reaproveitada pelos contextos do pool.
+
+        Funcionamento:
+        - Se existir um `storage_state` salvo em disco dentro da validade, ele é carregado.
+        - Caso contrário, executa o aceite de cookies no portal em um contexto descartável
+          e salva o `storage_state` resultante em disco.
+        - Em caso de falha, os contextos continuam sendo criados sem sessão (fluxo completo).
+        """
+        from pages.portal_page import PortalPage
+
+        storage_state = await asyncio.to_thread(self._ler_storage_state)
+
+        if storage_state is None:
+            navegador = None
+            context = None
+            try:
+                navegador = await self._escolher_navegador()
+                context = await self._criar_contexto(navegador, usar_sessao=False)
+                await PortalPage(await context.new_page()).aceitar_cookies()
+                storage_state = await context.storage_state()
+                await asyncio.to_thread(self._escrever_storage_state, storage_state)
+            except Exception as e:
+                print(f"Não foi possível aquecer a sessão do portal: {e}")
+                storage_state = None
+            finally:
+                if context is not None:
+                    await context.close()
+                if navegador is not None:
+                    navegador.contextos_ativos -= 1
+                    await self._descartar_se_aposentado(navegador)
+
+        self._storage_state = storage_state
+        self._sessao_aquecida_em = time.time() if storage_state is not None else 0
+
+    def _ler_storage_state(self):
+        try:
+            if time.time() - os.path.getmtime(self.path_storage_state) > self.sessao_validade:
+                return None
+
+            with open(self.path_storage_state, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _escrever_storage_state(self, storage_state):
+        os.makedirs(os.path.dirname(self.path_storage_state), exist_ok=True)
+
+        with open(self.path_storage_state, "w", encoding="utf-8") as f:
+            json.dump(storage_state, f)
+
+    async def _abrir_navegador(self):
+        browser = await self._playwright.chromium.launch(headless=True)
+        navegador = _NavegadorDoPool(browser)
+        browser.on("disconnected", lambda _: self._marcar_aposentado(navegador))
+        return navegador
+
+    async def _fechar_navegador(self, navegador):
+        try:
+            await navegador.browser.close()
+        except Exception:
+            pass
+
+    def _marcar_aposentado(self, navegador):
+        navegador.aposentado = True
+
+    async def _escolher_navegador(self):
+        """
+        Escolhe um navegador saudável em round-robin, substituindo os que foram aposentados.
+        """
+        async with self._lock:
+            for i, navegador in enumerate(self._navegadores):
+                if not navegador.disponivel and navegador.contextos_ativos == 0:
+                    await self._fechar_navegador(navegador)
+                    self._navegadores[i] = await self._abrir_navegador()
+
+            disponiveis = [n for n in self._navegadores if n.disponivel]
+            if not disponiveis:
+                navegador = await self._abrir_navegador()
+                self._navegadores.append(navegador)
+                disponiveis = [navegador]
+
+            navegador = disponiveis[self._proximo % len(disponiveis)]
+            self._proximo += 1
+
+            navegador.contextos_criados += 1
+            navegador.contextos_ativos += 1
+
+            # Após atingir o limite de contextos, o navegador deixa de receber novas consultas
+            # e é fechado assim que as consultas em andamento terminarem
+            if navegador.contextos_criados >= self.reciclar_apos_contextos:
+                navegador.aposentado = True
+
+            return navegador
+
+    async def _descartar_se_aposentado(self, navegador):
+        async with self._lock:
+            if navegador.aposentado and navegador.contextos_ativos == 0 and navegador in self._navegadores:
+                self._navegadores.remove(navegador)
+                await self._fechar_navegador(navegador)
+
+                if self.iniciado and len(self._navegadores) < self.max_navegadores:
+                    self._navegadores.append(await self._abrir_navegador())
+
+    async def _criar_contexto(self, navegador, usar_sessao=True):
+        """
+        Cria um contexto com headers personalizados para simular navegação real,
+        a partir da sessão aquecida (se houver).
+        """
+        context = await navegador.browser.new_context(
+            storage_state=self._storage_state if usar_sessao else None,
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64)...',
+            locale='pt-BR',
+            extra_http_headers={
+                "Accept-Language": "pt-BR,pt;q=0.9",
+                "Referer": f"{URL_BASE_PORTAL_TRANSPARENCIA}"
+            },
+        )
+
+        await context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', { get: () => false });
+        """)
+
+        return context
+
+    async def _verificar_saude_periodicamente(self):
+        while True:
+            await asyncio.sleep(self.intervalo_verificacao_saude)
+            try:
+                await self.verificar_saude()
+
+                # Renova a sessão aquecida quando ela expira
+                if self.aquecer_sessao and time.time() - self._sessao_aquecida_em > self.sessao_validade:
+                    await self.aquecer()
+            except Exception as e:
+                print(f"Falha na verificação de saúde do pool de navegadores: {e}")
+
+    async def verificar_saude(self):
+        """
+        Substitui navegadores desconectados ou aposentados que não possuem consultas em andamento.
+        """
+        async with self._lock:
+            if not self.iniciado:
+                return
+
+            for i, navegador in enumerate(self._navegadores):
+                if not navegador.disponivel and navegador.contextos_ativos == 0:
+                    await self._fechar_navegador(navegador)
+                    self._navegadores[i] = await self._abrir_navegador()
+
+
+pool_navegadores = PoolNavegadores()
@@ -0,0 +1,147 @@
+import time
+
+from urllib.parse import urlsplit
+
+from config.configuracoes import configuracoes
+
+BLOQUEIO_RECURSOS_ATIVO = configuracoes.bloqueio_recursos_ativo
+BLOQUEAR_TIPOS_RECURSO = configuracoes.bloquear_tipos_recurso
+DOMINIOS_PERMITIDOS = configuracoes.dominios_permitidos
+DOMINIOS_BLOQUEADOS = configuracoes.dominios_bloqueados
+
+
+def _pertence_ao_dominio(host, dominios):
+    return any(host == dominio or host.endswith(f".{dominio}") for dominio in dominios)
+
+
+class MonitorRede:
+    """
+    Aplica a política de bloqueio de recursos em um contexto do navegador e mede o tráfego da consulta.
+
+    Funcionamento:
+    - Intercepta as requisições do contexto (`context.route`), abortando tipos de recurso e domínios
+      de terceiros que não são necessários para a coleta (imagens, fontes, CSS, analytics...).
+    - A renderização completa pode ser habilitada temporariamente (ex: etapa de screenshot).
+    - Contabiliza bytes transferidos, requisições bloqueadas e o tempo de carregamento das páginas.
+    """
+
+    def __init__(
+        self,
+        ativo=BLOQUEIO_RECURSOS_ATIVO,
+        tipos_bloqueados=BLOQUEAR_TIPOS_RECURSO,
+        dominios_permitidos=DOMINIOS_PERMITIDOS,
+        dominios_bloqueados=DOMINIOS_BLOQUEADOS,
+    ):
+        self.ativo = ativo
+        self.tipos_bloqueados = set(tipos_bloqueados)
+        self.dominios_permitidos = dominios_permitidos
+        self.dominios_bloqueados = dominios_bloqueados
+        self.renderizacao_completa = False
+
+        self.bytes_transferidos = 0
+        self.requisicoes = 0
+        self.requisicoes_bloqueadas = 0
+        self.tempo_carregamento = 0.0
+        self._inicio_navegacao = {}
+
+    async def instalar(self, context):
+        """
+        Instala a interceptação de requisições e os contadores no contexto informado.
+        """
+        if self.ativo:
+            await context.route("**/*", self._rotear)
+
+        context.on("requestfinished", self._registrar_requisicao)
+        context.on("page", self._monitorar_pagina)
+
+        for page in context.pages:
+            self._monitorar_pagina(page)
+
+    def deve_bloquear(self, request):
+        """
+        Indica se a requisição deve ser abortada segundo a política configurada.
+        """
+        if self.renderizacao_completa:
+            return False
+
+        if request.resource_type in self.tipos_bloqueados:
+            return True
+
+        host = urlsplit(request.url).hostname or ""
+
+        if _pertence_ao_dominio(host, self.dominios_bloqueados):
+            return True
+
+        if self.dominios_permitidos and not _pertence_ao_dominio(host, self.dominios_permitidos):
+            return True
+
+        return False
+
+    async def _rotear(self, route):
+        if self.deve_bloquear(route.request):
+            self.requisicoes_bloqueadas += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _registrar_requisicao(self, request):
+        self.requisicoes += 1
+        try:
+            tamanhos = await request.sizes()
+            self.bytes_transferidos += tamanhos["responseHeadersSize"] + tamanhos["responseBodySize"]
+        except Exception:
+            pass
+
+    def _monitorar_pagina(self, page):
+        def iniciar_navegacao(request):
+            if request.is_navigation_request() and request.frame == page.main_frame:
+                self._inicio_navegacao[page] = time.perf_counter()
+
+        def finalizar_navegacao(_):
+            inicio = self._inicio_navegacao.pop(page, None)
+            if inicio is not None:
+                self.tempo_carregamento += time.perf_counter() - inicio
+
+        page.on("request", iniciar_navegacao)
+        page.on("domcontentloaded", finalizar_navegacao)
+
+    def resumo(self):
+        return {
+            "bytes_transferidos": self.bytes_transferidos,
+            "requisicoes": self.requisicoes,
+            "requisicoes_bloqueadas": self.requisicoes_bloqueadas,
+            "tempo_carregamento_segundos": round(self.tempo_carregamento, 3),
+        }
+
+
+class TotaisRede:
+    """
+    Acumula o resumo de tráfego de todas as consultas realizadas pelo processo.
+    """
+
+    def __init__(self):
+        self.consultas = 0
+        self.bytes_transferidos = 0
+        self.requisicoes = 0
+        self.requisicoes_bloqueadas = 0
+        self.tempo_carregamento = 0.0
+
+    def acumular(self, monitor):
+        self.consultas += 1
+        self.bytes_transferidos += monitor.bytes_transferidos
+        self.requisicoes += monitor.requisicoes
+        self.requisicoes_bloqueadas += monitor.requisicoes_bloqueadas
+        self.tempo_carregamento += monitor.tempo_carregamento
+
+    def estatisticas(self):
+        consultas = max(self.consultas, 1)
+        return {
+            "consultas": self.consultas,
+            "bytes_transferidos": self.bytes_transferidos,
+            "requisicoes_bloqueadas": self.requisicoes_bloqueadas,
+            "media_bytes_por_consulta": self.bytes_transferidos // consultas,
+            "media_tempo_carregamento_segundos": round(self.tempo_carregamento / consultas, 3),
+        }
+
+
+totais_rede = TotaisRede()
@@ -0,0 +1,147 @@
+import asyncio
+import fcntl
+import json
+import os
+import time
+
+from config.configuracoes import configuracoes
+from services.http_client_service import obter_cliente_http
+
+
+AUTH0_DOMAIN = configuracoes.auth0_domain
+AUTH0_API_AUDIENCE = configuracoes.auth0_api_audience
+CLIENT_ID = configuracoes.client_id
+CLIENT_SECRET = configuracoes.client_secret
+PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA = configuracoes.path_base_armazenamento_dados_pessoa
+AUTH0_TOKEN_URL = configuracoes.auth0_token_url or f"https://{AUTH0_DOMAIN}/oauth/token"
+TOKEN_RENOVACAO_ANTECIPADA_SEGUNDOS = configuracoes.token_renovacao_antecipada_segundos
+TOKEN_COMPARTILHADO = configuracoes.token_compartilhado
+PATH_TOKEN_COMPARTILHADO = configuracoes.path_token_compartilhado or os.path.join(PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA or "./data", "sessao", "token_auth0.json")
+
+
+class GerenciadorToken:
+    """
+    Emissão de tokens de acesso do Auth0 (client credentials) com cache.
+
+    Funcionamento:
+    - O token é reaproveitado até expirar, conforme o `expires_in` retornado pelo Auth0.
+    - Quando faltar menos de TOKEN_RENOVACAO_ANTECIPADA_SEGUNDOS para expirar, o token atual é
+      retornado e uma única renovação é disparada em segundo plano.
+    - Renovações concorrentes são agrupadas atrás de um lock assíncrono (uma única chamada ao Auth0).
+    - Opcionalmente (TOKEN_COMPARTILHADO), o token é persistido em um arquivo local protegido por
+      lock de arquivo, para que vários workers do uvicorn reutilizem o mesmo token.
+    """
+
+    def __init__(
+        self,
+        url=AUTH0_TOKEN_URL,
+        renovacao_antecipada=TOKEN_RENOVACAO_ANTECIPADA_SEGUNDOS,
+        compartilhado=TOKEN_COMPARTILHADO,
+        path_compartilhado=PATH_TOKEN_COMPARTILHADO,
+    ):
+        self.url = url
+        self.renovacao_antecipada = renovacao_antecipada
+        self.compartilhado = compartilhado
+        self.path_compartilhado = path_compartilhado
+        self._token = None
+        self._expira_em = 0
+        self._lock = asyncio.Lock()
+        self._tarefa_renovacao = None
+
+    def _valido(self, margem=0):
+        return self._token is not None and time.time() < self._expira_em - margem
+
+    async def obter_token(self):
+        """
+        Retorna um token de acesso válido, emitindo um novo somente quando necessário.
+        """
+        if self._valido(self.renovacao_antecipada):
+            return self._token
+
+        if self._valido():
+            # Token ainda válido, mas perto de expirar: renova em segundo plano
+            if self._tarefa_renovacao is None or self._tarefa_renovacao.done():
+                self._tarefa_renovacao = asyncio.create_task(self._renovar_em_segundo_plano())
+            return self._token
+
+        async with self._lock:
+            if not self._valido():
+                await self._renovar()
+
+        return self._token
+
+    async def _renovar_em_segundo_plano(self):
+        try:
+            async with self._lock:
+                if not self._valido(self.renovacao_antecipada):
+                    await self._renovar()
+        except Exception as e:
+            print(f"Falha ao renovar o token de acesso em segundo plano: {e}")
+
+    async def _renovar(self):
+        if not self.compartilhado:
+            await self._emitir()
+            return
+
+        arquivo_lock = await asyncio.to_thread(self._adquirir_lock_arquivo)
+        try:
+            # Outro worker pode ter emitido o token enquanto este aguardava o lock
+            token = await asyncio.to_thread(self._ler_token_compartilhado)
+            if token is not None and time.time() < token["expira_em"] - self.renovacao_antecipada:
+                self._token, self._expira_em = token["access_token"], token["expira_em"]
+                return
+
+            await self._emitir()
+            await asyncio.to_thread(self._escrever_token_compartilhado)
+        finally:
+            await asyncio.to_thread(self._liberar_lock_arquivo, arquivo_lock)
+
+    async def _emitir(self):
+        """
+        Solicita um novo token ao Auth0.
+        """
+        agora = time.time()
+        resposta = await obter_cliente_http().post(
+            self.url,
+            json={
+                "client_id": f"{CLIENT_ID}",
+                "client_secret": f"{CLIENT_SECRET}",
+                "audience": f"{AUTH0_API_AUDIENCE}",
+                "grant_type": "client_credentials"
+            }
+        )
+        resposta.raise_for_status()
+        data = resposta.json()
+
+        self._token = data["access_token"]
+        self._expira_em = agora + int(data.get("expires_in", 86400))
+
+    def _adquirir_lock_arquivo(self):
+        os.makedirs(os.path.dirname(self.path_compartilhado), exist_ok=True)
+        arquivo_lock = open(f"{self.path_compartilhado}.lock", "w")
+        fcntl.flock(arquivo_lock, fcntl.LOCK_EX)
+        return arquivo_lock
+
+    def _liberar_lock_arquivo(self, arquivo_lock):
+        fcntl.flock(arquivo_lock, fcntl.LOCK_UN)
+        arquivo_lock.close()
+
+    def _ler_token_compartilhado(self):
+        try:
+            with open(self.path_compartilhado, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _escrever_token_compartilhado(self):
+        caminho_temporario = f"{self.path_compartilhado}.tmp"
+
+        # O arquivo contém um segredo: permissão somente para o usuário do processo
+        descritor = os.open(caminho_temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descritor, "w", encoding="utf-8") as f:
+            json.dump({"access_token": self._token, "expira_em": self._expira_em}, f)
+
+        os.replace(caminho_temporario, self.path_compartilhado)
+
+
+gerenciador_token = GerenciadorToken()
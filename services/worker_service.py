@@ -0,0 +1,111 @@
+import asyncio
+
+from config.configuracoes import configuracoes
+from services.consulta_service import consultar_dados_pessoa_fisica
+from services.fila_service import resultado_de_erro, resultado_de_sucesso
+from services.pool_navegadores_service import POOL_MAX_CONTEXTOS_SIMULTANEOS
+
+WORKER_CONCORRENCIA = configuracoes.worker_concorrencia or POOL_MAX_CONTEXTOS_SIMULTANEOS
+WORKER_TEMPO_ESPERA_SEGUNDOS = 5 # Tempo (s) de espera por uma consulta antes de verificar novamente a fila
+WORKER_INTERVALO_RECUPERACAO_SEGUNDOS = 30 # Intervalo (s) entre as recuperações de reservas vencidas
+
+
+class WorkerConsultas:
+    """
+    Consome a fila de consultas (ver fila_service) e executa `consultar_dados_pessoa_fisica`.
+
+    Funcionamento:
+    - Mantém até WORKER_CONCORRENCIA consultas em execução, cada uma reservada na fila.
+    - Renova a reserva periodicamente enquanto a consulta executa, para que ela só volte à fila
+      se o worker cair.
+    - Entrega o resultado (ou o erro) a quem aguarda na API.
+    - Recupera periodicamente reservas vencidas de workers que caíram.
+    - No encerramento, consultas interrompidas são devolvidas à fila imediatamente.
+    """
+
+    def __init__(self, fila, concorrencia=WORKER_CONCORRENCIA):
+        self.fila = fila
+        self.concorrencia = concorrencia
+        self._tarefas = []
+        self.concluidas = 0
+        self.falhas = 0
+
+    async def iniciar(self):
+        self._tarefas = [asyncio.create_task(self._consumir()) for _ in range(self.concorrencia)]
+        self._tarefas.append(asyncio.create_task(self._recuperar_periodicamente()))
+
+    async def encerrar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    def estatisticas(self):
+        return {
+            "concorrencia": self.concorrencia,
+            "concluidas": self.concluidas,
+            "falhas": self.falhas,
+        }
+
+    async def _consumir(self):
+        while True:
+            try:
+                reserva = await self.fila.reservar(WORKER_TEMPO_ESPERA_SEGUNDOS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Falha ao reservar consulta na fila: {e}")
+                await asyncio.sleep(WORKER_TEMPO_ESPERA_SEGUNDOS)
+                continue
+
+            if reserva is not None:
+                await self._processar(*reserva)
+
+    async def _processar(self, id_consulta, parametros, token):
+        renovacao = asyncio.create_task(self._renovar_reserva(id_consulta, token))
+
+        try:
+            dados_pessoa = await consultar_dados_pessoa_fisica(**parametros)
+            resultado = resultado_de_sucesso(dados_pessoa)
+            self.concluidas += 1
+        except asyncio.CancelledError:
+            renovacao.cancel()
+            await asyncio.shield(self._devolver(id_consulta, token))
+            raise
+        except Exception as e:
+            resultado = resultado_de_erro(e)
+            self.falhas += 1
+        finally:
+            renovacao.cancel()
+
+        try:
+            if not await self.fila.concluir(id_consulta, token, resultado):
+                print(f"Reserva da consulta {id_consulta} expirou antes da conclusão; resultado descartado.")
+        except Exception as e:
+            print(f"Falha ao entregar o resultado da consulta {id_consulta}: {e}")
+
+    async def _renovar_reserva(self, id_consulta, token):
+        while True:
+            await asyncio.sleep(self.fila.visibilidade / 3)
+            try:
+                await self.fila.renovar(id_consulta, token)
+            except Exception as e:
+                print(f"Falha ao renovar a reserva da consulta {id_consulta}: {e}")
+
+    async def _devolver(self, id_consulta, token):
+        try:
+            await self.fila.devolver(id_consulta, token)
+        except Exception as e:
+            print(f"Falha ao devolver a consulta {id_consulta} à fila: {e}")
+
+    async def _recuperar_periodicamente(self):
+        while True:
+            try:
+                recuperadas = await self.fila.recuperar_expiradas()
+                if recuperadas:
+                    print(f"{recuperadas} consulta(s) com reserva vencida recolocada(s) na fila.")
+            except Exception as e:
+                print(f"Falha ao recuperar reservas vencidas: {e}")
+
+            await asyncio.sleep(WORKER_INTERVALO_RECUPERACAO_SEGUNDOS)
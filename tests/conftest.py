@@ -0,0 +1,83 @@
+"""
+Configuração comum dos testes: as variáveis de ambiente são definidas antes da importação dos serviços,
+pois as configurações são lidas uma única vez (ver config/configuracoes.py).
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["PATH_BASE_ARMAZENAMENTO_DADOS_PESSOA"] = tempfile.mkdtemp(prefix="testes-consulta-")
+os.environ["FILA_BACKEND"] = ""
+os.environ["ESCALONADOR_COTA_CONSULTAS_POR_HORA"] = "0"
+
+
+class ServidorLocal:
+    """
+    Servidor HTTP local que responde a qualquer requisição com o JSON retornado por `responder`,
+    registrando a quantidade de requisições recebidas. Substitui o Auth0 nos testes.
+    """
+
+    def __init__(self, responder, latencia_segundos=0.0):
+        self.responder = responder
+        self.latencia_segundos = latencia_segundos
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        servidor_local = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def _responder(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(servidor_local.latencia_segundos)
+                with servidor_local._lock:
+                    servidor_local.requisicoes += 1
+                    numero = servidor_local.requisicoes
+
+                corpo = json.dumps(servidor_local.responder(numero)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            do_GET = do_POST = _responder
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manipulador)
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def encerrar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+@pytest.fixture
+def servidor_local():
+    """
+    Cria servidores locais (ver ServidorLocal), encerrados ao final do teste.
+    """
+    servidores = []
+
+    def criar(responder, latencia_segundos=0.0):
+        servidor = ServidorLocal(responder, latencia_segundos)
+        servidores.append(servidor)
+        return servidor
+
+    yield criar
+
+    for servidor in servidores:
+        servidor.encerrar()
@@ -0,0 +1,147 @@
+"""
+Cache de chaves públicas (JWKS) verificado contra um servidor JWKS local: rotação de chaves,
+expiração do cache e agrupamento de buscas concorrentes.
+"""
+import asyncio
+import time
+
+import pytest
+import rsa
+
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from services import auth_service
+from services.auth_service import CacheJWKS, TokensVerificados
+from services.http_client_service import fechar_cliente_http
+
+
+DOMINIO = "teste.auth0.local"
+AUDIENCIA = "https://api.teste.local"
+
+
+def _gerar_chave(kid):
+    publica, privada = rsa.newkeys(1024)
+    jwk_publica = jwk.construct(publica.save_pkcs1().decode(), "RS256").to_dict()
+    return {
+        "kid": kid,
+        "privada": privada.save_pkcs1().decode(),
+        "jwk": {"kty": "RSA", "kid": kid, "use": "sig", "n": jwk_publica["n"], "e": jwk_publica["e"]},
+    }
+
+
+@pytest.fixture(scope="module")
+def chaves():
+    return {kid: _gerar_chave(kid) for kid in ("chave-1", "chave-2")}
+
+
+def _assinar(chave):
+    agora = int(time.time())
+    return jwt.encode(
+        {"sub": "cliente-teste", "aud": AUDIENCIA, "iss": f"https://{DOMINIO}/", "iat": agora, "exp": agora + 3600},
+        chave["privada"],
+        algorithm="RS256",
+        headers={"kid": chave["kid"]},
+    )
+
+
+@pytest.fixture
+def jwks(monkeypatch, servidor_local):
+    """
+    Servidor JWKS local: `publicadas` é a lista de chaves servida no momento.
+    """
+    publicadas = []
+    servidor = servidor_local(lambda numero: {"keys": [chave["jwk"] for chave in publicadas]}, latencia_segundos=0.05)
+
+    monkeypatch.setattr(auth_service, "AUTH0_DOMAIN", DOMINIO)
+    monkeypatch.setattr(auth_service, "API_AUDIENCE", AUDIENCIA)
+    monkeypatch.setattr(auth_service, "tokens_verificados", TokensVerificados())
+
+    def configurar(ttl=3600, intervalo_minimo=0):
+        monkeypatch.setattr(
+            auth_service, "cache_jwks", CacheJWKS(url=f"{servidor.url}/.well-known/jwks.json", ttl=ttl, intervalo_minimo=intervalo_minimo)
+        )
+        return servidor
+
+    return publicadas, configurar
+
+
+def test_rotacao_de_chave_busca_o_novo_kid(chaves, jwks):
+    publicadas, configurar = jwks
+    servidor = configurar()
+    publicadas.append(chaves["chave-1"])
+
+    async def cenario():
+        try:
+            assert (await auth_service.verify_jwt(_assinar(chaves["chave-1"])))["sub"] == "cliente-teste"
+            assert servidor.requisicoes == 1
+
+            # O Auth0 passa a assinar com a nova chave: o 'kid' desconhecido provoca uma nova busca
+            publicadas[:] = [chaves["chave-1"], chaves["chave-2"]]
+            assert (await auth_service.verify_jwt(_assinar(chaves["chave-2"])))["sub"] == "cliente-teste"
+            assert servidor.requisicoes == 2
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
+
+
+def test_kid_desconhecido_respeita_o_intervalo_minimo(chaves, jwks):
+    publicadas, configurar = jwks
+    servidor = configurar(intervalo_minimo=60)
+    publicadas.append(chaves["chave-1"])
+
+    async def cenario():
+        try:
+            await auth_service.verify_jwt(_assinar(chaves["chave-1"]))
+
+            # Tokens com chaves desconhecidas não geram uma busca cada dentro do intervalo mínimo
+            for _ in range(3):
+                with pytest.raises(HTTPException) as erro:
+                    await auth_service.verify_jwt(_assinar(chaves["chave-2"]))
+                assert erro.value.status_code == 401
+
+            assert servidor.requisicoes == 1
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
+
+
+def test_buscas_concorrentes_sao_agrupadas(chaves, jwks):
+    publicadas, configurar = jwks
+    servidor = configurar()
+    publicadas.append(chaves["chave-1"])
+
+    async def cenario():
+        try:
+            chaves_obtidas = await asyncio.gather(*(auth_service.cache_jwks.obter_chave("chave-1") for _ in range(10)))
+            assert all(chave == chaves["chave-1"]["jwk"] for chave in chaves_obtidas)
+            assert servidor.requisicoes == 1
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
+
+
+def test_cache_expirado_busca_as_chaves_novamente(chaves, jwks):
+    publicadas, configurar = jwks
+    servidor = configurar(ttl=0.2, intervalo_minimo=60)
+    publicadas.append(chaves["chave-1"])
+
+    async def cenario():
+        try:
+            await auth_service.cache_jwks.obter_chave("chave-1")
+            await auth_service.cache_jwks.obter_chave("chave-1")
+            assert servidor.requisicoes == 1
+
+            # A chave antiga deixa de ser publicada: após o TTL o cache reflete o JWKS atual
+            publicadas[:] = [chaves["chave-2"]]
+            await asyncio.sleep(0.3)
+            assert await auth_service.cache_jwks.obter_chave("chave-1") is None
+            assert await auth_service.cache_jwks.obter_chave("chave-2") == chaves["chave-2"]["jwk"]
+            assert servidor.requisicoes == 2
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
@@ -0,0 +1,39 @@
+import asyncio
+
+from exceptions.scraping_exceptions import CPFouNISNaoEncontrado
+from services.cache_service import CacheNegativo
+
+
+def _cache(diretorio):
+    return CacheNegativo(
+        str(diretorio), ativo=True, ttl=3600, capacidade=1000, taxa_falsos_positivos=0.01, intervalo_recarga=3600
+    )
+
+
+def test_remover_apaga_ausencia_registrada_por_outro_processo(tmp_path):
+    processo_a, processo_b = _cache(tmp_path), _cache(tmp_path)
+
+    async def cenario():
+        # O filtro do processo B é montado antes de A registrar a ausência
+        assert await processo_b.obter("52998224725") is None
+        await processo_a.registrar("52998224725", CPFouNISNaoEncontrado("não encontrado"))
+
+        await processo_b.remover("52998224725")
+
+        assert await _cache(tmp_path).obter("52998224725") is None
+
+    asyncio.run(cenario())
+
+
+def test_ausencia_registrada_por_outro_processo_aparece_apos_recarga(tmp_path):
+    processo_a, processo_b = _cache(tmp_path), _cache(tmp_path)
+    processo_b.intervalo_recarga = 0
+
+    async def cenario():
+        assert await processo_b.obter("52998224725") is None
+        await processo_a.registrar("52998224725", CPFouNISNaoEncontrado("não encontrado"))
+
+        registro = await processo_b.obter("52998224725")
+        assert registro["tipo_erro"] == "CPFouNISNaoEncontrado"
+
+    asyncio.run(cenario())
@@ -0,0 +1,25 @@
+from pages.portal_page import _nome_corresponde, _pontuar_nome
+
+
+def test_nome_igual_apos_normalizacao_corresponde():
+    assert _nome_corresponde("José da Silva", "JOSE  DA SILVA")
+    assert _nome_corresponde("Maria d'Ávila", "MARIA D AVILA")
+    assert _pontuar_nome("José da Silva", "JOSE  DA SILVA") == 1.0
+
+
+def test_nome_semelhante_nao_corresponde():
+    # Uma letra ou uma palavra de diferença pode ser outra pessoa
+    assert not _nome_corresponde("Maria Aparecida dos Santos Oliveira", "Maria Aparecida dos Santos Olivera")
+    assert not _nome_corresponde("Maria Aparecida dos Santos Oliveira", "Maria Aparecida Santos Oliveira")
+    assert _pontuar_nome("Maria Aparecida dos Santos Oliveira", "Maria Aparecida dos Santos Olivera") < 1.0
+
+
+def test_nome_com_palavras_em_outra_ordem_nao_corresponde():
+    assert not _nome_corresponde("Silva Jose", "Jose Silva")
+    assert _pontuar_nome("Silva Jose", "Jose Silva") < 1.0
+
+
+def test_nome_contido_corresponde_somente_com_filtro_social():
+    assert not _nome_corresponde("Jose Silva", "Jose Silva Junior")
+    assert _nome_corresponde("Jose Silva", "Jose Silva Junior", aceitar_contido=True)
+    assert not _nome_corresponde("Ana", "Mariana Souza", aceitar_contido=True)
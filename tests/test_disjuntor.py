@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from exceptions.scraping_exceptions import CircuitoAberto, PortalInacessivel
+from services import consulta_service
+from services.governador_service import ESTADO_ABERTO, ESTADO_FECHADO, Disjuntor, governador_portal
+
+TEMPO_ABERTO_SEGUNDOS = 0.2
+
+
+class _CheckpointVazio:
+    retomado = False
+
+    def resultado_parcial(self, erro):
+        return None
+
+
+class _CheckpointsEmMemoria:
+    async def abrir(self, chave):
+        return _CheckpointVazio()
+
+    async def remover(self, checkpoint):
+        pass
+
+
+@pytest.fixture
+def disjuntor(monkeypatch):
+    disjuntor = Disjuntor(falhas_para_abrir=2, tempo_aberto=TEMPO_ABERTO_SEGUNDOS)
+    monkeypatch.setattr(governador_portal, "disjuntor", disjuntor)
+    monkeypatch.setattr(consulta_service, "checkpoints_consultas", _CheckpointsEmMemoria())
+    monkeypatch.setattr(consulta_service, "fila_consultas", None)
+    monkeypatch.setattr(consulta_service, "COLETA_TENTATIVAS", 3)
+    monkeypatch.setattr(consulta_service, "COLETA_RECUO_INICIAL_SEGUNDOS", 0)
+    return disjuntor
+
+
+def _simular_portal(monkeypatch, respostas):
+    """
+    Substitui a execução da consulta no portal: cada tentativa consome a próxima resposta
+    (uma exceção é levantada, um dict é retornado). Retorna a lista de tentativas executadas.
+    """
+    tentativas = []
+
+    async def executar_consulta(search_data, aplicar_filtro_social, incluir_screenshot, checkpoint):
+        tentativas.append(search_data["identificador"])
+        resposta = respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    monkeypatch.setattr(consulta_service, "_executar_consulta", executar_consulta)
+    return tentativas
+
+
+def _consultar(identificador):
+    return consulta_service._consultar_e_salvar_em_cache(
+        f"teste-disjuntor|{identificador}", identificador, False, incluir_screenshot=False
+    )
+
+
+def test_consulta_de_teste_que_falha_reabre_o_disjuntor(disjuntor, monkeypatch):
+    tentativas = _simular_portal(monkeypatch, [PortalInacessivel("fora do ar")] * 3)
+
+    async def cenario():
+        # Duas tentativas com falha abrem o disjuntor, e a terceira tentativa não acessa o portal
+        with pytest.raises(CircuitoAberto):
+            await _consultar("52998224725")
+        assert disjuntor.estado == ESTADO_ABERTO
+        assert len(tentativas) == 2
+
+        with pytest.raises(CircuitoAberto):
+            await _consultar("52998224725")
+        assert len(tentativas) == 2
+
+        # Passado o tempo aberto, uma única consulta de teste é liberada; a falha dela reabre o disjuntor
+        await asyncio.sleep(TEMPO_ABERTO_SEGUNDOS)
+        with pytest.raises(CircuitoAberto):
+            await _consultar("52998224725")
+        assert len(tentativas) == 3
+        assert disjuntor.estado == ESTADO_ABERTO
+
+        with pytest.raises(CircuitoAberto):
+            await _consultar("52998224725")
+        assert len(tentativas) == 3
+
+    asyncio.run(cenario())
+
+
+def test_consulta_de_teste_bem_sucedida_fecha_o_disjuntor(disjuntor, monkeypatch):
+    disjuntor.registrar(PortalInacessivel("fora do ar"))
+    disjuntor.registrar(PortalInacessivel("fora do ar"))
+    assert disjuntor.estado == ESTADO_ABERTO
+
+    tentativas = _simular_portal(monkeypatch, [{"nome": "Fulano"}])
+
+    async def cenario():
+        await asyncio.sleep(TEMPO_ABERTO_SEGUNDOS)
+        dados = await _consultar("52998224725")
+        assert dados == {"nome": "Fulano"}
+        assert disjuntor.estado == ESTADO_FECHADO
+        assert len(tentativas) == 1
+
+    asyncio.run(cenario())
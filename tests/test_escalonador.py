@@ -0,0 +1,59 @@
+import asyncio
+
+from services.escalonador_service import PRIORIDADE_INTERATIVA, PRIORIDADE_LOTE, EscalonadorConsultas
+from services.governador_service import GovernadorPortal
+
+
+def _escalonador(governador):
+    return EscalonadorConsultas(
+        max_simultaneas=4, max_lote_simultaneas=3, max_simultaneas_por_cliente=10, cota_por_hora=0,
+        max_fila=100, tempo_maximo_fila=5, pesos={}, governador=governador
+    )
+
+
+def test_vagas_acompanham_o_limite_do_governador():
+    governador = GovernadorPortal(concorrencia_minima=1, concorrencia_maxima=4)
+    escalonador = _escalonador(governador)
+    assert (escalonador.estatisticas()["max_simultaneas"], escalonador.estatisticas()["max_lote_simultaneas"]) == (4, 3)
+
+    governador.limite = 2
+    assert (escalonador.estatisticas()["max_simultaneas"], escalonador.estatisticas()["max_lote_simultaneas"]) == (2, 1)
+
+    governador.limite = 1
+    assert (escalonador.estatisticas()["max_simultaneas"], escalonador.estatisticas()["max_lote_simultaneas"]) == (1, 1)
+
+
+def test_interativa_e_liberada_antes_dos_lotes_quando_o_limite_cai():
+    governador = GovernadorPortal(concorrencia_minima=1, concorrencia_maxima=4)
+    escalonador = _escalonador(governador)
+    governador.limite = 2
+    liberadas = []
+
+    async def consultar(cliente, prioridade, liberar):
+        async with escalonador.vaga(cliente, prioridade):
+            liberadas.append(prioridade)
+            await liberar.wait()
+
+    async def aguardar_liberadas(quantidade):
+        while len(liberadas) < quantidade:
+            await asyncio.sleep(0.01)
+
+    async def cenario():
+        liberar = asyncio.Event()
+        lotes = [asyncio.create_task(consultar(f"lote-{n}", PRIORIDADE_LOTE, liberar)) for n in range(3)]
+        try:
+            # Com o limite reduzido a 2, somente um lote é liberado e a outra vaga fica com a interativa
+            await asyncio.wait_for(aguardar_liberadas(1), 1)
+            await asyncio.sleep(0.05)
+            assert liberadas == [PRIORIDADE_LOTE]
+
+            interativa = asyncio.create_task(consultar("usuario", PRIORIDADE_INTERATIVA, liberar))
+            await asyncio.wait_for(aguardar_liberadas(2), 1)
+            assert liberadas == [PRIORIDADE_LOTE, PRIORIDADE_INTERATIVA]
+        finally:
+            liberar.set()
+
+        await asyncio.wait_for(asyncio.gather(*lotes, interativa), 1)
+        assert liberadas == [PRIORIDADE_LOTE, PRIORIDADE_INTERATIVA, PRIORIDADE_LOTE, PRIORIDADE_LOTE]
+
+    asyncio.run(cenario())
@@ -0,0 +1,40 @@
+"""
+Taxa das consultas em lote: lotes simultâneos compartilham o mesmo limitador.
+"""
+import asyncio
+import inspect
+import time
+
+from services import lote_service
+from services.lote_service import LimitadorTaxa, consultar_em_lote
+
+
+def test_lotes_simultaneos_compartilham_a_taxa(monkeypatch):
+    inicios = []
+
+    async def obter_dados_pessoa_fisica(identificador, aplicar_filtro_social, cliente=None, prioridade=None):
+        inicios.append(time.monotonic())
+        return {"identificador": identificador}, None, None
+
+    monkeypatch.setattr(lote_service, "obter_dados_pessoa_fisica", obter_dados_pessoa_fisica)
+    monkeypatch.setattr(lote_service, "classificar_e_estruturar_identificador", lambda identificador: {"tipo": "nome"})
+
+    async def cenario():
+        # 600 consultas por minuto: uma a cada 0,1s, somando os dois lotes
+        limitador = LimitadorTaxa(600)
+
+        async def lote(identificadores):
+            return [item async for item in consultar_em_lote(identificadores, paralelismo=2, limitador=limitador)]
+
+        resultados = await asyncio.gather(lote(["a", "b"]), lote(["c", "d"]))
+        assert all(item["erro"] is None for itens in resultados for item in itens)
+
+    asyncio.run(cenario())
+
+    inicios.sort()
+    assert len(inicios) == 4
+    assert all(posterior - anterior >= 0.09 for anterior, posterior in zip(inicios, inicios[1:]))
+
+
+def test_limitador_padrao_e_unico_no_processo():
+    assert inspect.signature(consultar_em_lote).parameters["limitador"].default is lote_service.limitador_lote
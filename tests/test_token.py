@@ -0,0 +1,105 @@
+"""
+Gerenciador de tokens verificado contra um servidor OAuth local: reaproveitamento, expiração,
+renovação antecipada em segundo plano e agrupamento de renovações concorrentes.
+"""
+import asyncio
+
+import pytest
+
+from services.http_client_service import fechar_cliente_http
+from services.token_service import GerenciadorToken
+
+
+@pytest.fixture
+def oauth(servidor_local):
+    """
+    Servidor OAuth local: cada emissão retorna um token numerado com o `expires_in` configurado.
+    """
+    configuracao = {"expires_in": 3600}
+    servidor = servidor_local(
+        lambda numero: {"access_token": f"token-{numero}", "expires_in": configuracao["expires_in"], "token_type": "Bearer"},
+        latencia_segundos=0.05,
+    )
+    return servidor, configuracao
+
+
+def _gerenciador(servidor, renovacao_antecipada=0, compartilhado=False, path_compartilhado=""):
+    return GerenciadorToken(
+        url=f"{servidor.url}/oauth/token",
+        renovacao_antecipada=renovacao_antecipada,
+        compartilhado=compartilhado,
+        path_compartilhado=path_compartilhado,
+    )
+
+
+def test_requisicoes_concorrentes_emitem_um_unico_token(oauth):
+    servidor, _ = oauth
+    gerenciador = _gerenciador(servidor)
+
+    async def cenario():
+        try:
+            tokens = await asyncio.gather(*(gerenciador.obter_token() for _ in range(10)))
+            assert set(tokens) == {"token-1"}
+
+            # Token em cache é reaproveitado sem nova emissão
+            assert await gerenciador.obter_token() == "token-1"
+            assert servidor.requisicoes == 1
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
+
+
+def test_token_expirado_e_emitido_novamente(oauth):
+    servidor, configuracao = oauth
+    configuracao["expires_in"] = 1
+    gerenciador = _gerenciador(servidor)
+
+    async def cenario():
+        try:
+            assert await gerenciador.obter_token() == "token-1"
+            await asyncio.sleep(1.1)
+            assert await gerenciador.obter_token() == "token-2"
+            assert servidor.requisicoes == 2
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
+
+
+def test_token_perto_de_expirar_e_renovado_em_segundo_plano(oauth):
+    servidor, _ = oauth
+    gerenciador = _gerenciador(servidor, renovacao_antecipada=3600)
+
+    async def cenario():
+        try:
+            assert await gerenciador.obter_token() == "token-1"
+
+            # Dentro da janela de renovação: o token atual é retornado e uma única renovação é agendada
+            tokens = await asyncio.gather(*(gerenciador.obter_token() for _ in range(5)))
+            assert set(tokens) == {"token-1"}
+
+            await gerenciador._tarefa_renovacao
+            assert servidor.requisicoes == 2
+            assert gerenciador._token == "token-2"
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
+
+
+def test_token_compartilhado_entre_gerenciadores(oauth, tmp_path):
+    servidor, _ = oauth
+    path_compartilhado = str(tmp_path / "sessao" / "token_auth0.json")
+    gerenciadores = [_gerenciador(servidor, compartilhado=True, path_compartilhado=path_compartilhado) for _ in range(3)]
+
+    async def cenario():
+        try:
+            # Cada gerenciador representa um worker: o token emitido pelo primeiro é lido do arquivo pelos demais
+            tokens = await asyncio.gather(*(gerenciador.obter_token() for gerenciador in gerenciadores))
+            assert set(tokens) == {"token-1"}
+            assert servidor.requisicoes == 1
+        finally:
+            await fechar_cliente_http()
+
+    asyncio.run(cenario())
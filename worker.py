@@ -0,0 +1,49 @@
+"""
+Worker de consultas: executa as consultas enfileiradas pela API em uma fila compartilhada.
+
+Execução (com FILA_BACKEND=redis):
+    python worker.py
+
+Vários workers podem ser executados ao mesmo tempo, em um ou mais nós, apontando para o mesmo Redis.
+"""
+import asyncio
+import signal
+
+from config.configuracoes import configuracoes
+from services.fila_service import FILA_BACKEND, fila_consultas
+from services.http_client_service import fechar_cliente_http
+from services.metricas_service import configurar_rastreamento, iniciar_servidor_metricas
+from services.pool_navegadores_service import pool_navegadores
+from services.worker_service import WorkerConsultas
+
+WORKER_PORTA_METRICAS = configuracoes.worker_porta_metricas
+
+
+async def main():
+    if FILA_BACKEND != "redis":
+        raise SystemExit("O worker requer uma fila compartilhada: defina FILA_BACKEND=redis.")
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sinal, parar.set)
+
+    configurar_rastreamento()
+    if WORKER_PORTA_METRICAS:
+        iniciar_servidor_metricas(WORKER_PORTA_METRICAS)
+
+    await pool_navegadores.iniciar()
+    worker = WorkerConsultas(fila_consultas)
+    await worker.iniciar()
+    print(f"Worker iniciado com {worker.concorrencia} consulta(s) simultânea(s).")
+
+    await parar.wait()
+
+    await worker.encerrar()
+    await pool_navegadores.encerrar()
+    await fila_consultas.fechar()
+    await fechar_cliente_http()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())